@@ -3,7 +3,7 @@
 import React, { useState, useCallback, useRef, useEffect } from 'react'
 import { Sidebar } from '@/components/sidebar'
 import { ChatArea } from '@/components/chat-area'
-import { useWebSocket, WSMessage } from '@/hooks/useWebSocket'
+import { useWebSocket, WSMessage, LOG_TIMINGS } from '@/hooks/useWebSocket'
 
 interface Document {
   id: string
@@ -112,12 +112,19 @@ export default function Home() {
       case 'pong':
         break
 
+      case 'timings':
+        // Also sent unrequested when the server has STREAM_TIMINGS_ENABLED; only log on opt-in
+        if (LOG_TIMINGS) {
+          console.debug('Pipeline timings:', message.timings)
+        }
+        break
+
       default:
         console.warn('Unknown message type:', message.type)
     }
   }, [])
 
-  const { isConnected, sendMessage: wsSendMessage } = useWebSocket({
+  const { isConnected, sendMessage: wsSendMessage, sendDraft } = useWebSocket({
     onMessage: handleWSMessage,
     onConnect: () => console.log('WebSocket connected'),
     onDisconnect: () => console.log('WebSocket disconnected'),
@@ -188,6 +195,7 @@ export default function Home() {
       <ChatArea
         messages={messages}
         onSendMessage={handleSendMessage}
+        onDraftChange={sendDraft}
         isLoading={isLoading}
         hasDocuments={successfulDocs.length > 0}
       />
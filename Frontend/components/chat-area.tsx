@@ -16,6 +16,7 @@ interface Message {
 interface ChatAreaProps {
   messages: Message[]
   onSendMessage: (message: string) => void
+  onDraftChange?: (draft: string) => void
   isLoading?: boolean
   hasDocuments: boolean
 }
@@ -23,6 +24,7 @@ interface ChatAreaProps {
 export function ChatArea({
   messages,
   onSendMessage,
+  onDraftChange,
   isLoading,
   hasDocuments,
 }: ChatAreaProps) {
@@ -65,6 +67,7 @@ export function ChatArea({
       <div className="shrink-0">
         <ChatInput
           onSendMessage={onSendMessage}
+          onDraftChange={onDraftChange}
           isDisabled={!hasDocuments}
           isLoading={isLoading}
         />
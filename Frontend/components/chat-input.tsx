@@ -5,12 +5,14 @@ import { Send } from 'lucide-react'
 
 interface ChatInputProps {
   onSendMessage: (message: string) => void
+  onDraftChange?: (draft: string) => void
   isDisabled?: boolean
   isLoading?: boolean
 }
 
 export function ChatInput({
   onSendMessage,
+  onDraftChange,
   isDisabled,
   isLoading,
 }: ChatInputProps) {
@@ -45,7 +47,10 @@ export function ChatInput({
           <textarea
             ref={textareaRef}
             value={input}
-            onChange={e => setInput(e.target.value)}
+            onChange={e => {
+              setInput(e.target.value)
+              onDraftChange?.(e.target.value)
+            }}
             onKeyDown={e => {
               if (e.key === 'Enter' && !e.shiftKey) {
                 e.preventDefault()
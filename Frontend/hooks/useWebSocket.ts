@@ -4,10 +4,14 @@ import { useState, useEffect, useRef, useCallback } from 'react'
 
 const WS_BASE_URL = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8000'
 
+// Opt-in: ask the server for per-stage pipeline timings with every message and log them
+export const LOG_TIMINGS = process.env.NEXT_PUBLIC_LOG_TIMINGS === 'true'
+
 export interface WSMessage {
-    type: 'token' | 'chunk' | 'complete' | 'error' | 'info' | 'pong' | 'sources' | 'done' | 'conversation_id'
+    type: 'token' | 'chunk' | 'complete' | 'error' | 'info' | 'pong' | 'sources' | 'done' | 'conversation_id' | 'timings'
     content?: string
     sources?: string[]
+    timings?: Record<string, number>
 }
 
 interface UseWebSocketOptions {
@@ -142,7 +146,18 @@ export function useWebSocket(options: UseWebSocketOptions = {}) {
 
     const sendMessage = useCallback((message: string, conversation_id?: string | null) => {
         if (wsRef.current?.readyState === WebSocket.OPEN) {
-            wsRef.current.send(JSON.stringify({ message, conversation_id }))
+            wsRef.current.send(JSON.stringify(
+                LOG_TIMINGS ? { message, conversation_id, timings: true } : { message, conversation_id }
+            ))
+            return true
+        }
+        return false
+    }, [])
+
+    // Partial input while typing; the server debounces and prefetches retrieval
+    const sendDraft = useCallback((message: string) => {
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+            wsRef.current.send(JSON.stringify({ type: 'draft', message }))
             return true
         }
         return false
@@ -157,5 +172,5 @@ export function useWebSocket(options: UseWebSocketOptions = {}) {
         }
     }, []) // eslint-disable-line react-hooks/exhaustive-deps
 
-    return { isConnected, isConnecting, connect, disconnect, sendMessage }
+    return { isConnected, isConnecting, connect, disconnect, sendMessage, sendDraft }
 }
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, model_validator
 
@@ -22,19 +23,131 @@ class Settings(BaseSettings):
     # Groq AI
     GROQ_API_KEY: str
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    # Shared keep-alive connection pool for Groq requests
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_TIMEOUT_SECONDS: float = 60.0
 
     # ChromaDB
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     CHROMA_COLLECTION_NAME: str = "documents"
 
+    # Multi-tenancy: every tenant gets its own Chroma collection, BM25 index, manifest and uploads.
+    # The tenant comes from TENANT_API_KEYS (X-API-Key) when set, otherwise from TENANT_HEADER;
+    # DEFAULT_TENANT keeps the single-tenant layout (CHROMA_COLLECTION_NAME in CHROMA_PERSIST_DIR)
+    TENANTS_ENABLED: bool = False
+    TENANT_HEADER: str = "X-Tenant-ID"
+    TENANT_API_KEYS: dict[str, str] = {}  # API key -> tenant ID (JSON in the environment)
+    DEFAULT_TENANT: str = "default"
+    TENANT_MAX_OPEN: int = 32  # tenant vector stores kept open (LRU); evicted ones reopen on demand
+    TENANT_MAX_DOCUMENTS: int = 0  # indexed files per tenant, 0 = unlimited
+    TENANT_MAX_STORAGE_MB: int = 0  # uploaded bytes per tenant, 0 = unlimited
+
     # Document Processing
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
 
+    # Blocking work (embedding, vector search, sync LLM calls) runs on this pool
+    BLOCKING_POOL_MAX_WORKERS: int = 8
+
+    # Embedding model: backend is sentence-transformers (PyTorch), onnx or onnx-int8 (ONNX Runtime, CPU)
+    EMBEDDING_BACKEND: str = "sentence-transformers"
+    EMBEDDING_MODEL: str = "BAAI/bge-m3"
+    EMBEDDING_DEVICE: Literal["auto", "cpu", "cuda", "mps"] = "auto"
+    EMBEDDING_THREADS: int = 0  # intra-op threads, 0 = library default
+    EMBEDDING_INTEROP_THREADS: int = 0  # inter-op threads, 0 = library default
+    EMBEDDING_BATCH_SIZE: int = 32  # texts per forward pass when embedding documents
+    EMBEDDING_MAX_LENGTH: int = 0  # ONNX backends: max tokens per text, 0 = model default
+    EMBEDDING_ONNX_DIR: str = "./onnx_models"  # ONNX exports are built here on first use
+
+    # Shared model server (python -m app.core.model_server) for running several web workers:
+    # embedding, vector search and manifest calls go over a Unix socket to one process
+    MODEL_SERVER_ENABLED: bool = False
+    MODEL_SERVER_SOCKET: str = "/tmp/rag-model-server.sock"
+    MODEL_SERVER_SLOTS: int = 16  # shared-memory vector transfers in flight per worker
+    MODEL_SERVER_SLOT_ROWS: int = 256  # vectors per slot; larger batches are split
+    MODEL_SERVER_TIMEOUT_SECONDS: float = 60.0
+    MODEL_SERVER_CONNECT_TIMEOUT_SECONDS: float = 300.0  # workers wait this long for the server to load
+
+    # Query embedding micro-batching (concurrent questions share one forward pass)
+    EMBED_BATCH_MAX_SIZE: int = 32
+    EMBED_BATCH_WINDOW_MS: float = 5.0
+
+    # Query embedding cache (LRU + TTL, keyed on normalized question text)
+    QUERY_EMBED_CACHE_SIZE: int = 2048
+    QUERY_EMBED_CACHE_TTL_SECONDS: int = 3600
+
+    # Retrieval: dense (embeddings), sparse (BM25 keywords) or hybrid (both, fused by RRF)
+    RETRIEVAL_MODE: Literal["dense", "sparse", "hybrid"] = "hybrid"
+    RETRIEVAL_TOP_K: int = 4
+    RETRIEVAL_CANDIDATES: int = 20  # per retriever, before fusion
+    RRF_K: int = 60
+
+    # Cross-encoder reranking (over-fetch RERANK_CANDIDATES, keep RERANK_TOP_N)
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_TOP_N: int = 4
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_BUDGET_MS: float = 150.0  # beyond this, retrieval order is kept
+    RERANK_CACHE_SIZE: int = 10000
+
+    # Prompt context packing (retrieved chunks are packed best-first up to this many tokens)
+    CONTEXT_MAX_TOKENS: int = 3000
+    CONTEXT_TOKENIZER: str = "cl100k_base"  # tiktoken encoding; estimated when tiktoken is missing
+
+    # Conversation history: last N turns verbatim, older turns folded into a running summary
+    HISTORY_SUMMARY_ENABLED: bool = True
+    HISTORY_VERBATIM_TURNS: int = 3
+    HISTORY_MAX_TOKENS: int = 1500
+    HISTORY_SUMMARY_MAX_TOKENS: int = 300
+
+    # Conversation store shared by all workers (memory is per-process and lost on restart)
+    CONVERSATION_STORE: Literal["memory", "sqlite", "redis"] = "memory"
+    CONVERSATION_SQLITE_PATH: str = ""  # defaults to CHROMA_PERSIST_DIR/conversations.sqlite3
+    CONVERSATION_TTL_SECONDS: int = 3600  # idle conversations expire after this long
+    CONVERSATION_MAX_SESSIONS: int = 100000  # least recently used beyond this are evicted
+    CONVERSATION_SWEEP_INTERVAL_SECONDS: float = 60.0  # background expiry sweep
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Share one retrieval + LLM stream between identical first-turn questions in flight together
+    COALESCE_ENABLED: bool = True
+
+    # Speculative retrieval from {"type": "draft"} WebSocket messages while the user types
+    DRAFT_PREFETCH_ENABLED: bool = True
+    DRAFT_DEBOUNCE_MS: float = 250.0  # input must be stable this long before searching
+    DRAFT_MATCH_THRESHOLD: float = 0.9  # similarity ratio for the final question to reuse the draft's results
+    DRAFT_MIN_CHARS: int = 8
+
+    # Send a {"type": "timings"} frame (per-stage pipeline timings) before "done" on /ws/chat;
+    # clients can also opt in per message with "timings": true
+    STREAM_TIMINGS_ENABLED: bool = False
+
+    # Persistent chunk-embedding cache (SQLite; defaults to CHROMA_PERSIST_DIR/embedding_cache.sqlite3)
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_PATH: str = ""
+    EMBED_CACHE_MAX_ENTRIES: int = 500000
+
+    # Semantic answer cache (reuses answers to near-duplicate first-turn questions)
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES: int = 1024
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+
+    # Ingestion pipeline (parse -> embed -> write, each with its own concurrency)
+    INGEST_QUEUE_SIZE: int = 100
+    INGEST_PARSE_WORKERS: int = 2
+    INGEST_EMBED_WORKERS: int = 1
+    INGEST_EMBED_BATCH_SIZE: int = 64
+    INGEST_WRITE_BATCH_SIZE: int = 256
+    INGEST_STAGE_QUEUE_SIZE: int = 8
+
     # File Upload
     UPLOAD_DIRECTORY: Path = Field(default=Path("./uploads"))
     ALLOWED_FILE_EXTENSIONS: list[str] = ['.pdf', '.txt', '.docx', '.doc']
     MAX_FILE_SIZE_MB: int = 50
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read/written per step while streaming uploads
 
     # Rate Limiting
     RATE_LIMIT: str = "10/minute"
@@ -0,0 +1,129 @@
+"""Semantic answer cache keyed on query embedding and corpus version."""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[str]
+    similarity: float
+
+
+class SemanticAnswerCache:
+    """
+    Reuses past answers for near-duplicate questions against an unchanged corpus.
+
+    Query vectors live in a preallocated float32 matrix used as a ring
+    buffer, so a lookup is a single matrix-vector product. Every entry
+    belongs to one corpus version and retrieval mode; seeing a newer
+    version drops them all, and an entry only answers its own mode.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.corpus_version: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._modes = np.full(max_entries, "", dtype="<U16")
+        self._answers: List[Optional[tuple]] = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(arr))
+        return arr / norm if norm else arr
+
+    def _is_stale(self, corpus_version: int) -> bool:
+        # A request that captured its version before a write must not roll the cache back
+        return self.corpus_version is not None and corpus_version < self.corpus_version
+
+    def _sync_version(self, corpus_version: int) -> None:
+        if self.corpus_version != corpus_version:
+            if self._size:
+                logger.info("Corpus version %s -> %s, dropping %d cached answers",
+                            self.corpus_version, corpus_version, self._size)
+            self._answers = [None] * self.max_entries
+            self._expires.fill(0)
+            self._modes.fill("")
+            self._size = 0
+            self._next = 0
+            self.corpus_version = corpus_version
+
+    def lookup(self, vector: List[float], corpus_version: int, mode: str = "") -> Optional[CachedAnswer]:
+        """Return the closest cached answer for ``mode`` above the similarity threshold, if any."""
+        query = self._normalize(vector)
+        with self._lock:
+            if self._is_stale(corpus_version):
+                self.misses += 1
+                return None
+            self._sync_version(corpus_version)
+            if not self._size or self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            scores = self._vectors[:self._size] @ query
+            scores[self._expires[:self._size] < time.monotonic()] = -1.0
+            scores[self._modes[:self._size] != mode] = -1.0
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            answer, sources = self._answers[best]
+            return CachedAnswer(answer=answer, sources=list(sources), similarity=similarity)
+
+    def store(
+        self, vector: List[float], answer: str, sources: List[str], corpus_version: int, mode: str = ""
+    ) -> None:
+        """Remember an answer for the given query vector, corpus version and retrieval mode.
+
+        An answer built against an older corpus version than the cache has
+        already seen is dropped rather than flushing the newer entries.
+        """
+        if self.max_entries <= 0 or not answer:
+            return
+        query = self._normalize(vector)
+        with self._lock:
+            if self._is_stale(corpus_version):
+                return
+            self._sync_version(corpus_version)
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self._vectors = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+                self._size = 0
+                self._next = 0
+
+            slot = self._next
+            self._vectors[slot] = query
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._answers[slot] = (answer, tuple(sources))
+            self._modes[slot] = mode
+            self._next = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "corpus_version": self.corpus_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
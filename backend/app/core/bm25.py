@@ -0,0 +1,261 @@
+"""Incremental in-process BM25 inverted index, persisted as an append-only log."""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+BM25_FILENAME = "bm25_index.jsonl"
+
+# Bump when tokenize() changes: logs written with an older tokenizer are rebuilt
+TOKENIZER_VERSION = 2
+
+# Compact the log once it holds this many times more chunk entries than live chunks
+_COMPACT_RATIO = 2.0
+_COMPACT_MIN_ENTRIES = 1000
+
+# Words, plus compound identifiers kept whole: "AB-1234", "v2.1.0", "ERR_TIMEOUT"
+_TOKEN_RE = re.compile(r"\w+(?:[-./:]\w+)*")
+_PART_RE = re.compile(r"[-./:_]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for indexing and querying.
+
+    Compound identifiers (part numbers, error codes, versions) are indexed
+    whole and also as their parts, so both "AB-1234" and "1234", or
+    "ERR_TIMEOUT" and "timeout", match.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            parts = [part for part in _PART_RE.split(token) if part]
+            if len(parts) > 1:
+                terms.extend(parts)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk IDs, kept in sync with the vector store.
+
+    Only term frequencies are stored, not chunk text: callers resolve hit
+    IDs against the vector store. Every change is appended to a JSONL log
+    next to the Chroma data; the log is replayed on start-up and compacted
+    into a snapshot whenever it holds far more chunk entries than live
+    chunks (on load, and as removals and re-adds accumulate at runtime).
+    """
+
+    def __init__(self, persist_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(persist_dir) / BM25_FILENAME
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._terms: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_len = 0
+        self._log_records = 0
+        self._log_entries = 0  # chunk IDs written to the log, live or dead
+        self.tokenizer_version = TOKENIZER_VERSION
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @property
+    def outdated(self) -> bool:
+        """Whether the index was built by an older tokenizer and needs rebuilding from the chunk texts."""
+        return self.tokenizer_version != TOKENIZER_VERSION
+
+    # -- persistence --------------------------------------------------------
+
+    def _load(self) -> None:
+        corrupt = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                # Logs from before versioning have no meta record
+                self.tokenizer_version = 1
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        logger.warning("Skipping corrupt BM25 log record")
+                        corrupt = True
+                        continue
+                    self._apply(record)
+                    self._log_records += 1
+                    self._log_entries += self._entries(record)
+        except FileNotFoundError:
+            return
+        logger.info("Loaded BM25 index: %d chunks, %d terms", len(self._terms), len(self._postings))
+        if self.outdated:
+            logger.warning("BM25 index was built by tokenizer v%d (current v%d); it needs rebuilding",
+                           self.tokenizer_version, TOKENIZER_VERSION)
+        elif corrupt or self._log_records > 2 * max(1, len(self._terms)):
+            # A torn line has no newline: appending after it would corrupt the next record too
+            self.compact()
+        else:
+            self._maybe_compact()
+
+    @staticmethod
+    def _entries(record: Dict) -> int:
+        return len(record.get("docs") or record.get("ids") or ())
+
+    def _append(self, record: Dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._log_records == 0:
+                f.write(json.dumps(self._meta(), separators=(",", ":")) + "\n")
+                self._log_records += 1
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log_records += 1
+        self._log_entries += self._entries(record)
+        self._maybe_compact()
+
+    def _meta(self) -> Dict:
+        return {"op": "meta", "tokenizer": self.tokenizer_version}
+
+    def _maybe_compact(self) -> None:
+        # Removed and re-added chunks leave dead entries behind; rewriting costs
+        # one pass over the live chunks, so wait until the log is several times that
+        if self._log_entries > max(_COMPACT_MIN_ENTRIES, _COMPACT_RATIO * len(self._terms)):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log as a single snapshot record."""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".tmp")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self._meta(), separators=(",", ":")) + "\n")
+                snapshot = {"op": "add", "docs": self._terms}
+                f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.path)
+            self._log_records = 2
+            self._log_entries = len(self._terms)
+            logger.debug("Compacted BM25 log to %d chunks", len(self._terms))
+
+    # -- mutation -----------------------------------------------------------
+
+    def _apply(self, record: Dict) -> None:
+        op = record["op"]
+        if op == "meta":
+            self.tokenizer_version = record.get("tokenizer", 1)
+        elif op == "add":
+            for chunk_id, terms in record["docs"].items():
+                self._add_terms(chunk_id, terms)
+        elif op == "remove":
+            for chunk_id in record["ids"]:
+                self._remove(chunk_id)
+        elif op == "clear":
+            self._postings.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._total_len = 0
+
+    def _add_terms(self, chunk_id: str, terms: Dict[str, int]) -> None:
+        # Re-adding an ID (upsert) replaces its previous terms
+        self._remove(chunk_id)
+        self._terms[chunk_id] = terms
+        self._lengths[chunk_id] = sum(terms.values())
+        self._total_len += self._lengths[chunk_id]
+        for term, tf in terms.items():
+            self._postings[term][chunk_id] = tf
+
+    def _remove(self, chunk_id: str) -> None:
+        terms = self._terms.pop(chunk_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._lengths.pop(chunk_id)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        docs = {chunk_id: dict(Counter(tokenize(text))) for chunk_id, text in zip(ids, texts)}
+        if not docs:
+            return
+        record = {"op": "add", "docs": docs}
+        with self._lock:
+            self._apply(record)
+            self._append(record)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            ids = [chunk_id for chunk_id in ids if chunk_id in self._terms]
+            if not ids:
+                return
+            record = {"op": "remove", "ids": ids}
+            self._apply(record)
+            self._append(record)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._apply({"op": "clear"})
+            self.tokenizer_version = TOKENIZER_VERSION
+            self.compact()
+
+    # -- search -------------------------------------------------------------
+
+    def search(self, query: str, k: int = 20, ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against ``query``.
+
+        Args:
+            query: Query text
+            k: Number of hits to return
+            ids: Only rank these chunks (e.g. the chunks matching a metadata
+                filter); IDF statistics still cover the whole index
+
+        Returns:
+            List of (chunk_id, score), best first
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._terms)
+            if not n_docs or not query_terms:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            idfs = {}
+            for term in query_terms:
+                posting = self._postings.get(term)
+                if posting:
+                    df = len(posting)
+                    idfs[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            def score(chunk_id: str, tf: int, idf: float) -> float:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_len)
+                return idf * tf * (self.k1 + 1) / (tf + norm)
+
+            scores: Dict[str, float] = defaultdict(float)
+            if ids is not None and len(ids) < sum(len(self._postings[term]) for term in idfs):
+                # Fewer allowed chunks than postings to walk: score just those chunks
+                for chunk_id in ids:
+                    terms = self._terms.get(chunk_id)
+                    if terms is None:
+                        continue
+                    for term, idf in idfs.items():
+                        tf = terms.get(term)
+                        if tf:
+                            scores[chunk_id] += score(chunk_id, tf, idf)
+            else:
+                allowed = set(ids) if ids is not None else None
+                for term, idf in idfs.items():
+                    for chunk_id, tf in self._postings[term].items():
+                        if allowed is None or chunk_id in allowed:
+                            scores[chunk_id] += score(chunk_id, tf, idf)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
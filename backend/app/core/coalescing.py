@@ -0,0 +1,116 @@
+"""Single-flight coalescing of identical in-flight streaming answers."""
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, Hashable, List, Optional
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Flight:
+    """One shared upstream stream and the chunks it has produced so far."""
+
+    def __init__(self):
+        self.chunks: List[Dict] = []
+        self.done = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Optional[Dict] = None) -> None:
+        if chunk is not None:
+            self.chunks.append(chunk)
+        # Wake everyone waiting on the current event, then arm a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncGenerator[Dict, None]:
+        """Yield every chunk from the start, then live chunks until the stream ends."""
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class StreamCoalescer:
+    """
+    Shares one upstream stream between concurrent identical requests.
+
+    The first request for a key starts the stream in a background task;
+    requests for the same key arriving while it runs subscribe to it and
+    first replay the chunks they missed. The stream is cancelled if every
+    subscriber goes away, and forgotten once it finishes, so only requests
+    that overlap in time are coalesced.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def _produce(self, key: Hashable, flight: _Flight, stream: AsyncIterator[Dict]) -> None:
+        try:
+            async for chunk in stream:
+                flight.publish(chunk)
+        except Exception as e:
+            logger.error("Shared stream failed: %s: %s", type(e).__name__, e)
+            flight.chunks.append({"type": "error", "content": f"{type(e).__name__}: {str(e)}"})
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.publish()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        start: Callable[[], AsyncIterator[Dict]]
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        Stream the chunks for ``key``, starting the upstream with ``start()`` unless already in flight.
+
+        Args:
+            key: Identity of the request; equal keys share one upstream
+            start: Factory for the upstream async iterator
+
+        Yields:
+            Dict: Upstream chunks, replayed from the beginning for late joiners
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.get_running_loop().create_task(self._produce(key, flight, start()))
+            self.started += 1
+        else:
+            self.joined += 1
+            logger.info("Joined in-flight answer (%d chunks to replay, %d subscribers)",
+                        len(flight.chunks), flight.subscribers + 1)
+
+        flight.subscribers += 1
+        try:
+            async for chunk in flight.follow():
+                yield chunk
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; stop paying for the upstream
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def aclose(self) -> None:
+        """Cancel shared streams still in flight."""
+        tasks = [flight.task for flight in self._flights.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,165 @@
+"""Token counting and token-budgeted packing of retrieved chunks into prompt context."""
+import functools
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+from langchain_core.documents import Document
+from app.config.settings import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CONTEXT_SEPARATOR = "\n\n"
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _estimate_tokens(text: str) -> int:
+    """BPE-style estimate: one token per punctuation mark, ~6 characters per word piece."""
+    return sum(1 + (len(piece) - 1) // 6 for piece in _WORD_RE.findall(text))
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(encoding_name: str = "cl100k_base") -> Callable[[str], int]:
+    """
+    Return a fast local token counter (one per encoding, built on first use).
+
+    Uses tiktoken when it is installed and its encoding is available,
+    otherwise a regex estimate that is close for English prose.
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.info("tiktoken encoding %s unavailable (%s), estimating token counts", encoding_name, e)
+        return _estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _overlap_length(head: str, tail: str, max_overlap: int, min_overlap: int) -> int:
+    """Length of the longest suffix of ``head`` that is also a prefix of ``tail``."""
+    if len(tail) < min_overlap or len(head) < min_overlap:
+        return 0
+    probe = tail[:min_overlap]
+    start = max(0, len(head) - max_overlap)
+    pos = head.find(probe, start)
+    while pos != -1:
+        length = len(head) - pos
+        if tail.startswith(head[pos:]):
+            return length
+        pos = head.find(probe, pos + 1)
+    return 0
+
+
+@dataclass
+class PackedContext:
+    text: str
+    documents: List[Document]
+    tokens: int
+    budget: int
+    dropped: int = 0
+    duplicates: int = 0
+    trimmed_chars: int = 0
+    per_chunk_tokens: List[int] = field(default_factory=list)
+
+
+class ContextPacker:
+    """
+    Packs ranked chunks into a context string under a token budget.
+
+    Chunks are taken best-first. Exact duplicates and chunks contained in
+    one already packed are skipped, and text shared with an adjacent chunk
+    of the same source (from the splitter's CHUNK_OVERLAP) is trimmed.
+    A chunk that does not fit the remaining budget is skipped so that
+    smaller lower-ranked chunks can still fill the space.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        max_overlap: int = 200,
+        min_overlap: int = 20,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        self.count_tokens = count_tokens or get_token_counter()
+        self._separator_tokens = self.count_tokens(CONTEXT_SEPARATOR)
+
+    def _dedupe(self, text: str, source, packed: List[Document]) -> Optional[str]:
+        """Strip text already present in packed chunks of the same source; None if nothing is left."""
+        for doc in packed:
+            if doc.metadata.get("source") != source:
+                continue
+            existing = doc.page_content
+            if text in existing:
+                return None
+            # This chunk continues one already packed...
+            cut = _overlap_length(existing, text, self.max_overlap, self.min_overlap)
+            if cut:
+                text = text[cut:]
+            # ...or precedes it
+            cut = _overlap_length(text, existing, self.max_overlap, self.min_overlap)
+            if cut:
+                text = text[:-cut]
+        return text if text.strip() else None
+
+    def pack(self, documents: List[Document]) -> PackedContext:
+        """
+        Pack ranked documents into a context string.
+
+        Args:
+            documents: Retrieved chunks, best first
+
+        Returns:
+            PackedContext: Context text, the chunks used and the tokens spent
+        """
+        packed: List[Document] = []
+        per_chunk: List[int] = []
+        seen = set()
+        used = dropped = duplicates = trimmed = 0
+
+        for doc in documents:
+            digest = hashlib.sha256(doc.page_content.encode("utf-8")).digest()
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+
+            text = self._dedupe(doc.page_content, doc.metadata.get("source"), packed)
+            if text is None:
+                duplicates += 1
+                continue
+
+            cost = self.count_tokens(text) + (self._separator_tokens if packed else 0)
+            if used + cost > self.max_tokens:
+                dropped += 1
+                continue
+
+            trimmed += len(doc.page_content) - len(text)
+            packed.append(Document(page_content=text, metadata=doc.metadata))
+            per_chunk.append(cost)
+            used += cost
+
+        return PackedContext(
+            text=CONTEXT_SEPARATOR.join(doc.page_content for doc in packed),
+            documents=packed,
+            tokens=used,
+            budget=self.max_tokens,
+            dropped=dropped,
+            duplicates=duplicates,
+            trimmed_chars=trimmed,
+            per_chunk_tokens=per_chunk
+        )
+
+
+def create_context_packer() -> ContextPacker:
+    """Create a ContextPacker configured from settings."""
+    return ContextPacker(
+        max_tokens=settings.CONTEXT_MAX_TOKENS,
+        max_overlap=settings.CHUNK_OVERLAP,
+        count_tokens=get_token_counter(settings.CONTEXT_TOKENIZER)
+    )
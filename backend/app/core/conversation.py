@@ -1,9 +1,10 @@
-"""In-memory conversation history manager."""
-from collections import defaultdict
+"""Conversation history models and manager."""
+import asyncio
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Callable, List, Optional
 import time
 import uuid
+from app.config.settings import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -11,43 +12,78 @@ logger = get_logger(__name__)
 # Maximum number of message pairs (user + assistant) to keep per conversation
 MAX_HISTORY_TURNS = 10
 # Conversations expire after this many seconds of inactivity
-CONVERSATION_TTL_SECONDS = 3600  # 1 hour
+CONVERSATION_TTL_SECONDS = settings.CONVERSATION_TTL_SECONDS
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     role: str  # "user" or "assistant"
     content: str
     timestamp: float = field(default_factory=time.time)
+    seq: int = 0  # position in the conversation, assigned by the store on append
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     id: str
     messages: List[Message] = field(default_factory=list)
     created_at: float = field(default_factory=time.time)
     last_active: float = field(default_factory=time.time)
-
-    def add_user_message(self, content: str) -> None:
-        self.messages.append(Message(role="user", content=content))
-        self.last_active = time.time()
-
-    def add_assistant_message(self, content: str) -> None:
-        self.messages.append(Message(role="assistant", content=content))
-        self.last_active = time.time()
-
-    def get_history_text(self) -> str:
-        """Format history as text for injection into the LLM prompt."""
-        if not self.messages:
+    # Running summary of every message with seq < summary_upto
+    summary: str = ""
+    summary_upto: int = 0
+
+    def get_history_text(
+        self,
+        max_tokens: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ) -> str:
+        """
+        Format history as text for injection into the LLM prompt.
+
+        Args:
+            max_tokens: Token budget for the whole history section (unbounded if None)
+            count_tokens: Token counter used to enforce the budget
+
+        Returns:
+            str: Running summary (if any) followed by the most recent messages
+            verbatim, dropping the oldest messages that do not fit the budget
+        """
+        if not self.messages and not self.summary:
             return ""
 
+        header = [f"Summary of earlier conversation: {self.summary}"] if self.summary else []
+
         # Keep only the last N turns (pairs of user+assistant)
         recent = self.messages[-(MAX_HISTORY_TURNS * 2):]
         lines = []
         for msg in recent:
             prefix = "User" if msg.role == "user" else "Assistant"
             lines.append(f"{prefix}: {msg.content}")
-        return "\n".join(lines)
+
+        if max_tokens is None or count_tokens is None:
+            return "\n".join(header + lines)
+
+        budget = max_tokens
+        if header:
+            cost = count_tokens(header[0])
+            if cost > budget:
+                header = []
+            else:
+                budget -= cost
+
+        # Newest first, so the turns the question most likely refers to survive
+        kept = []
+        for line in reversed(lines):
+            cost = count_tokens(line) + 1
+            if cost > budget:
+                if not kept and budget > 0:
+                    # Always keep part of the latest message rather than nothing
+                    kept.append(line[:max(1, len(line) * (budget - 1) // cost)] + "…")
+                break
+            kept.append(line)
+            budget -= cost
+        return "\n".join(header + kept[::-1])
 
     @property
     def is_expired(self) -> bool:
@@ -55,49 +91,82 @@ class Conversation:
 
 
 class ConversationManager:
-    """Thread-safe in-memory conversation store."""
-
-    def __init__(self):
-        self._conversations: Dict[str, Conversation] = {}
-
-    def get_or_create(self, conversation_id: Optional[str] = None) -> Conversation:
+    """
+    Conversation access on top of a pluggable ConversationStore.
+
+    Each request works on a snapshot (summary plus the most recent
+    messages) loaded from the store; new messages are appended to the
+    store as they happen, so any worker can serve the next turn. Expired
+    conversations are removed by a periodic background sweep rather than
+    on the request path.
+    """
+
+    def __init__(self, store=None, history_messages: int = MAX_HISTORY_TURNS * 2):
+        if store is None:
+            from app.core.conversation_store import create_conversation_store
+
+            store = create_conversation_store()
+        self.store = store
+        self.history_messages = history_messages
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """Start purging expired conversations every ``interval_seconds``."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep(interval_seconds))
+
+    async def _sweep(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.store.purge_expired()
+            except Exception as e:
+                logger.warning("Conversation sweep failed: %s", e)
+
+    async def get_or_create(self, conversation_id: Optional[str] = None) -> Conversation:
         """Get existing conversation or create a new one."""
-        # Cleanup expired conversations periodically
-        self._cleanup_expired()
-
-        if conversation_id and conversation_id in self._conversations:
-            conv = self._conversations[conversation_id]
-            if not conv.is_expired:
+        if conversation_id:
+            conv = await self.store.load(conversation_id, self.history_messages)
+            if conv is not None:
                 return conv
-            else:
-                logger.info("Conversation %s expired, creating new", conversation_id)
-                del self._conversations[conversation_id]
+            logger.info("Conversation %s not found or expired, creating new", conversation_id)
 
         # Create new conversation
         new_id = conversation_id or uuid.uuid4().hex[:16]
-        conv = Conversation(id=new_id)
-        self._conversations[new_id] = conv
-        logger.info("Created conversation %s (total active: %d)",
-                    new_id, len(self._conversations))
+        conv = await self.store.create(new_id)
+        logger.info("Created conversation %s", new_id)
         return conv
 
-    def get(self, conversation_id: str) -> Optional[Conversation]:
+    async def get(self, conversation_id: str) -> Optional[Conversation]:
         """Get conversation by ID, returns None if not found or expired."""
-        conv = self._conversations.get(conversation_id)
-        if conv and not conv.is_expired:
-            return conv
-        return None
-
-    def _cleanup_expired(self) -> None:
-        """Remove expired conversations."""
-        expired = [
-            cid for cid, conv in self._conversations.items()
-            if conv.is_expired
-        ]
-        for cid in expired:
-            del self._conversations[cid]
-        if expired:
-            logger.info("Cleaned up %d expired conversations", len(expired))
+        return await self.store.load(conversation_id, self.history_messages)
+
+    async def _append(self, conv: Conversation, role: str, content: str) -> Message:
+        message = Message(role=role, content=content)
+        await self.store.append(conv.id, [message])
+        conv.messages.append(message)
+        conv.last_active = message.timestamp
+        return message
+
+    async def add_user_message(self, conv: Conversation, content: str) -> Message:
+        return await self._append(conv, "user", content)
+
+    async def add_assistant_message(self, conv: Conversation, content: str) -> Message:
+        return await self._append(conv, "assistant", content)
+
+    async def save_summary(self, conv: Conversation, summary: str, upto: int) -> None:
+        """Record a running summary covering every message with seq < ``upto``."""
+        await self.store.set_summary(conv.id, summary, upto)
+        conv.summary = summary
+        conv.summary_upto = upto
+        conv.messages = [msg for msg in conv.messages if msg.seq >= upto]
+
+    async def aclose(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        await self.store.aclose()
 
 
 # Global conversation manager instance
@@ -0,0 +1,557 @@
+"""Pluggable conversation persistence: in-memory, SQLite (WAL) and Redis backends."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+from app.config.settings import settings
+from app.core.conversation import CONVERSATION_TTL_SECONDS, MAX_HISTORY_TURNS, Conversation, Message
+from app.core.executor import blocking_executor
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConversationStore(ABC):
+    """
+    Storage for conversations shared by every worker process.
+
+    Messages are only ever appended; each gets a per-conversation sequence
+    number. Reads return the running summary plus the newest messages not
+    yet folded into it. Conversations expire ``ttl_seconds`` after their
+    last read or write, enforced by the backend itself.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+        max_messages: int = MAX_HISTORY_TURNS * 2,
+        max_sessions: int = 100000
+    ):
+        self.ttl = ttl_seconds
+        # Messages older than this are never read back, so backends may discard them
+        self.max_messages = max_messages
+        # Least recently used conversations beyond this are evicted
+        self.max_sessions = max_sessions
+
+    @abstractmethod
+    async def create(self, conversation_id: str) -> Conversation:
+        """Create (or reset) an empty conversation."""
+
+    @abstractmethod
+    async def load(self, conversation_id: str, last_n: int) -> Optional[Conversation]:
+        """Summary plus up to ``last_n`` newest unsummarized messages; None if missing or expired."""
+
+    @abstractmethod
+    async def append(self, conversation_id: str, messages: List[Message]) -> None:
+        """Append messages, assigning their ``seq`` in place."""
+
+    @abstractmethod
+    async def set_summary(self, conversation_id: str, summary: str, upto: int) -> None:
+        """Store a running summary covering every message with seq < ``upto``."""
+
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> None:
+        """Drop a conversation and its messages."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of live conversations."""
+
+    async def purge_expired(self) -> int:
+        """Remove expired conversations and enforce ``max_sessions`` (run by the periodic sweeper)."""
+        return 0
+
+    async def aclose(self) -> None:
+        """Release connections."""
+
+
+# -- in-memory ----------------------------------------------------------------
+
+@dataclass(slots=True)
+class _MemoryRecord:
+    created_at: float
+    expires_at: float
+    messages: List[Message] = field(default_factory=list)
+    total: int = 0
+    summary: str = ""
+    summary_upto: int = 0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Process-local store; conversations do not survive restarts or span workers.
+
+    Records are kept in least-recently-used order. With a fixed TTL that
+    is also expiry order, so every access is O(1) and ``purge_expired``
+    only touches the conversations it removes. Beyond ``max_sessions`` the
+    least recently used conversation is evicted.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+        max_messages: int = MAX_HISTORY_TURNS * 2,
+        max_sessions: int = 100000
+    ):
+        super().__init__(ttl_seconds, max_messages, max_sessions)
+        self._records: "OrderedDict[str, _MemoryRecord]" = OrderedDict()
+
+    def _live(self, conversation_id: str, now: float) -> Optional[_MemoryRecord]:
+        """Record if present and unexpired, moved to the most recently used end."""
+        record = self._records.get(conversation_id)
+        if record is None:
+            return None
+        if record.expires_at <= now:
+            del self._records[conversation_id]
+            return None
+        record.expires_at = now + self.ttl
+        self._records.move_to_end(conversation_id)
+        return record
+
+    def _insert(self, conversation_id: str, now: float) -> _MemoryRecord:
+        record = self._records[conversation_id] = _MemoryRecord(created_at=now, expires_at=now + self.ttl)
+        self._records.move_to_end(conversation_id)
+        evicted = 0
+        while len(self._records) > self.max_sessions:
+            self._records.popitem(last=False)
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d least recently used conversations (cap %d)", evicted, self.max_sessions)
+        return record
+
+    async def create(self, conversation_id: str) -> Conversation:
+        now = time.time()
+        self._insert(conversation_id, now)
+        return Conversation(id=conversation_id, created_at=now, last_active=now)
+
+    async def load(self, conversation_id: str, last_n: int) -> Optional[Conversation]:
+        record = self._live(conversation_id, time.time())
+        if record is None:
+            return None
+        unsummarized = [msg for msg in record.messages[-last_n:] if msg.seq >= record.summary_upto]
+        return Conversation(
+            id=conversation_id,
+            messages=unsummarized,
+            created_at=record.created_at,
+            last_active=unsummarized[-1].timestamp if unsummarized else record.created_at,
+            summary=record.summary,
+            summary_upto=record.summary_upto
+        )
+
+    async def append(self, conversation_id: str, messages: List[Message]) -> None:
+        now = time.time()
+        record = self._live(conversation_id, now) or self._insert(conversation_id, now)
+        for message in messages:
+            message.seq = record.total
+            record.total += 1
+            record.messages.append(message)
+        del record.messages[:-self.max_messages]
+
+    async def set_summary(self, conversation_id: str, summary: str, upto: int) -> None:
+        record = self._live(conversation_id, time.time())
+        if record is not None and upto >= record.summary_upto:
+            record.summary = summary
+            record.summary_upto = upto
+
+    async def delete(self, conversation_id: str) -> None:
+        self._records.pop(conversation_id, None)
+
+    async def count(self) -> int:
+        return len(self._records)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        purged = 0
+        # Oldest first: stop at the first conversation that is still live
+        while self._records:
+            record = next(iter(self._records.values()))
+            if record.expires_at > now:
+                break
+            self._records.popitem(last=False)
+            purged += 1
+        if purged:
+            logger.info("Cleaned up %d expired conversations", purged)
+        return purged
+
+
+# -- SQLite -------------------------------------------------------------------
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite database in WAL mode, shareable by every worker on one host.
+
+    SQLite has no native expiry, so each row carries an indexed
+    ``expires_at``: reads ignore expired rows and the periodic
+    ``purge_expired`` deletes them along with conversations beyond
+    ``max_sessions``. Queries run on the blocking pool.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+        max_messages: int = MAX_HISTORY_TURNS * 2,
+        max_sessions: int = 100000
+    ):
+        super().__init__(ttl_seconds, max_messages, max_sessions)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                summary TEXT NOT NULL DEFAULT '',
+                summary_upto INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversations_expires ON conversations(expires_at);
+            CREATE TABLE IF NOT EXISTS messages (
+                conversation_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (conversation_id, seq)
+            ) WITHOUT ROWID;
+        """)
+        logger.info("SQLite conversation store at %s", self.path)
+
+    def _create(self, conversation_id: str) -> Conversation:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO conversations (id, created_at, expires_at) VALUES (?, ?, ?)",
+                    (conversation_id, now, now + self.ttl)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Conversation(id=conversation_id, created_at=now, last_active=now)
+
+    def _load(self, conversation_id: str, last_n: int) -> Optional[Conversation]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE conversations SET expires_at = ? WHERE id = ? AND expires_at > ?",
+                (now + self.ttl, conversation_id, now)
+            )
+            if not row.rowcount:
+                return None
+            created_at, total, summary, upto = self._conn.execute(
+                "SELECT created_at, total, summary, summary_upto FROM conversations WHERE id = ?",
+                (conversation_id,)
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT seq, role, content, timestamp FROM messages"
+                " WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+                (conversation_id, max(upto, total - last_n))
+            ).fetchall()
+        messages = [Message(role=role, content=content, timestamp=ts, seq=seq) for seq, role, content, ts in rows]
+        return Conversation(
+            id=conversation_id,
+            messages=messages,
+            created_at=created_at,
+            last_active=messages[-1].timestamp if messages else created_at,
+            summary=summary,
+            summary_upto=upto
+        )
+
+    def _append(self, conversation_id: str, messages: List[Message]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO conversations (id, created_at, expires_at) VALUES (?, ?, ?)",
+                    (conversation_id, now, now)
+                )
+                total = self._conn.execute(
+                    "SELECT total FROM conversations WHERE id = ?", (conversation_id,)
+                ).fetchone()[0]
+                for offset, message in enumerate(messages):
+                    message.seq = total + offset
+                self._conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    [(conversation_id, m.seq, m.role, m.content, m.timestamp) for m in messages]
+                )
+                total += len(messages)
+                self._conn.execute(
+                    "UPDATE conversations SET total = ?, expires_at = ? WHERE id = ?",
+                    (total, now + self.ttl, conversation_id)
+                )
+                self._conn.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND seq < ?",
+                    (conversation_id, total - self.max_messages)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _set_summary(self, conversation_id: str, summary: str, upto: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE conversations SET summary = ?, summary_upto = ? WHERE id = ? AND summary_upto <= ?",
+                (summary, upto, conversation_id, upto)
+            )
+
+    def _delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                self._conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM conversations WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def _purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                doomed = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM conversations WHERE expires_at <= ?", (now,)
+                )]
+                expired = len(doomed)
+                # Least recently used beyond the cap (expiry order is access order)
+                doomed.extend(row[0] for row in self._conn.execute(
+                    "SELECT id FROM conversations WHERE expires_at > ?"
+                    " ORDER BY expires_at DESC LIMIT -1 OFFSET ?", (now, self.max_sessions)
+                ))
+                params = [(cid,) for cid in doomed]
+                self._conn.executemany("DELETE FROM messages WHERE conversation_id = ?", params)
+                self._conn.executemany("DELETE FROM conversations WHERE id = ?", params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if expired:
+            logger.info("Cleaned up %d expired conversations", expired)
+        if len(doomed) > expired:
+            logger.info("Evicted %d least recently used conversations (cap %d)",
+                        len(doomed) - expired, self.max_sessions)
+        return len(doomed)
+
+    async def create(self, conversation_id: str) -> Conversation:
+        return await blocking_executor.run(self._create, conversation_id)
+
+    async def load(self, conversation_id: str, last_n: int) -> Optional[Conversation]:
+        return await blocking_executor.run(self._load, conversation_id, last_n)
+
+    async def append(self, conversation_id: str, messages: List[Message]) -> None:
+        await blocking_executor.run(self._append, conversation_id, messages)
+
+    async def set_summary(self, conversation_id: str, summary: str, upto: int) -> None:
+        await blocking_executor.run(self._set_summary, conversation_id, summary, upto)
+
+    async def delete(self, conversation_id: str) -> None:
+        await blocking_executor.run(self._delete, conversation_id)
+
+    async def count(self) -> int:
+        return await blocking_executor.run(self._count)
+
+    async def purge_expired(self) -> int:
+        return await blocking_executor.run(self._purge_expired)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# -- Redis --------------------------------------------------------------------
+
+class RedisConversationStore(ConversationStore):
+    """
+    Redis (or any Redis-protocol server) with native key expiry.
+
+    Per conversation there is a hash (``conv:{id}``: created_at, total,
+    summary, summary_upto) and a capped list of JSON messages
+    (``conv:{id}:messages``). Every read and write is a single MULTI/EXEC
+    round trip that also refreshes the TTL of both keys and the
+    conversation's last-access score in a sorted-set index, which the
+    sweeper uses to evict beyond ``max_sessions``. Pass ``client`` to use
+    a pre-built ``redis.asyncio`` compatible client (e.g. fakeredis).
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+        max_messages: int = MAX_HISTORY_TURNS * 2,
+        max_sessions: int = 100000,
+        key_prefix: str = "conv:",
+        client=None
+    ):
+        super().__init__(ttl_seconds, max_messages, max_sessions)
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.prefix = key_prefix
+        self.index_key = f"{key_prefix}__sessions__"
+        self._ttl_ms = int(self.ttl * 1000)
+
+    def _keys(self, conversation_id: str):
+        meta = f"{self.prefix}{conversation_id}"
+        return meta, f"{meta}:messages"
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def create(self, conversation_id: str) -> Conversation:
+        meta, messages = self._keys(conversation_id)
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(meta, messages)
+            pipe.hset(meta, mapping={"created_at": now, "total": 0, "summary": "", "summary_upto": 0})
+            pipe.pexpire(meta, self._ttl_ms)
+            pipe.zadd(self.index_key, {conversation_id: now})
+            await pipe.execute()
+        return Conversation(id=conversation_id, created_at=now, last_active=now)
+
+    async def load(self, conversation_id: str, last_n: int) -> Optional[Conversation]:
+        meta, messages = self._keys(conversation_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(meta)
+            pipe.lrange(messages, -last_n, -1)
+            pipe.pexpire(meta, self._ttl_ms)
+            pipe.pexpire(messages, self._ttl_ms)
+            pipe.zadd(self.index_key, {conversation_id: time.time()}, xx=True)
+            fields, raw_messages = (await pipe.execute())[:2]
+        if not fields:
+            # Expired: the pipeline just refreshed its index score, drop it instead
+            await self.redis.zrem(self.index_key, conversation_id)
+            return None
+
+        fields = {self._text(k): self._text(v) for k, v in fields.items()}
+        total = int(fields.get("total", 0))
+        upto = int(fields.get("summary_upto", 0))
+        # The list holds the newest messages; the last one has seq == total - 1
+        first_seq = total - len(raw_messages)
+        loaded = []
+        for offset, raw in enumerate(raw_messages):
+            seq = first_seq + offset
+            if seq < upto:
+                continue
+            data = json.loads(raw)
+            loaded.append(Message(role=data["role"], content=data["content"], timestamp=data["ts"], seq=seq))
+
+        created_at = float(fields.get("created_at", time.time()))
+        return Conversation(
+            id=conversation_id,
+            messages=loaded,
+            created_at=created_at,
+            last_active=loaded[-1].timestamp if loaded else created_at,
+            summary=fields.get("summary", ""),
+            summary_upto=upto
+        )
+
+    async def append(self, conversation_id: str, messages: List[Message]) -> None:
+        meta, key = self._keys(conversation_id)
+        payloads = [
+            json.dumps({"role": m.role, "content": m.content, "ts": m.timestamp}, separators=(",", ":"))
+            for m in messages
+        ]
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(meta, "created_at", now)
+            pipe.hincrby(meta, "total", len(messages))
+            pipe.rpush(key, *payloads)
+            pipe.ltrim(key, -self.max_messages, -1)
+            pipe.pexpire(meta, self._ttl_ms)
+            pipe.pexpire(key, self._ttl_ms)
+            pipe.zadd(self.index_key, {conversation_id: now})
+            results = await pipe.execute()
+        total = int(results[1])
+        for offset, message in enumerate(messages):
+            message.seq = total - len(messages) + offset
+
+    async def set_summary(self, conversation_id: str, summary: str, upto: int) -> None:
+        from redis.exceptions import WatchError
+
+        meta, _ = self._keys(conversation_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # Optimistic check-and-set: never replace a summary covering more messages
+            while True:
+                try:
+                    await pipe.watch(meta)
+                    total, current = await pipe.hmget(meta, "total", "summary_upto")
+                    if total is None or upto < int(current or 0):
+                        await pipe.reset()
+                        return
+                    pipe.multi()
+                    pipe.hset(meta, mapping={"summary": summary, "summary_upto": upto})
+                    pipe.pexpire(meta, self._ttl_ms)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    async def delete(self, conversation_id: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._keys(conversation_id))
+            pipe.zrem(self.index_key, conversation_id)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        return await self.redis.zcard(self.index_key)
+
+    async def purge_expired(self) -> int:
+        # Expired keys are gone already; drop their index entries
+        expired = await self.redis.zremrangebyscore(self.index_key, "-inf", time.time() - self.ttl)
+        overflow = await self.redis.zcard(self.index_key) - self.max_sessions
+        evicted = 0
+        if overflow > 0:
+            oldest = [self._text(cid) for cid in await self.redis.zrange(self.index_key, 0, overflow - 1)]
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for cid in oldest:
+                    pipe.delete(*self._keys(cid))
+                pipe.zrem(self.index_key, *oldest)
+                await pipe.execute()
+            evicted = len(oldest)
+            logger.info("Evicted %d least recently used conversations (cap %d)", evicted, self.max_sessions)
+        if expired:
+            logger.info("Cleaned up %d expired conversations", expired)
+        return expired + evicted
+
+    async def aclose(self) -> None:
+        await self.redis.aclose()
+
+
+def create_conversation_store() -> ConversationStore:
+    """Create the conversation store selected by settings.CONVERSATION_STORE."""
+    backend = settings.CONVERSATION_STORE
+    limits = {"ttl_seconds": CONVERSATION_TTL_SECONDS, "max_sessions": settings.CONVERSATION_MAX_SESSIONS}
+    if backend == "sqlite":
+        path = settings.CONVERSATION_SQLITE_PATH or os.path.join(settings.CHROMA_PERSIST_DIR, "conversations.sqlite3")
+        return SQLiteConversationStore(path, **limits)
+    if backend == "redis":
+        return RedisConversationStore(settings.REDIS_URL, **limits)
+    return InMemoryConversationStore(**limits)
@@ -1,18 +1,19 @@
 """Document loading utilities"""
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
+from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, Docx2txtLoader
 
 
-def load_document(file_path: str) -> List:
+def get_loader(file_path: str):
     """
-    Load a document based on file extension
+    Pick a loader based on file extension
     
     Args:
         file_path: Path to document file
     
     Returns:
-        List: Loaded documents
+        BaseLoader: Loader for the file
     
     Raises:
         ValueError: If file type not supported
@@ -20,12 +21,57 @@ def load_document(file_path: str) -> List:
     file_extension = Path(file_path).suffix.lower()
     
     if file_extension == '.pdf':
-        loader = PyPDFLoader(file_path)
+        return PyPDFLoader(file_path)
     elif file_extension == '.txt':
-        loader = TextLoader(file_path)
+        return TextLoader(file_path)
     elif file_extension in ['.docx', '.doc']:
-        loader = Docx2txtLoader(file_path)
+        return Docx2txtLoader(file_path)
     else:
         raise ValueError(f"Unsupported file type: {file_extension}")
+
+
+def load_document(file_path: str) -> List:
+    """
+    Load a document based on file extension
     
-    return loader.load()
+    Args:
+        file_path: Path to document file
+    
+    Returns:
+        List: Loaded documents
+    
+    Raises:
+        ValueError: If file type not supported
+    """
+    return get_loader(file_path).load()
+
+
+def lazy_load_document(file_path: str) -> Iterator:
+    """
+    Load a document one page (or section) at a time
+    
+    Args:
+        file_path: Path to document file
+    
+    Yields:
+        Document: Next page of the document
+    
+    Raises:
+        ValueError: If file type not supported
+    """
+    if Path(file_path).suffix.lower() == '.pdf':
+        return _lazy_load_pdf(file_path)
+    return get_loader(file_path).lazy_load()
+
+
+def _lazy_load_pdf(file_path: str) -> Iterator[Document]:
+    """Yield PDF pages with the same metadata as PyPDFLoader, without caching page content."""
+    import pypdf
+
+    with open(file_path, "rb") as f:
+        reader = pypdf.PdfReader(f)
+        for page_number, page in enumerate(reader.pages):
+            text = page.extract_text()
+            # pypdf keeps every decoded content stream; drop them once the page is read
+            reader.resolved_objects.clear()
+            yield Document(page_content=text, metadata={"source": file_path, "page": page_number})
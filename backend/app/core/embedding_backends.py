@@ -0,0 +1,341 @@
+"""
+Embedding model backends, selected by ``EMBEDDING_BACKEND``.
+
+- ``sentence-transformers``: the PyTorch model, on the best available device
+- ``onnx``: the same model exported to ONNX and run by ONNX Runtime
+- ``onnx-int8``: the ONNX export with dynamically int8-quantized weights (CPU)
+
+The ONNX exports are built on first use and kept under ``EMBEDDING_ONNX_DIR``.
+
+Concurrent queries are coalesced by ``BatchedEmbeddings``, which batches
+them through the model's ``embed_queries(texts)`` if it has one and through
+``embed_documents`` otherwise. A backend whose query path differs from its
+document path (a query instruction, prompt or prefix) must provide
+``embed_queries``.
+"""
+import json
+import os
+import shutil
+import time
+from typing import Callable, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.config.settings import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+EmbeddingBackend = Callable[..., Embeddings]
+
+EMBEDDING_BACKENDS: Dict[str, EmbeddingBackend] = {}
+
+
+def register_embedding_backend(name: str):
+    """Register a backend factory under ``name``; the factory takes the keyword arguments of ``create_embedding_model``."""
+    def decorator(factory: EmbeddingBackend) -> EmbeddingBackend:
+        EMBEDDING_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+def embedding_model_id(backend: str, model_name: str) -> str:
+    """
+    Identity of the vectors a backend produces, for keying persisted embeddings.
+
+    The PyTorch backend keeps the bare model name so existing caches stay valid;
+    other backends produce slightly different vectors and get their own key.
+    """
+    return model_name if backend == "sentence-transformers" else f"{model_name}@{backend}"
+
+
+def detect_device(preferred: str = "auto") -> str:
+    """Resolve ``auto`` to cuda, then mps, then cpu, depending on what torch can see."""
+    if preferred != "auto":
+        return preferred
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _set_torch_threads(threads: int, interop_threads: int) -> None:
+    import torch
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only allowed before torch has started any parallel work
+            logger.warning("Could not set torch inter-op threads: %s", e)
+
+
+@register_embedding_backend("sentence-transformers")
+def _sentence_transformers_backend(
+    model_name: str,
+    normalize: bool,
+    device: str,
+    threads: int,
+    interop_threads: int,
+    batch_size: int
+) -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    device = detect_device(device)
+    if device == "cpu":
+        _set_torch_threads(threads, interop_threads)
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': device},
+        encode_kwargs={'normalize_embeddings': normalize, 'batch_size': batch_size}
+    )
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an ONNX export of a HuggingFace encoder.
+
+    Pools like sentence-transformers would: as the model's ``1_Pooling``
+    config says (CLS for bge-m3), else mean pooling. Texts in a call are
+    sorted by length before batching so each batch pads to a similar length.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        model_name: str = "",
+        model_file: str = "model.onnx",
+        normalize: bool = True,
+        threads: int = 0,
+        interop_threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 0,
+        providers: Optional[List[str]] = None
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        if interop_threads > 0:
+            options.inter_op_num_threads = interop_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.model_name = model_name or os.path.basename(os.path.normpath(model_dir))
+        self.normalize = normalize
+        self.batch_size = max(1, batch_size)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length or min(self.tokenizer.model_max_length, 8192)
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=providers or ["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.pooling = _pooling_mode(model_dir)
+
+    def _encode(self, texts: List[str]):
+        import numpy as np
+
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        hidden = self.session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][:, :, None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                results[i] = vector.tolist()
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batch of queries, for BatchedEmbeddings; queries are encoded like documents."""
+        return self.embed_documents(texts)
+
+
+def _pooling_mode(model_dir: str) -> str:
+    path = os.path.join(model_dir, "1_Pooling", "config.json")
+    if not os.path.exists(path):
+        return "mean"
+    with open(path) as f:
+        return "cls" if json.load(f).get("pooling_mode_cls_token") else "mean"
+
+
+def _copy_pooling_config(model_name: str, model_dir: str) -> None:
+    """Keep the sentence-transformers pooling config next to the export, when the model has one."""
+    try:
+        if os.path.isdir(model_name):
+            source = os.path.join(model_name, "1_Pooling", "config.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            source = hf_hub_download(model_name, "1_Pooling/config.json")
+    except Exception:
+        return
+    if os.path.exists(source):
+        os.makedirs(os.path.join(model_dir, "1_Pooling"), exist_ok=True)
+        shutil.copyfile(source, os.path.join(model_dir, "1_Pooling", "config.json"))
+
+
+def _export_dir(model_name: str) -> str:
+    return os.path.join(settings.EMBEDDING_ONNX_DIR, model_name.replace("/", "--"))
+
+
+def export_onnx(model_name: str, quantize: bool = False) -> str:
+    """
+    Export ``model_name`` to ONNX (and optionally int8-quantize it), unless already done.
+
+    Args:
+        model_name: HuggingFace model id
+        quantize: Also write a dynamically int8-quantized copy
+
+    Returns:
+        str: Directory holding ``model.onnx`` (and ``model_int8.onnx``), the tokenizer and pooling config
+    """
+    model_dir = _export_dir(model_name)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    if not os.path.exists(fp32_path):
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+        except ImportError as e:
+            raise RuntimeError("ONNX export needs `optimum[onnxruntime]`; install it or pre-export the model") from e
+        from transformers import AutoTokenizer
+
+        start = time.perf_counter()
+        logger.info("Exporting %s to ONNX in %s", model_name, model_dir)
+        ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        _copy_pooling_config(model_name, model_dir)
+        logger.info("Exported %s in %.1fs", model_name, time.perf_counter() - start)
+
+    int8_path = os.path.join(model_dir, "model_int8.onnx")
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        start = time.perf_counter()
+        # Weights only; activations are quantized on the fly, so no calibration set is needed
+        quantize_dynamic(
+            fp32_path, int8_path,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            # Exports over 2 GB (bge-m3 is) keep their weights in a side file
+            use_external_data_format=os.path.exists(fp32_path + "_data")
+        )
+        logger.info("Quantized %s to int8 in %.1fs", model_name, time.perf_counter() - start)
+    return model_dir
+
+
+def _onnx_providers(device: str) -> List[str]:
+    import onnxruntime as ort
+
+    if detect_device(device) == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
+
+@register_embedding_backend("onnx")
+def _onnx_backend(
+    model_name: str,
+    normalize: bool,
+    device: str,
+    threads: int,
+    interop_threads: int,
+    batch_size: int
+) -> Embeddings:
+    return OnnxEmbeddings(
+        export_onnx(model_name),
+        model_name=model_name,
+        normalize=normalize,
+        threads=threads,
+        interop_threads=interop_threads,
+        batch_size=batch_size,
+        max_length=settings.EMBEDDING_MAX_LENGTH,
+        providers=_onnx_providers(device)
+    )
+
+
+@register_embedding_backend("onnx-int8")
+def _onnx_int8_backend(
+    model_name: str,
+    normalize: bool,
+    device: str,
+    threads: int,
+    interop_threads: int,
+    batch_size: int
+) -> Embeddings:
+    # Dynamic int8 kernels are CPU-only
+    return OnnxEmbeddings(
+        export_onnx(model_name, quantize=True),
+        model_name=model_name,
+        model_file="model_int8.onnx",
+        normalize=normalize,
+        threads=threads,
+        interop_threads=interop_threads,
+        batch_size=batch_size,
+        max_length=settings.EMBEDDING_MAX_LENGTH
+    )
+
+
+def create_embedding_model(
+    backend: Optional[str] = None,
+    model_name: Optional[str] = None,
+    normalize: bool = True,
+    device: Optional[str] = None,
+    threads: Optional[int] = None,
+    interop_threads: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> Embeddings:
+    """
+    Load the embedding model with the given backend; unset arguments come from settings.
+
+    Args:
+        backend: Name of a registered backend (see ``EMBEDDING_BACKENDS``)
+        model_name: HuggingFace model id
+        normalize: L2-normalize the vectors
+        device: ``auto``, ``cpu``, ``cuda`` or ``mps``
+        threads: Intra-op threads; 0 keeps the library default
+        interop_threads: Inter-op threads; 0 keeps the library default
+        batch_size: Texts per forward pass when embedding documents
+
+    Returns:
+        Embeddings: The loaded model
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    factory = EMBEDDING_BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}. Use one of: {', '.join(EMBEDDING_BACKENDS)}")
+    model_name = model_name or settings.EMBEDDING_MODEL
+
+    start = time.perf_counter()
+    model = factory(
+        model_name=model_name,
+        normalize=normalize,
+        device=device or settings.EMBEDDING_DEVICE,
+        threads=settings.EMBEDDING_THREADS if threads is None else threads,
+        interop_threads=settings.EMBEDDING_INTEROP_THREADS if interop_threads is None else interop_threads,
+        batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE
+    )
+    logger.info("Loaded embedding model %s (%s) in %.1fs", model_name, backend, time.perf_counter() - start)
+    return model
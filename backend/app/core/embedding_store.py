@@ -0,0 +1,120 @@
+"""Persistent on-disk cache of chunk embeddings (SQLite blob store)."""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite caps bound parameters per statement; stay well below the default
+_SQL_BATCH = 500
+
+
+class ChunkEmbeddingCache:
+    """
+    Chunk vectors keyed by (model name, normalization, SHA-256 of the chunk text).
+
+    Vectors are stored as float32 blobs. When the entry count exceeds
+    ``max_entries`` the least recently used tenth of the cap is evicted.
+    """
+
+    def __init__(self, path: str, model_name: str, normalize: bool = True, max_entries: int = 500_000):
+        self.path = Path(path)
+        self.namespace = f"{model_name}|norm={int(normalize)}"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunk_embeddings_last_used ON chunk_embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+        logger.info("Chunk embedding cache at %s (%d entries)", self.path, self._count)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for ``texts``; missing entries come back as None."""
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM chunk_embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE chunk_embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len([key for key in keys if key in found])
+            self.misses += len([key for key in keys if key not in found])
+
+        results: List[Optional[List[float]]] = []
+        for key in keys:
+            blob = found.get(key)
+            if blob is None:
+                results.append(None)
+            else:
+                vector = array("f")
+                vector.frombytes(blob)
+                results.append(vector.tolist())
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        now = time.time()
+        rows = [(self._key(text), array("f", vector).tobytes(), now) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Evict down to 90% of the cap so eviction doesn't run on every write
+        excess = self._count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM chunk_embeddings WHERE key IN ("
+            " SELECT key FROM chunk_embeddings ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+        logger.info("Evicted %d cached chunk embeddings", excess)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
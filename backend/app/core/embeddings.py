@@ -1,10 +1,307 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+"""Embedding model setup, query-embedding caching and micro-batching."""
+import asyncio
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from app.config.settings import settings
+from app.core.embedding_backends import create_embedding_model, embedding_model_id
+from app.core.embedding_store import ChunkEmbeddingCache
+from app.core.logging import get_logger
+from app.core.metrics import EMBED_DOCUMENTS_LATENCY, EMBED_QUERY_LATENCY
 
+logger = get_logger(__name__)
 
-def create_embeddings():
-   
-    return HuggingFaceEmbeddings(
-        model_name="BAAI/bge-m3",
-        model_kwargs={'device': 'cuda'},
-        encode_kwargs={'normalize_embeddings':True}
+
+def normalize_query(text: str) -> str:
+    """Fold whitespace and case so trivially different questions share a key."""
+    return " ".join(text.split()).casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU + TTL cache of query vectors keyed on (model name, normalized text).
+
+    Vectors are stored as float32 arrays, and the whole cache is flushed
+    whenever it is bound to a different embedding model.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.model_name: Optional[str] = None
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, array]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bind_model(self, model_name: str) -> None:
+        """Associate the cache with a model, flushing it if the model changed."""
+        with self._lock:
+            if self.model_name != model_name:
+                if self._entries:
+                    logger.info("Embedding model changed to %s, flushing %d cached queries",
+                                model_name, len(self._entries))
+                self._entries.clear()
+                self.model_name = model_name
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = (self.model_name, normalize_query(text))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].tolist()
+
+    def put(self, text: str, vector: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (self.model_name, normalize_query(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, array("f", vector))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Serves repeated query embeddings from a QueryEmbeddingCache and, when
+    given one, repeated chunk embeddings from a persistent ChunkEmbeddingCache.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: QueryEmbeddingCache,
+        document_cache: Optional[ChunkEmbeddingCache] = None
+    ):
+        self.inner = embeddings
+        self.cache = cache
+        self.document_cache = document_cache
+        self.cache.bind_model(self.model_name)
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.inner, "model_name", type(self.inner).__name__)
+
+    def warm_up(self) -> None:
+        """Run one uncached forward pass so weights are loaded and buffers allocated before the first request."""
+        start = time.perf_counter()
+        self.inner.embed_documents(["warm-up"])
+        logger.info("Embedding model warm-up pass took %.0fms", (time.perf_counter() - start) * 1000)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = self.inner.embed_documents(texts)
+        EMBED_DOCUMENTS_LATENCY.observe(time.perf_counter() - start)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_cache is None or not texts:
+            return self._embed_documents(texts)
+
+        # Only cache misses go to the model
+        vectors = self.document_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self._embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            self.document_cache.put_many([texts[i] for i in missing], computed)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            start = time.perf_counter()
+            vector = self.inner.embed_query(text)
+            EMBED_QUERY_LATENCY.observe(time.perf_counter() - start)
+            self.cache.put(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            start = time.perf_counter()
+            vector = await self.inner.aembed_query(text)
+            EMBED_QUERY_LATENCY.observe(time.perf_counter() - start)
+            self.cache.put(text, vector)
+        return vector
+
+
+def _query_batch_function(embeddings: Embeddings) -> Optional[Callable[[List[str]], List[List[float]]]]:
+    """How to embed a batch of queries with ``embeddings``, or None if only one at a time is safe."""
+    embed_queries = getattr(embeddings, "embed_queries", None)
+    if embed_queries is not None:
+        return embed_queries
+    if getattr(embeddings, "query_encode_kwargs", None):
+        # HuggingFaceEmbeddings with a query prompt: its batch path would drop the prompt
+        return None
+    return embeddings.embed_documents
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Coalesces concurrent ``embed_query`` calls into one batched forward pass.
+
+    Callers block on their own future while a single worker thread collects
+    requests for up to ``window_ms`` (or until ``max_batch_size`` is reached)
+    and runs one forward pass for the whole batch.
+
+    A batch goes through the model's ``embed_queries`` when it has one, and
+    otherwise through ``embed_documents``, which is only the query path for
+    models that embed queries and documents alike. Models whose queries take
+    an instruction or prefix must provide ``embed_queries``; a
+    HuggingFaceEmbeddings with ``query_encode_kwargs`` is not batched at all.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, window_ms: float = 5.0):
+        self.inner = embeddings
+        self._embed_batch = _query_batch_function(embeddings)
+        self.max_batch_size = max(1, max_batch_size) if self._embed_batch is not None else 1
+        self.window = max(0.0, window_ms) / 1000
+        self._pending: List[Tuple[str, Future]] = []
+        self._cond = threading.Condition()
+        self._worker = None
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.inner, "model_name", type(self.inner).__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Document batches are already batched by the caller
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.max_batch_size == 1:
+            return self.inner.embed_query(text)
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.max_batch_size == 1:
+            return await asyncio.to_thread(self.inner.embed_query, text)
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        """Queue a query for the next batch and return a future for its vector."""
+        future: Future = Future()
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+            self._pending.append((text, future))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            # Hold the batch open for the window unless it fills up first
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                vectors = self._embed_batch([text for text, _ in batch])
+            except Exception as e:
+                logger.error("Batched embedding failed (%d queries): %s", len(batch), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+def create_chunk_cache(model_name: str, normalize: bool) -> Optional[ChunkEmbeddingCache]:
+    """Open the persistent chunk-embedding cache, if enabled in settings."""
+    if not settings.EMBED_CACHE_ENABLED:
+        return None
+    path = settings.EMBED_CACHE_PATH or os.path.join(settings.CHROMA_PERSIST_DIR, "embedding_cache.sqlite3")
+    return ChunkEmbeddingCache(
+        path,
+        model_name=model_name,
+        normalize=normalize,
+        max_entries=settings.EMBED_CACHE_MAX_ENTRIES
+    )
+
+
+def create_embeddings(remote: Optional[bool] = None):
+    """
+    Create the embedding model wrapped in caching and micro-batching.
+
+    Args:
+        remote: Use the shared model server instead of loading the model here;
+            defaults to ``MODEL_SERVER_ENABLED``
+
+    Returns:
+        CachedEmbeddings: Embeddings for the RAG engine
+    """
+    if settings.MODEL_SERVER_ENABLED if remote is None else remote:
+        from app.core.model_server import RemoteEmbeddings, get_model_server_client
+
+        # Batching and the chunk cache live in the server; keep only the query cache here
+        return CachedEmbeddings(RemoteEmbeddings(get_model_server_client()), query_embedding_cache)
+
+    model_name = settings.EMBEDDING_MODEL
+    normalize = True
+    model = create_embedding_model(settings.EMBEDDING_BACKEND, model_name, normalize=normalize)
+    batched = BatchedEmbeddings(
+        model,
+        max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+        window_ms=settings.EMBED_BATCH_WINDOW_MS
     )
+    # Backends differ slightly in their vectors, so each gets its own persisted cache entries
+    model_id = embedding_model_id(settings.EMBEDDING_BACKEND, model_name)
+    return CachedEmbeddings(batched, query_embedding_cache, create_chunk_cache(model_id, normalize))
+
+
+# Global query-embedding cache shared by every embeddings instance
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=settings.QUERY_EMBED_CACHE_SIZE,
+    ttl_seconds=settings.QUERY_EMBED_CACHE_TTL_SECONDS
+)
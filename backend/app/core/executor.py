@@ -0,0 +1,94 @@
+"""Bounded thread pool for blocking RAG work (embedding, vector search, sync LLM calls)."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from app.config.settings import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BlockingExecutor:
+    """
+    Runs blocking callables off the event loop on a dedicated, bounded pool.
+
+    Keeps its own queue-depth and wait-time counters so saturation of the
+    pool is visible before it turns into request latency.
+    """
+
+    def __init__(self, max_workers: int, name: str = "rag-blocking"):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool and await its result.
+
+        Args:
+            func: Blocking callable
+            *args, **kwargs: Arguments forwarded to ``func``
+
+        Returns:
+            Whatever ``func`` returns
+        """
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Submit a blocking callable and return its concurrent future."""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        future = self._pool.submit(self._invoke, submitted_at, func, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _invoke(self, submitted_at: float, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        waited = time.perf_counter() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if waited > 1.0:
+            logger.warning("Blocking pool saturated: job waited %.2fs for a worker", waited)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _on_done(self, future: Future) -> None:
+        # A job cancelled before it reached a worker never ran _invoke
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation and queue wait times."""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "avg_wait_ms": round(self._wait_total / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global executor for embedding, vector search and sync LLM calls
+blocking_executor = BlockingExecutor(settings.BLOCKING_POOL_MAX_WORKERS)
@@ -0,0 +1,123 @@
+"""Conversation history compaction: verbatim recent turns plus a running summary."""
+import asyncio
+from typing import Callable, Optional, Set
+from app.config.settings import settings
+from app.core.context import get_token_counter
+from app.core.conversation import Conversation
+from app.core.logging import get_logger
+from app.core.prompts import HISTORY_SUMMARY_PROMPT_TEMPLATE
+
+logger = get_logger(__name__)
+
+
+class HistoryCompactor:
+    """
+    Keeps conversation history small enough to re-send every turn.
+
+    The last ``verbatim_turns`` turns stay verbatim; older turns are folded
+    into ``Conversation.summary`` by an LLM call that runs as a background
+    task after the response has been delivered, so it never adds latency
+    to the request. Rendering caps the whole history section at
+    ``max_tokens``.
+    """
+
+    def __init__(
+        self,
+        llm_pool,
+        verbatim_turns: int = 3,
+        max_tokens: int = 1500,
+        summary_max_tokens: int = 300,
+        enabled: bool = True,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        conversations=None
+    ):
+        self.llm_pool = llm_pool
+        # ConversationManager used to persist summaries (None: update in place only)
+        self.conversations = conversations
+        self.verbatim_turns = verbatim_turns
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.enabled = enabled
+        self.count_tokens = count_tokens or get_token_counter()
+        self._compacting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def render(self, conv: Conversation) -> str:
+        """History section for the prompt, within the token budget."""
+        return conv.get_history_text(max_tokens=self.max_tokens, count_tokens=self.count_tokens)
+
+    def needs_compaction(self, conv: Conversation) -> bool:
+        # Fold only whole turns beyond the verbatim window
+        return len(conv.messages) >= 2 * (self.verbatim_turns + 1)
+
+    def schedule(self, conv: Conversation) -> None:
+        """Compact the conversation in the background once the response is finished."""
+        if not self.enabled or conv.id in self._compacting or not self.needs_compaction(conv):
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.compact(conv))
+        except RuntimeError:
+            # Sync callers have no loop; the next async turn compacts instead
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def compact(self, conv: Conversation) -> None:
+        """Fold messages older than the verbatim window into the running summary."""
+        if conv.id in self._compacting:
+            return
+        self._compacting.add(conv.id)
+        try:
+            fold = len(conv.messages) - 2 * self.verbatim_turns
+            if fold < 2:
+                return
+            folded = conv.messages[:fold]
+            transcript = "\n".join(
+                f"{'User' if msg.role == 'user' else 'Assistant'}: {msg.content}" for msg in folded
+            )
+            prompt = HISTORY_SUMMARY_PROMPT_TEMPLATE.format(
+                max_words=int(self.summary_max_tokens * 0.75),
+                previous_summary=f"Existing summary:\n{conv.summary}" if conv.summary else "",
+                messages=transcript
+            )
+            result = await self.llm_pool.get(temperature=0.2).ainvoke(prompt)
+            summary = (result.content if hasattr(result, "content") else str(result)).strip()
+            if not summary:
+                return
+
+            # Messages appended while we waited sit after the folded ones
+            upto = folded[-1].seq + 1
+            if self.conversations is not None:
+                await self.conversations.save_summary(conv, summary, upto)
+            else:
+                conv.summary = summary
+                conv.summary_upto = upto
+                del conv.messages[:fold]
+            logger.info("Compacted conversation %s: folded %d messages into a %d-token summary",
+                        conv.id, fold, self.count_tokens(summary))
+        except Exception as e:
+            # History stays verbatim (and budget-capped) until the next attempt
+            logger.warning("History compaction failed for %s: %s", conv.id, e)
+        finally:
+            self._compacting.discard(conv.id)
+
+    async def aclose(self) -> None:
+        """Cancel compactions still in flight."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def create_history_compactor(llm_pool) -> HistoryCompactor:
+    """Create a HistoryCompactor configured from settings."""
+    from app.core.conversation import conversation_manager
+
+    return HistoryCompactor(
+        llm_pool,
+        verbatim_turns=settings.HISTORY_VERBATIM_TURNS,
+        max_tokens=settings.HISTORY_MAX_TOKENS,
+        summary_max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+        enabled=settings.HISTORY_SUMMARY_ENABLED,
+        count_tokens=get_token_counter(settings.CONTEXT_TOKENIZER),
+        conversations=conversation_manager
+    )
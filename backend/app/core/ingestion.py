@@ -0,0 +1,522 @@
+"""Multi-stage document ingestion pipeline: parse -> embed -> write."""
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from app.core.document_loader import lazy_load_document
+from app.core.executor import BlockingExecutor
+from app.core.logging import get_logger
+from app.core.manifest import FilePlan
+from app.core.metrics import INGEST_CHUNKS, INGEST_THROUGHPUT
+from app.core.tenants import TenantIndex
+from app.core.text_processor import TextProcessor
+from app.core.warmup import EngineNotReady
+
+logger = get_logger(__name__)
+
+
+def chunk_metadata(file_path: str, content_hash: str, tenant: str, uploaded_at: float) -> Dict[str, Any]:
+    """
+    Metadata stamped on every chunk of a file, next to the loader's ``source`` and ``page``.
+
+    Chunks left unchanged by a re-upload keep the values of the upload
+    that first indexed them.
+
+    Args:
+        file_path: Path the file is indexed under
+        content_hash: SHA-256 of the file content
+        tenant: Tenant the file belongs to
+        uploaded_at: Upload time (Unix timestamp)
+
+    Returns:
+        Dict: ``source_id`` (the file name), ``content_hash``, ``tenant`` and ``uploaded_at``
+    """
+    return {
+        "source_id": os.path.basename(file_path),
+        "content_hash": content_hash,
+        "tenant": tenant,
+        "uploaded_at": uploaded_at,
+    }
+
+
+def parse_into_queue(
+    file_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    batch_size: int,
+    out_queue
+) -> int:
+    """
+    Load and chunk a document page by page (runs in a worker process).
+
+    Batches of plain (text, metadata) pairs are pushed onto ``out_queue``
+    as they fill; the bounded queue blocks this worker when the pipeline
+    is behind, so only a page and a few batches are ever held in memory.
+    A ``None`` sentinel always marks the end of the stream.
+
+    Returns:
+        int: Number of chunks produced
+    """
+    total = 0
+    try:
+        processor = TextProcessor(chunk_size, chunk_overlap)
+        for batch in processor.iter_chunk_batches(lazy_load_document(file_path), batch_size):
+            out_queue.put([(chunk.page_content, chunk.metadata) for chunk in batch])
+            total += len(batch)
+    finally:
+        out_queue.put(None)
+    return total
+
+
+@dataclass
+class IngestionJob:
+    """Progress of a single uploaded file through the pipeline."""
+    file_path: str
+    filename: str
+    content_hash: str
+    index: TenantIndex = field(repr=False)  # the tenant's vector store and manifest
+    size: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"  # queued | parsing | embedding | writing | success | duplicate | error
+    chunks_total: Optional[int] = None
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    chunks_unchanged: int = 0
+    duplicate_of: Optional[str] = None
+    plan: Optional[FilePlan] = field(default=None, repr=False)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def tenant(self) -> str:
+        return self.index.tenant
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("success", "duplicate", "error")
+
+    @property
+    def settled(self) -> bool:
+        """Parsing finished and every chunk is either written or unchanged."""
+        return (
+            self.chunks_total is not None
+            and self.chunks_written + self.chunks_unchanged >= self.chunks_total
+        )
+
+    def fail(self, error: Exception) -> None:
+        if not self.done:
+            self.status = "error"
+            self.error = str(error)
+            self.finished_at = time.time()
+            logger.error("Ingestion failed: %s: %s", self.filename, error)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "chunks": self.chunks_written,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_unchanged": self.chunks_unchanged,
+            "duplicate_of": self.duplicate_of,
+            "error": self.error,
+        }
+
+
+class StageStats:
+    """Per-stage counters reported by the status endpoint."""
+
+    def __init__(self, name: str, workers: int, queue: Optional[asyncio.Queue] = None):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self.active = 0
+        self.processed = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "capacity": self.queue.maxsize if self.queue is not None else 0,
+            "processed": self.processed,
+        }
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+class DuplicateContent(Exception):
+    """Raised when a file's content is already indexed or queued under another name."""
+
+    def __init__(self, existing: str):
+        self.existing = existing
+        super().__init__(
+            f"Identical content is already indexed as '{os.path.basename(existing)}'; "
+            "filter, query or delete it by that name"
+        )
+
+
+class IngestionPipeline:
+    """
+    Bounded, multi-worker ingestion pipeline.
+
+    Jobs flow through three stages connected by bounded queues, so a slow
+    stage applies backpressure to the ones before it:
+
+    - parse: lazy page-by-page loading + chunking in a process pool,
+      streamed back in fixed-size batches; if a parser process dies the
+      pool is replaced and only the jobs it was running are affected
+    - embed: batched ``embed_documents`` on a dedicated thread pool
+    - write: batched upserts of precomputed vectors into Chroma
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        queue_size: int = 100,
+        parse_workers: int = 2,
+        embed_workers: int = 1,
+        embed_batch_size: int = 64,
+        write_batch_size: int = 256,
+        stage_queue_size: int = 8,
+        max_finished_jobs: int = 500
+    ):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.stage_queue_size = stage_queue_size
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: Dict[str, IngestionJob] = {}
+        self._job_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._embed_queue: asyncio.Queue = asyncio.Queue(maxsize=stage_queue_size)
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=stage_queue_size)
+
+        self.stages = {
+            "parse": StageStats("parse", parse_workers, self._job_queue),
+            "embed": StageStats("embed", embed_workers, self._embed_queue),
+            "write": StageStats("write", 1, self._write_queue),
+        }
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._parse_reader = BlockingExecutor(parse_workers, name="ingest-parse")
+        self._embed_executor = BlockingExecutor(embed_workers, name="ingest-embed")
+        self._write_executor = BlockingExecutor(1, name="ingest-write")
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Spawn stage workers on the running event loop."""
+        if self._tasks:
+            return
+        self._parse_pool = self._create_parse_pool()
+        # Manager queues can be handed to pool workers to stream batches back
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        for _ in range(self.stages["parse"].workers):
+            self._tasks.append(asyncio.create_task(self._parse_worker()))
+        for _ in range(self.stages["embed"].workers):
+            self._tasks.append(asyncio.create_task(self._embed_worker()))
+        self._tasks.append(asyncio.create_task(self._write_worker()))
+        logger.info("Ingestion pipeline started (parse=%d, embed=%d)",
+                    self.stages["parse"].workers, self.stages["embed"].workers)
+
+    def _create_parse_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the web process holds model threads and sockets
+        return ProcessPoolExecutor(
+            max_workers=self.stages["parse"].workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_parse_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Swap in a fresh parse pool after a worker process died (once, however many jobs noticed)."""
+        if self._parse_pool is not broken:
+            return
+        # No cancel_futures: the pool fails its own pending futures, and a cancelled one would kill the worker task
+        broken.shutdown(wait=False)
+        self._parse_pool = self._create_parse_pool()
+        logger.warning("A parse worker process died; replaced the parse pool")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self._parse_reader.shutdown(wait=False)
+        self._embed_executor.shutdown(wait=False)
+        self._write_executor.shutdown(wait=False)
+
+    def submit(
+        self,
+        file_path: str,
+        filename: str,
+        content_hash: str,
+        index: TenantIndex,
+        size: int = 0
+    ) -> IngestionJob:
+        """
+        Queue a saved file for ingestion, unless identical content is already indexed.
+
+        Re-uploading an indexed file under its own name is a no-op. The same
+        content under a new name is rejected, since it would never be
+        indexed under that name and filters or deletes naming it would
+        silently match nothing.
+
+        Args:
+            file_path: Path of the saved upload (also the chunks' ``source``)
+            filename: Original filename, used for status lookups
+            content_hash: SHA-256 of the file content
+            index: Vector store and manifest of the tenant the file belongs to
+            size: File size in bytes, recorded for storage quotas
+
+        Returns:
+            IngestionJob: Queued job, or a finished ``duplicate`` job
+
+        Raises:
+            DuplicateContent: If the content is indexed or queued under another path
+            IngestionQueueFull: If the job queue is at capacity
+            EngineNotReady: If the pipeline has not been started yet
+        """
+        if not self._tasks:
+            raise EngineNotReady("Ingestion is not available until warm-up completes, try again shortly")
+        job = IngestionJob(file_path=file_path, filename=filename, content_hash=content_hash, index=index, size=size)
+        duplicate_of = self.find_duplicate(content_hash, index)
+        if duplicate_of and duplicate_of != file_path:
+            raise DuplicateContent(duplicate_of)
+        if duplicate_of:
+            job.status = "duplicate"
+            job.duplicate_of = duplicate_of
+            job.finished_at = time.time()
+            self.jobs[job.id] = job
+            logger.info("Skipping %s: identical content already indexed as %s", filename, duplicate_of)
+            return job
+
+        try:
+            self._job_queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestionQueueFull(
+                f"Ingestion queue is full ({self._job_queue.maxsize} jobs pending)"
+            )
+        self.jobs[job.id] = job
+        self._prune_finished()
+        return job
+
+    def find_duplicate(self, content_hash: str, index: TenantIndex) -> Optional[str]:
+        """Path of a file with this content that the tenant has indexed or queued, if any."""
+        # Duplicates are per tenant: the same file may be indexed by several tenants
+        return index.manifest.find_by_hash(content_hash) or next(
+            (
+                j.file_path for j in self.jobs.values()
+                if j.content_hash == content_hash and j.tenant == index.tenant and not j.done
+            ),
+            None
+        )
+
+    def find_job(self, filename: str, tenant: Optional[str] = None) -> Optional[IngestionJob]:
+        """Most recent job for a filename (of one tenant, if given)."""
+        for job in reversed(list(self.jobs.values())):
+            if job.filename == filename and tenant in (None, job.tenant):
+                return job
+        return None
+
+    def clear_finished(self, tenant: Optional[str] = None) -> None:
+        for job_id in [j.id for j in self.jobs.values() if j.done and tenant in (None, j.tenant)]:
+            del self.jobs[job_id]
+
+    def pending_usage(self, tenant: str, excluding: Optional[str] = None) -> Tuple[int, int]:
+        """Files and bytes a tenant has queued or in progress, for quota checks."""
+        pending = [
+            j for j in self.jobs.values()
+            if not j.done and j.tenant == tenant and j.file_path != excluding
+        ]
+        return len(pending), sum(j.size for j in pending)
+
+    def queue_depth(self) -> int:
+        return self._job_queue.qsize()
+
+    def status(self, tenant: Optional[str] = None) -> Dict:
+        return {
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+            "jobs": [job.to_dict() for job in self.jobs.values() if tenant in (None, job.tenant)],
+        }
+
+    async def _parse_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        stage = self.stages["parse"]
+        while True:
+            job: IngestionJob = await self._job_queue.get()
+            if job.done:
+                # Failed while still queued (e.g. its upload could not be moved into place)
+                continue
+            stage.active += 1
+            job.status = "parsing"
+            job.started_at = time.time()
+            try:
+                job.plan = job.index.manifest.plan(job.file_path, job.content_hash, job.size)
+                if job.plan.is_new_source:
+                    # Drop chunks indexed for this path before the manifest existed
+                    await self._write_executor.run(
+                        job.index.vector_store.delete_where, {"source": job.file_path}
+                    )
+                retried = False
+                while True:
+                    pool = self._parse_pool
+                    try:
+                        job.chunks_total = await self._parse(loop, pool, job)
+                        break
+                    except BrokenProcessPool:
+                        # Every job on the pool sees this, not only the one whose worker died
+                        self._replace_parse_pool(pool)
+                        if retried or job.plan.chunks:
+                            # Half-streamed jobs are not resumable; a second crash is the job's own
+                            raise
+                        retried = True
+                        logger.warning("Parse pool broke before %s produced any chunks, retrying", job.filename)
+                stage.processed += 1
+                if job.settled:
+                    await self._finish(job)
+            except Exception as e:
+                job.fail(e)
+            finally:
+                stage.active -= 1
+
+    async def _parse(self, loop: asyncio.AbstractEventLoop, pool: ProcessPoolExecutor, job: IngestionJob) -> int:
+        """Parse a job on the process pool, feeding its new chunks to the embed stage; returns the chunk count."""
+        stamp = chunk_metadata(job.file_path, job.content_hash, job.tenant, job.created_at)
+        batches = self._manager.Queue(maxsize=self.stage_queue_size)
+        parsed = loop.run_in_executor(
+            pool, parse_into_queue,
+            job.file_path, self.chunk_size, self.chunk_overlap,
+            self.embed_batch_size, batches
+        )
+        while True:
+            try:
+                pairs = await self._parse_reader.run(batches.get, True, 1.0)
+            except queue.Empty:
+                # A crashed worker never sends the end-of-stream sentinel
+                if parsed.done():
+                    break
+                continue
+            if pairs is None:
+                break
+            if job.done:
+                continue
+            job.status = "embedding"
+            ids, batch = job.plan.assign(
+                Document(page_content=text, metadata={**metadata, **stamp}) for text, metadata in pairs
+            )
+            job.chunks_unchanged += len(pairs) - len(batch)
+            if batch:
+                # Blocks while the embed stage is behind
+                await self._embed_queue.put((job, batch, ids))
+        return await parsed
+
+    async def _embed_worker(self) -> None:
+        stage = self.stages["embed"]
+        while True:
+            job, batch, ids = await self._embed_queue.get()
+            try:
+                if job.done:
+                    continue
+                stage.active += 1
+                try:
+                    vectors = await self._embed_executor.run(
+                        job.index.vector_store.embeddings.embed_documents, [doc.page_content for doc in batch]
+                    )
+                finally:
+                    stage.active -= 1
+                job.chunks_embedded += len(batch)
+                stage.processed += len(batch)
+                await self._write_queue.put((job, batch, ids, vectors))
+            except Exception as e:
+                job.fail(e)
+
+    async def _write_worker(self) -> None:
+        while True:
+            items = [await self._write_queue.get()]
+            pending = len(items[0][1])
+            # Coalesce whatever is already queued into one Chroma write
+            while pending < self.write_batch_size and not self._write_queue.empty():
+                item = self._write_queue.get_nowait()
+                items.append(item)
+                pending += len(item[1])
+
+            # One write per tenant collection among the coalesced batches
+            by_store: Dict[int, List[Tuple]] = {}
+            for item in items:
+                if not item[0].done:
+                    by_store.setdefault(id(item[0].index.vector_store), []).append(item)
+            for group in by_store.values():
+                await self._write_group(group)
+
+    async def _write_group(self, items: List[Tuple]) -> None:
+        stage = self.stages["write"]
+        vector_store = items[0][0].index.vector_store
+        docs = [doc for _, batch, _, _ in items for doc in batch]
+        ids = [chunk_id for _, _, batch_ids, _ in items for chunk_id in batch_ids]
+        vectors = [vector for _, _, _, batch_vectors in items for vector in batch_vectors]
+        for job, _, _, _ in items:
+            job.status = "writing"
+
+        stage.active += 1
+        try:
+            await self._write_executor.run(vector_store.add_embedded_documents, docs, vectors, ids)
+            stage.processed += len(docs)
+            for job, batch, _, _ in items:
+                job.chunks_written += len(batch)
+                if job.settled:
+                    await self._finish(job)
+        except Exception as e:
+            for job, _, _, _ in items:
+                job.fail(e)
+        finally:
+            stage.active -= 1
+
+    async def _finish(self, job: IngestionJob) -> None:
+        """Delete chunks that disappeared from the file and record it in the manifest."""
+        if job.done:
+            return
+        try:
+            stale = job.plan.stale_ids()
+            if stale:
+                await self._write_executor.run(job.index.vector_store.delete, stale)
+            await self._write_executor.run(job.index.manifest.commit, job.plan)
+        except Exception as e:
+            job.fail(e)
+            return
+
+        job.status = "success"
+        job.finished_at = time.time()
+        elapsed = job.finished_at - (job.started_at or job.created_at)
+        INGEST_CHUNKS.inc(job.chunks_written)
+        if job.chunks_written and elapsed > 0:
+            INGEST_THROUGHPUT.observe(job.chunks_written / elapsed)
+        logger.info(
+            "Document processed: %s → %d chunks (%d new, %d unchanged, %d stale removed) "
+            "in %.2fs (%.1f chunks/s)",
+            job.filename, job.chunks_total, job.chunks_written, job.chunks_unchanged, len(stale),
+            elapsed, job.chunks_written / elapsed if elapsed > 0 else 0.0
+        )
+
+    def _prune_finished(self) -> None:
+        finished = [j.id for j in self.jobs.values() if j.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
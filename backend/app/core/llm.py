@@ -1,16 +1,35 @@
+"""Groq LLM clients backed by long-lived, keep-alive HTTP connection pools."""
+import socket
+from typing import Optional
+import httpx
 from langchain_groq import ChatGroq
+from app.config.settings import settings
+from app.core.logging import get_logger
 
+logger = get_logger(__name__)
 
-def create_llm(api_key: str, model_name: str, temperature: float = 0.7, streaming: bool = True):
+
+def create_llm(
+    api_key: str,
+    model_name: str,
+    temperature: float = 0.7,
+    streaming: bool = True,
+    http_client: Optional[httpx.Client] = None,
+    http_async_client: Optional[httpx.AsyncClient] = None,
+    base_url: Optional[str] = None
+):
     """
     Create Groq LLM instance
-    
+
     Args:
         api_key: Groq API key
         model_name: Model name (e.g., 'llama-3.1-70b-versatile')
         temperature: Temperature for generation
         streaming: Enable streaming
-    
+        http_client: Shared sync HTTP client (a private one is created if omitted)
+        http_async_client: Shared async HTTP client (a private one is created if omitted)
+        base_url: Override the Groq API base URL (proxies, local stubs)
+
     Returns:
         ChatGroq: Configured LLM instance
     """
@@ -18,5 +37,95 @@ def create_llm(api_key: str, model_name: str, temperature: float = 0.7, streamin
         groq_api_key=api_key,
         model_name=model_name,
         temperature=temperature,
-        streaming=streaming
+        streaming=streaming,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        groq_api_base=base_url
+    )
+
+
+class LLMClientPool:
+    """
+    One long-lived ChatGroq client whose HTTP connections are reused across requests.
+
+    Per-request temperature or model overrides are bound onto the shared
+    client instead of building a new one, so no request pays for a fresh
+    connection pool or TLS handshake.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        temperature: float = 0.7,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        base_url: Optional[str] = None
+    ):
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # Requests go out as separate header/body writes; without TCP_NODELAY a
+        # reused connection stalls on Nagle + delayed ACK for ~40ms per request
+        socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+        self.http_client = httpx.Client(
+            transport=httpx.HTTPTransport(limits=limits, socket_options=socket_options),
+            timeout=timeout
+        )
+        self.http_async_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(limits=limits, socket_options=socket_options),
+            timeout=timeout
+        )
+        self.model_name = model_name
+        self.temperature = temperature
+        self.llm = create_llm(
+            api_key,
+            model_name,
+            temperature=temperature,
+            streaming=True,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            base_url=base_url
+        )
+        logger.info("LLM client pool ready (max_connections=%d, keepalive=%d)",
+                    max_connections, max_keepalive_connections)
+
+    def get(self, temperature: Optional[float] = None, model_name: Optional[str] = None):
+        """
+        Return the shared client, with any per-request overrides bound onto it.
+
+        Args:
+            temperature: Sampling temperature for this request
+            model_name: Groq model for this request
+
+        Returns:
+            ChatGroq or a bound runnable sharing the same connections
+        """
+        overrides = {}
+        if temperature is not None and temperature != self.temperature:
+            overrides["temperature"] = temperature
+        if model_name and model_name != self.model_name:
+            overrides["model"] = model_name
+        return self.llm.bind(**overrides) if overrides else self.llm
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+def create_llm_pool(api_key: str, model_name: str, temperature: float = 0.7) -> LLMClientPool:
+    """Create an LLMClientPool sized from settings."""
+    return LLMClientPool(
+        api_key,
+        model_name,
+        temperature=temperature,
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        timeout=settings.LLM_TIMEOUT_SECONDS
     )
@@ -3,7 +3,7 @@ import logging
 import sys
 import uuid
 from contextvars import ContextVar
-from typing import Optional
+from typing import Dict, Optional
 
 # Context var for request-scoped trace IDs
 request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
@@ -70,3 +70,24 @@ def get_logger(name: str) -> logging.Logger:
     if not any(isinstance(f, RequestIdFilter) for f in logger.filters):
         logger.addFilter(RequestIdFilter())
     return logger
+
+
+def log_timings(logger: logging.Logger, label: str, timings: Dict[str, float]) -> None:
+    """
+    Log a per-stage timing record as a single ``key=value`` line.
+
+    The record is also attached to the log record as ``timings`` so
+    structured handlers can emit it as fields.
+
+    Args:
+        logger: Logger to write to
+        label: Short description of what was timed
+        timings: Stage name -> value (milliseconds unless the name says otherwise)
+    """
+    logger.info(
+        "%s | %s", label, " ".join(
+            f"{stage}={value:.1f}" if isinstance(value, float) else f"{stage}={value}"
+            for stage, value in timings.items()
+        ),
+        extra={"timings": timings}
+    )
@@ -0,0 +1,169 @@
+"""Content-addressed ingestion manifest for deduplication and incremental re-indexing."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = "ingestion_manifest.json"
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_chunk_id(source: str, chunk_hash: str, occurrence: int) -> str:
+    """Stable chunk ID: same source + same text (+ repeat index) => same ID."""
+    return sha256_text(f"{source}\0{chunk_hash}\0{occurrence}")[:32]
+
+
+class FilePlan:
+    """
+    Incremental re-indexing plan for one source file.
+
+    Assigns stable IDs to chunks as they stream in, reports which ones are
+    new (and need embedding), and which previously indexed ones went stale.
+    """
+
+    def __init__(self, source: str, content_hash: str, previous: Optional[Dict[str, str]] = None, size: int = 0):
+        self.source = source
+        self.content_hash = content_hash
+        self.previous = previous or {}
+        self.size = size
+        self.chunks: Dict[str, str] = {}
+        self._occurrences: Counter = Counter()
+
+    @property
+    def is_new_source(self) -> bool:
+        return not self.previous
+
+    def assign(self, documents: Iterable[Document]) -> Tuple[List[str], List[Document]]:
+        """
+        Assign IDs to a batch of chunks.
+
+        Returns:
+            (ids, documents) for the chunks that are not already indexed
+        """
+        ids, fresh = [], []
+        for doc in documents:
+            chunk_hash = sha256_text(doc.page_content)
+            occurrence = self._occurrences[chunk_hash]
+            self._occurrences[chunk_hash] += 1
+            chunk_id = make_chunk_id(self.source, chunk_hash, occurrence)
+            self.chunks[chunk_id] = chunk_hash
+            if chunk_id not in self.previous:
+                ids.append(chunk_id)
+                fresh.append(doc)
+        return ids, fresh
+
+    def stale_ids(self) -> List[str]:
+        return [chunk_id for chunk_id in self.previous if chunk_id not in self.chunks]
+
+
+class IngestionManifest:
+    """
+    Persistent record of indexed files: SHA-256 per file and per chunk.
+
+    Stored as JSON next to the Chroma data and rewritten atomically
+    (temp file + rename) after every change, so it survives restarts.
+    """
+
+    def __init__(self, persist_dir: str):
+        self.path = Path(persist_dir) / MANIFEST_FILENAME
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._files = json.load(f).get("files", {})
+            logger.info("Loaded ingestion manifest: %d files", len(self._files))
+        except FileNotFoundError:
+            self._files = {}
+        except (OSError, ValueError) as e:
+            logger.error("Ingestion manifest unreadable, starting empty: %s", e)
+            self._files = {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self._files}, f)
+        os.replace(tmp_path, self.path)
+
+    def find_by_hash(self, content_hash: str) -> Optional[str]:
+        """Source of an already indexed file with identical content, if any."""
+        with self._lock:
+            for source, entry in self._files.items():
+                if entry["sha256"] == content_hash:
+                    return source
+        return None
+
+    def content_hash(self, source: str) -> Optional[str]:
+        """SHA-256 the file at ``source`` was last indexed with, or None if it is not indexed."""
+        with self._lock:
+            entry = self._files.get(source)
+            return entry["sha256"] if entry else None
+
+    def plan(self, source: str, content_hash: str, size: int = 0) -> FilePlan:
+        with self._lock:
+            entry = self._files.get(source)
+            previous = dict(entry["chunks"]) if entry else None
+        return FilePlan(source, content_hash, previous, size)
+
+    def commit(self, plan: FilePlan) -> None:
+        """Record a fully indexed file."""
+        with self._lock:
+            self._files[plan.source] = {
+                "sha256": plan.content_hash,
+                "chunks": plan.chunks,
+                "bytes": plan.size,
+                "indexed_at": time.time(),
+            }
+            self._save()
+
+    def remove(self, source: str) -> Optional[Dict[str, str]]:
+        """Forget an indexed file; returns its chunk IDs, or None if it was not indexed."""
+        with self._lock:
+            entry = self._files.pop(source, None)
+            if entry is None:
+                return None
+            self._save()
+        return entry["chunks"]
+
+    def usage(self, excluding: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Indexed files and their total size in bytes, for quota checks.
+
+        Args:
+            excluding: Source left out of the totals (a file about to be replaced)
+        """
+        with self._lock:
+            entries = [entry for source, entry in self._files.items() if source != excluding]
+        # Entries written before sizes were recorded count as zero bytes
+        return len(entries), sum(entry.get("bytes", 0) for entry in entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files = {}
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._files)
@@ -0,0 +1,257 @@
+"""
+Low-overhead Prometheus-style metrics for the RAG hot path.
+
+Counters and histograms keep one value array per thread: a thread only
+ever writes its own array, so recording takes no lock and allocates
+nothing after the thread's first observation. Arrays are summed when
+``/metrics`` is scraped. Gauges are read at scrape time, either from a
+callback or from the last ``set()``.
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Sample = Tuple[str, Dict[str, str], float]  # (name suffix, labels, value)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(2 ** power) for power in range(10, 31, 2))  # 1 KiB .. 1 GiB
+THROUGHPUT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class _ShardedValues:
+    """Per-thread value arrays, summed on read."""
+
+    __slots__ = ("_size", "_local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()  # only taken when a thread registers or on scrape
+
+    def local(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        return [math.fsum(column) for column in zip(*shards)] if shards else [0.0] * self._size
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._children_lock = threading.Lock()
+        if not self.labelnames:
+            self._init_values()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @abstractmethod
+    def _init_values(self) -> None:
+        """Allocate this metric's (or label child's) value storage."""
+
+    @abstractmethod
+    def _own_samples(self) -> Iterator[Sample]:
+        """Yield this metric's samples, without label-child fan-out."""
+
+    def _child(self) -> "_Metric":
+        child = object.__new__(type(self))
+        child.__dict__.update({k: v for k, v in self.__dict__.items() if k not in ("_children", "_children_lock")})
+        child._init_values()
+        return child
+
+    def labels(self, *values: str) -> "_Metric":
+        """Child metric for one label combination; hold on to it rather than calling per request."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._children_lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def samples(self) -> Iterator[Sample]:
+        if not self.labelnames:
+            yield from self._own_samples()
+            return
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child._own_samples():
+                yield suffix, {**labels, **extra}, value
+
+
+class Counter(_Metric):
+    """Monotonic counter; ``function`` makes it read an existing running total at scrape time instead."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+        registry=None
+    ):
+        self._function = function
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _init_values(self) -> None:
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._values.local()[0] += amount
+
+    def _own_samples(self) -> Iterator[Sample]:
+        yield "", {}, self._values.totals()[0]
+
+    def samples(self) -> Iterator[Sample]:
+        if self._function is None:
+            yield from super().samples()
+            return
+        for values, value in self._function().items():
+            yield "", dict(zip(self.labelnames, values)), float(value)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with Prometheus ``le`` semantics."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labelnames: Sequence[str] = (),
+        registry=None
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _init_values(self) -> None:
+        # One slot per bucket, one for +Inf, then the sum
+        self._values = _ShardedValues(len(self.buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._values.local()
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def _own_samples(self) -> Iterator[Sample]:
+        totals = self._values.totals()
+        cumulative = 0.0
+        for bound, count in zip(self.buckets, totals):
+            cumulative += count
+            yield "_bucket", {"le": _format_value(bound)}, cumulative
+        cumulative += totals[len(self.buckets)]
+        yield "_bucket", {"le": "+Inf"}, cumulative
+        yield "_count", {}, cumulative
+        yield "_sum", {}, totals[-1]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, from ``set()`` or read from ``function`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Optional[Callable[[], float]] = None, registry=None):
+        self._function = function
+        super().__init__(name, documentation, (), registry)
+
+    def _init_values(self) -> None:
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _own_samples(self) -> Iterator[Sample]:
+        yield "", {}, float(self._function()) if self._function is not None else self._value
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Global registry and the application's metrics
+REGISTRY = MetricsRegistry()
+
+EMBEDDING_LATENCY = Histogram(
+    "rag_embedding_latency_seconds", "Embedding model latency (cache misses only)", labelnames=("kind",)
+)
+EMBED_QUERY_LATENCY = EMBEDDING_LATENCY.labels("query")
+EMBED_DOCUMENTS_LATENCY = EMBEDDING_LATENCY.labels("documents")
+CHROMA_QUERY_LATENCY = Histogram("rag_chroma_query_latency_seconds", "Chroma nearest-neighbour query latency")
+LLM_TTFT = Histogram("rag_llm_ttft_seconds", "Time from request to the first streamed LLM token")
+LLM_STREAM_DURATION = Histogram("rag_llm_stream_duration_seconds", "Duration of the LLM token stream")
+INGEST_THROUGHPUT = Histogram(
+    "rag_ingest_throughput_chunks_per_second", "Chunks written per second, per ingested document",
+    buckets=THROUGHPUT_BUCKETS
+)
+INGEST_CHUNKS = Counter("rag_ingest_chunks_total", "Chunks written to the vector store by ingestion")
+UPLOAD_SIZE = Histogram("rag_upload_size_bytes", "Size of accepted uploads", buckets=SIZE_BUCKETS)
+
+RATE_LIMIT_REJECTIONS = Counter("rag_rate_limit_rejections_total", "Requests rejected by the rate limiter")
+DRAFT_PREFETCH = Counter("rag_draft_prefetch_total", "Speculative retrievals reused or discarded", labelnames=("result",))
+DRAFT_PREFETCH_HIT = DRAFT_PREFETCH.labels("hit")
+DRAFT_PREFETCH_MISS = DRAFT_PREFETCH.labels("miss")
+
+WEBSOCKET_CONNECTIONS = Gauge("rag_websocket_connections", "Open /ws/chat connections")
+LIVE_CONVERSATIONS = Gauge("rag_conversations_live", "Conversations held by the conversation store")
+INGEST_QUEUE_DEPTH = Gauge("rag_ingest_queue_depth", "Ingestion jobs waiting to be parsed")
+TENANT_STORES_OPEN = Gauge("rag_tenant_stores_open", "Tenant vector stores held open by the LRU")
+TENANT_STORE_EVICTIONS = Counter("rag_tenant_store_evictions_total", "Tenant vector stores evicted from the LRU")
@@ -0,0 +1,755 @@
+"""
+Shared model server for multi-worker deployments.
+
+One process owns the embedding model and every tenant's Chroma collection,
+BM25 index and ingestion manifest. Web workers (``MODEL_SERVER_ENABLED``)
+reach it over a Unix socket instead of each loading their own copies:
+
+- frames are a 4-byte length prefix followed by a JSON message; requests
+  carry an ``id`` so one connection can have many in flight
+- vectors never go through JSON: each worker creates a shared-memory
+  arena of fixed-size slots, names the slot in its request, and the server
+  reads or writes the float32 rows there
+- the corpus version lives in a shared-memory counter the server updates
+  after every write, so worker-side caches see other workers' writes
+  without a round trip
+- query embeddings from every worker go through one BatchedEmbeddings,
+  so concurrent questions share a forward pass across workers
+
+Run with ``python -m app.core.model_server``.
+"""
+import asyncio
+import itertools
+import json
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+import time
+import uuid
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.config.settings import settings
+from app.core.executor import BlockingExecutor
+from app.core.logging import get_logger
+from app.core.manifest import FilePlan
+from app.core.tenants import TenantIndex, TenantRegistry, open_tenant_store
+
+logger = get_logger(__name__)
+
+_HEADER = struct.Struct("!I")
+_VERSION = struct.Struct("q")
+_DTYPE = np.float32
+
+
+def _frame(message: Dict) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Open a segment another process created, without adopting it for cleanup."""
+    segment = shared_memory.SharedMemory(name=name)
+    # Python < 3.13 registers attached segments too, and would unlink them when this process exits
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+
+def _slot_view(segment: shared_memory.SharedMemory, offset: int, rows: int, dim: int) -> np.ndarray:
+    return np.ndarray((rows, dim), dtype=_DTYPE, buffer=segment.buf, offset=offset)
+
+
+def _encode_documents(pairs: List[Tuple[str, Document]]) -> List[List[Any]]:
+    return [[chunk_id, doc.page_content, doc.metadata] for chunk_id, doc in pairs]
+
+
+def _decode_documents(rows: List[List[Any]]) -> List[Tuple[str, Document]]:
+    return [(chunk_id, Document(page_content=text, metadata=metadata or {})) for chunk_id, text, metadata in rows]
+
+
+class _Connection:
+    """Server-side state of one worker connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.arena: Optional[shared_memory.SharedMemory] = None
+        self.slot_bytes = 0
+        self.tasks = set()
+
+    def rows(self, slot: int, rows: int, dim: int) -> np.ndarray:
+        if self.arena is None:
+            raise RuntimeError("No shared-memory arena attached")
+        if rows * dim * _DTYPE().itemsize > self.slot_bytes:
+            raise ValueError(f"{rows} vectors do not fit in one slot")
+        return _slot_view(self.arena, slot * self.slot_bytes, rows, dim)
+
+    def close(self) -> None:
+        if self.arena is not None:
+            self.arena.close()
+            self.arena = None
+
+
+class ModelServer:
+    """
+    Serves embedding, vector store and manifest calls to web workers over a Unix socket.
+
+    Blocking calls (Chroma, document embedding, manifest writes) run on a
+    bounded pool; query embeddings await the shared micro-batcher.
+    """
+
+    def __init__(self, embeddings, vector_store, manifest, socket_path: str, workers: int = 8):
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.manifest = manifest
+        self.socket_path = socket_path
+        self.dim = len(embeddings.embed_query("dimension probe"))
+        self.connections = 0
+        self.requests = 0
+        # One version for every tenant: a write anywhere invalidates worker caches everywhere
+        self.corpus_version = 0
+        self.tenants = TenantRegistry(
+            self._open_tenant, max_open=settings.TENANT_MAX_OPEN, keep=(settings.DEFAULT_TENANT,)
+        )
+        self._executor = BlockingExecutor(workers, name="model-server")
+        self._state = shared_memory.SharedMemory(create=True, size=_VERSION.size)
+        self._publish_version()
+
+    def _publish_version(self) -> None:
+        _VERSION.pack_into(self._state.buf, 0, self.corpus_version)
+
+    def _open_tenant(self, tenant: str) -> TenantIndex:
+        if tenant == settings.DEFAULT_TENANT:
+            return TenantIndex(tenant, self.vector_store, self.manifest)
+        vector_store, manifest = open_tenant_store(
+            self.embeddings, tenant, self.vector_store.collection_name, self.vector_store.persist_directory,
+            client=self.vector_store.chroma_client
+        )
+        return TenantIndex(tenant, vector_store, manifest)
+
+    async def _index(self, tenant: Optional[str]) -> TenantIndex:
+        tenant = tenant or settings.DEFAULT_TENANT
+        return self.tenants.get_open(tenant) or await self._executor.run(self.tenants.get, tenant)
+
+    async def serve(self) -> None:
+        """Listen on the socket until cancelled, then remove it."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=2 ** 26)
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Model server listening on %s (dim=%d)", self.socket_path, self.dim)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._executor.shutdown(wait=False)
+            self._state.close()
+            self._state.unlink()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = _Connection(writer)
+        self.connections += 1
+        try:
+            while True:
+                (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                request = json.loads(await reader.readexactly(length))
+                # Requests on one connection run concurrently; responses carry the request id
+                task = asyncio.create_task(self._dispatch(conn, request))
+                conn.tasks.add(task)
+                task.add_done_callback(conn.tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down; end quietly (3.11 streams log a cancelled handler as an error)
+            pass
+        finally:
+            self.connections -= 1
+            for task in list(conn.tasks):
+                task.cancel()
+            conn.close()
+            writer.close()
+
+    async def _dispatch(self, conn: _Connection, request: Dict) -> None:
+        self.requests += 1
+        handler = getattr(self, f"_op_{request.get('op')}", None)
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown operation {request.get('op')!r}")
+            response = {"id": request["id"], "ok": True, "result": await handler(conn, **request.get("args", {}))}
+        except Exception as e:
+            response = {"id": request["id"], "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if not conn.writer.is_closing():
+            conn.writer.write(_frame(response))
+
+    async def _write(self, func, *args):
+        try:
+            return await self._executor.run(func, *args)
+        finally:
+            # Even a failed write may have changed Chroma or BM25 part way: invalidate worker caches
+            self.corpus_version += 1
+            self._publish_version()
+
+    # Session
+
+    async def _op_hello(self, conn: _Connection) -> Dict:
+        return {
+            "dim": self.dim,
+            "model_name": getattr(self.embeddings, "model_name", "unknown"),
+            "state": self._state.name,
+            "pid": os.getpid(),
+        }
+
+    async def _op_attach(self, conn: _Connection, arena: str, slot_bytes: int) -> None:
+        conn.close()
+        conn.arena = _attach_shared_memory(arena)
+        conn.slot_bytes = slot_bytes
+
+    async def _op_stats(self, conn: _Connection) -> Dict:
+        return {
+            "connections": self.connections,
+            "requests": self.requests,
+            "pool": self._executor.stats(),
+            "tenants": self.tenants.stats(),
+        }
+
+    # Embeddings
+
+    async def _op_embed_query(self, conn: _Connection, text: str, slot: int) -> int:
+        vector = await self.embeddings.aembed_query(text)
+        conn.rows(slot, 1, self.dim)[0] = vector
+        return 1
+
+    async def _op_embed_documents(self, conn: _Connection, texts: List[str], slot: int) -> int:
+        target = conn.rows(slot, len(texts), self.dim)
+        target[:] = await self._executor.run(self.embeddings.embed_documents, texts)
+        return len(texts)
+
+    # Vector store
+
+    async def _op_add_embedded_documents(
+        self, conn: _Connection, documents: List[List[Any]], ids: List[str], slot: int, tenant: Optional[str] = None
+    ) -> List[str]:
+        vectors = conn.rows(slot, len(documents), self.dim).tolist()
+        docs = [Document(page_content=text, metadata=metadata or {}) for text, metadata in documents]
+        index = await self._index(tenant)
+        return await self._write(index.vector_store.add_embedded_documents, docs, vectors, ids)
+
+    async def _op_add_documents(
+        self, conn: _Connection, documents: List[List[Any]], ids: Optional[List[str]], tenant: Optional[str] = None
+    ):
+        docs = [Document(page_content=text, metadata=metadata or {}) for text, metadata in documents]
+        return await self._write((await self._index(tenant)).vector_store.add_documents, docs, ids)
+
+    async def _op_delete(self, conn: _Connection, ids: List[str], tenant: Optional[str] = None) -> None:
+        await self._write((await self._index(tenant)).vector_store.delete, ids)
+
+    async def _op_delete_where(self, conn: _Connection, where: Dict, tenant: Optional[str] = None) -> None:
+        await self._write((await self._index(tenant)).vector_store.delete_where, where)
+
+    async def _op_clear(self, conn: _Connection, tenant: Optional[str] = None) -> None:
+        await self._write((await self._index(tenant)).vector_store.clear)
+
+    async def _op_dense_search(
+        self,
+        conn: _Connection,
+        query: str,
+        k: int,
+        slot: Optional[int] = None,
+        where: Optional[Dict] = None,
+        tenant: Optional[str] = None
+    ):
+        vector = conn.rows(slot, 1, self.dim)[0].tolist() if slot is not None else None
+        vector_store = (await self._index(tenant)).vector_store
+        return _encode_documents(await self._executor.run(vector_store.dense_search, query, k, vector, where))
+
+    async def _op_sparse_search(
+        self, conn: _Connection, query: str, k: int, where: Optional[Dict] = None, tenant: Optional[str] = None
+    ):
+        vector_store = (await self._index(tenant)).vector_store
+        return _encode_documents(await self._executor.run(vector_store.sparse_search, query, k, where))
+
+    async def _op_get_by_ids(self, conn: _Connection, ids: List[str], tenant: Optional[str] = None):
+        vector_store = (await self._index(tenant)).vector_store
+        return _encode_documents(await self._executor.run(vector_store.get_by_ids, ids))
+
+    async def _op_get_document_count(self, conn: _Connection, tenant: Optional[str] = None) -> int:
+        return await self._executor.run((await self._index(tenant)).vector_store.get_document_count)
+
+    # Manifest
+
+    async def _op_manifest_find_by_hash(
+        self, conn: _Connection, content_hash: str, tenant: Optional[str] = None
+    ) -> Optional[str]:
+        return (await self._index(tenant)).manifest.find_by_hash(content_hash)
+
+    async def _op_manifest_content_hash(
+        self, conn: _Connection, source: str, tenant: Optional[str] = None
+    ) -> Optional[str]:
+        return (await self._index(tenant)).manifest.content_hash(source)
+
+    async def _op_manifest_previous(
+        self, conn: _Connection, source: str, tenant: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        return (await self._index(tenant)).manifest.plan(source, "").previous or None
+
+    async def _op_manifest_commit(
+        self, conn: _Connection, source: str, content_hash: str, chunks: Dict[str, str],
+        size: int = 0, tenant: Optional[str] = None
+    ):
+        plan = FilePlan(source, content_hash, size=size)
+        plan.chunks = chunks
+        await self._executor.run((await self._index(tenant)).manifest.commit, plan)
+
+    async def _op_manifest_remove(
+        self, conn: _Connection, source: str, tenant: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        return await self._executor.run((await self._index(tenant)).manifest.remove, source)
+
+    async def _op_manifest_usage(
+        self, conn: _Connection, excluding: Optional[str] = None, tenant: Optional[str] = None
+    ) -> List[int]:
+        return list((await self._index(tenant)).manifest.usage(excluding))
+
+    async def _op_manifest_clear(self, conn: _Connection, tenant: Optional[str] = None) -> None:
+        await self._executor.run((await self._index(tenant)).manifest.clear)
+
+    async def _op_manifest_len(self, conn: _Connection, tenant: Optional[str] = None) -> int:
+        return len((await self._index(tenant)).manifest)
+
+
+class ModelServerClient:
+    """
+    Thread-safe client for the model server, multiplexing calls over one connection.
+
+    A reader thread resolves responses by request id. Vectors are exchanged
+    through ``slots`` shared-memory slots of ``slot_rows`` vectors each;
+    callers wait for a free slot, which bounds the transfers in flight.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        slots: int = 16,
+        slot_rows: int = 256,
+        timeout: float = 60.0,
+        connect_timeout: float = 300.0
+    ):
+        self.socket_path = socket_path
+        self.slot_rows = max(1, slot_rows)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.dim = 0
+        self.model_name = ""
+        self._slots = max(1, slots)
+        self._slot_bytes = 0
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._arena: Optional[shared_memory.SharedMemory] = None
+        self._state: Optional[shared_memory.SharedMemory] = None
+        self._sock: Optional[socket.socket] = None
+        self._ids = itertools.count()
+        # Request id -> (future, slot it uses); guarded by _lock with _in_flight/_parked
+        self._pending: Dict[int, Tuple[Future, Optional[int]]] = {}
+        self._in_flight: Set[int] = set()  # slots of requests still unanswered
+        self._parked: Set[int] = set()  # slots given back while their request was unanswered
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._closing = False
+
+    # Connection
+
+    def connect(self) -> None:
+        """Connect (waiting up to ``connect_timeout`` for the server to start) and set up shared memory."""
+        with self._connect_lock:
+            if self._sock is not None:
+                return
+            deadline = time.monotonic() + self.connect_timeout
+            while True:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.socket_path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    sock.close()
+                    if time.monotonic() > deadline:
+                        raise ConnectionError(f"Model server not reachable at {self.socket_path}")
+                    time.sleep(0.2)
+            self._sock = sock
+            threading.Thread(target=self._read_loop, args=(sock,), name="model-server-client", daemon=True).start()
+
+            hello = self._request("hello").result(self.timeout)
+            self.dim, self.model_name = hello["dim"], hello["model_name"]
+            if self._state is not None:
+                self._state.close()
+            self._state = _attach_shared_memory(hello["state"])
+
+            slot_bytes = self.slot_rows * self.dim * _DTYPE().itemsize
+            if self._arena is None:
+                self._arena = shared_memory.SharedMemory(create=True, size=self._slots * slot_bytes)
+                for slot in range(self._slots):
+                    self._free.put(slot)
+            self._slot_bytes = slot_bytes
+            self._request("attach", arena=self._arena.name, slot_bytes=slot_bytes).result(self.timeout)
+            logger.info("Connected to model server %s (model=%s, dim=%d, pid=%s)",
+                        self.socket_path, self.model_name, self.dim, hello["pid"])
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        reader = sock.makefile("rb")
+        try:
+            while True:
+                header = reader.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                (length,) = _HEADER.unpack(header)
+                response = json.loads(reader.read(length))
+                with self._lock:
+                    entry = self._pending.pop(response["id"], None)
+                    if entry is not None:
+                        self._answered(entry[1])
+                if entry is None:
+                    continue
+                try:
+                    if response["ok"]:
+                        entry[0].set_result(response["result"])
+                    else:
+                        entry[0].set_exception(RuntimeError(f"Model server: {response['error']}"))
+                except InvalidStateError:
+                    pass  # the caller cancelled it
+        except OSError:
+            pass
+        finally:
+            self._disconnected(sock)
+
+    def _disconnected(self, sock: socket.socket) -> None:
+        with self._send_lock:
+            if self._sock is sock:
+                self._sock = None
+        sock.close()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for _, slot in pending.values():
+                self._answered(slot)
+        for future, _ in pending.values():
+            try:
+                future.set_exception(ConnectionError("Model server connection lost"))
+            except InvalidStateError:
+                pass
+        if not self._closing:
+            logger.warning("Model server connection lost; reconnecting on the next call")
+
+    def _request(self, op: str, **args) -> Future:
+        request_id = next(self._ids)
+        future: Future = Future()
+        slot = args.get("slot")
+        with self._lock:
+            self._pending[request_id] = (future, slot)
+            if slot is not None:
+                self._in_flight.add(slot)
+        frame = _frame({"id": request_id, "op": op, "args": args})
+        try:
+            with self._send_lock:
+                sock = self._sock
+                if sock is None:
+                    raise ConnectionError("Model server not connected")
+                sock.sendall(frame)
+        except BaseException:
+            with self._lock:
+                if self._pending.pop(request_id, None) is not None:
+                    self._answered(slot)
+            raise
+        return future
+
+    def call(self, op: str, **args) -> Any:
+        """Run one operation on the server and wait for its result, reconnecting if needed."""
+        if self._sock is None:
+            self.connect()
+        return self._request(op, **args).result(self.timeout)
+
+    async def acall(self, op: str, **args) -> Any:
+        if self._sock is None:
+            await asyncio.to_thread(self.connect)
+        return await asyncio.wrap_future(self._request(op, **args))
+
+    @property
+    def corpus_version(self) -> int:
+        if self._state is None:
+            self.connect()
+        return _VERSION.unpack_from(self._state.buf, 0)[0]
+
+    def close(self) -> None:
+        """Disconnect and free this worker's shared-memory arena."""
+        self._closing = True
+        with self._send_lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+        if self._state is not None:
+            self._state.close()
+            self._state = None
+        if self._arena is not None:
+            self._arena.close()
+            self._arena.unlink()
+            self._arena = None
+
+    # Shared-memory slots
+
+    @contextmanager
+    def slot(self) -> Iterator[int]:
+        """Borrow a shared-memory slot for one transfer."""
+        if self._sock is None:
+            self.connect()
+        slot = self._free.get(timeout=self.timeout)
+        try:
+            yield slot
+        finally:
+            self._release(slot)
+
+    def _release(self, slot: int) -> None:
+        """Return a borrowed slot, or park it while the server may still read or write it."""
+        with self._lock:
+            if slot in self._in_flight:
+                # The caller timed out or was cancelled: _answered frees it on the response
+                self._parked.add(slot)
+                return
+        self._free.put(slot)
+
+    def _answered(self, slot: Optional[int]) -> None:
+        """A request using ``slot`` got its response (or the connection dropped); caller holds _lock."""
+        if slot is None:
+            return
+        self._in_flight.discard(slot)
+        if slot in self._parked:
+            self._parked.discard(slot)
+            self._free.put(slot)
+
+    def rows(self, slot: int, rows: int) -> np.ndarray:
+        return _slot_view(self._arena, slot * self._slot_bytes, rows, self.dim)
+
+    def embed(self, op: str, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.slot_rows):
+            batch = texts[start:start + self.slot_rows]
+            with self.slot() as slot:
+                if op == "embed_query":
+                    self.call(op, text=batch[0], slot=slot)
+                else:
+                    self.call(op, texts=batch, slot=slot)
+                vectors.extend(self.rows(slot, len(batch)).tolist())
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            return (await asyncio.to_thread(self.embed, "embed_query", [text]))[0]
+        try:
+            await self.acall("embed_query", text=text, slot=slot)
+            return self.rows(slot, 1)[0].tolist()
+        finally:
+            self._release(slot)
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the model server (batched there across every worker)."""
+
+    def __init__(self, client: ModelServerClient):
+        self.client = client
+        client.connect()
+
+    @property
+    def model_name(self) -> str:
+        return self.client.model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed("embed_documents", texts) if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed("embed_query", [text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
+
+
+class RemoteVectorStore:
+    """VectorStore interface backed by one tenant's Chroma collection and BM25 index in the model server."""
+
+    def __init__(self, embeddings, client: ModelServerClient, tenant: Optional[str] = None):
+        self.embeddings = embeddings
+        self.client = client
+        self.tenant = tenant
+
+    def _call(self, op: str, **args) -> Any:
+        return self.client.call(op, tenant=self.tenant, **args)
+
+    @property
+    def corpus_version(self) -> int:
+        return self.client.corpus_version
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None):
+        return self._call("add_documents", documents=[[d.page_content, d.metadata] for d in documents], ids=ids)
+
+    def add_embedded_documents(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Write documents with precomputed vectors; the vectors travel through shared memory."""
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        step = self.client.slot_rows
+        for start in range(0, len(documents), step):
+            batch = documents[start:start + step]
+            with self.client.slot() as slot:
+                self.client.rows(slot, len(batch))[:] = embeddings[start:start + step]
+                self._call(
+                    "add_embedded_documents",
+                    documents=[[d.page_content, d.metadata] for d in batch],
+                    ids=ids[start:start + step],
+                    slot=slot
+                )
+        return ids
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self._call("delete", ids=ids)
+
+    def delete_where(self, where: Dict[str, Any]) -> None:
+        self._call("delete_where", where=where)
+
+    def dense_search(
+        self,
+        query: str,
+        k: int = 4,
+        vector: Optional[List[float]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, Document]]:
+        if vector is None:
+            return _decode_documents(self._call("dense_search", query=query, k=k, where=where))
+        with self.client.slot() as slot:
+            self.client.rows(slot, 1)[0] = vector
+            return _decode_documents(self._call("dense_search", query=query, k=k, slot=slot, where=where))
+
+    def sparse_search(self, query: str, k: int = 4, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Document]]:
+        return _decode_documents(self._call("sparse_search", query=query, k=k, where=where))
+
+    def get_by_ids(self, ids: List[str]) -> List[Tuple[str, Document]]:
+        return _decode_documents(self._call("get_by_ids", ids=ids)) if ids else []
+
+    def get_document_count(self) -> int:
+        return self._call("get_document_count")
+
+    def clear(self) -> None:
+        self._call("clear")
+
+
+class RemoteManifest:
+    """IngestionManifest interface backed by one tenant's manifest in the model server."""
+
+    def __init__(self, client: ModelServerClient, tenant: Optional[str] = None):
+        self.client = client
+        self.tenant = tenant
+
+    def _call(self, op: str, **args) -> Any:
+        return self.client.call(op, tenant=self.tenant, **args)
+
+    def find_by_hash(self, content_hash: str) -> Optional[str]:
+        return self._call("manifest_find_by_hash", content_hash=content_hash)
+
+    def content_hash(self, source: str) -> Optional[str]:
+        return self._call("manifest_content_hash", source=source)
+
+    def plan(self, source: str, content_hash: str, size: int = 0) -> FilePlan:
+        return FilePlan(source, content_hash, self._call("manifest_previous", source=source), size)
+
+    def commit(self, plan: FilePlan) -> None:
+        self._call(
+            "manifest_commit", source=plan.source, content_hash=plan.content_hash, chunks=plan.chunks, size=plan.size
+        )
+
+    def remove(self, source: str) -> Optional[Dict[str, str]]:
+        return self._call("manifest_remove", source=source)
+
+    def usage(self, excluding: Optional[str] = None) -> Tuple[int, int]:
+        documents, stored_bytes = self._call("manifest_usage", excluding=excluding)
+        return documents, stored_bytes
+
+    def clear(self) -> None:
+        self._call("manifest_clear")
+
+    def __len__(self) -> int:
+        return self._call("manifest_len")
+
+
+_client: Optional[ModelServerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_model_server_client() -> ModelServerClient:
+    """Process-wide client for the configured model server."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ModelServerClient(
+                settings.MODEL_SERVER_SOCKET,
+                slots=settings.MODEL_SERVER_SLOTS,
+                slot_rows=settings.MODEL_SERVER_SLOT_ROWS,
+                timeout=settings.MODEL_SERVER_TIMEOUT_SECONDS,
+                connect_timeout=settings.MODEL_SERVER_CONNECT_TIMEOUT_SECONDS
+            )
+        return _client
+
+
+def create_model_server() -> ModelServer:
+    """Load the model, vector store and manifest this process will serve."""
+    from app.core.embeddings import create_embeddings
+
+    embeddings = create_embeddings(remote=False)
+    embeddings.warm_up()
+    vector_store, manifest = open_tenant_store(
+        embeddings, settings.DEFAULT_TENANT, settings.CHROMA_COLLECTION_NAME, settings.CHROMA_PERSIST_DIR
+    )
+    return ModelServer(
+        embeddings,
+        vector_store,
+        manifest,
+        settings.MODEL_SERVER_SOCKET,
+        workers=settings.BLOCKING_POOL_MAX_WORKERS
+    )
+
+
+async def _serve(server: ModelServer) -> None:
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, task.cancel)
+    try:
+        await server.serve()
+    except asyncio.CancelledError:
+        logger.info("Model server stopped")
+
+
+def main() -> None:
+    from app.core.logging import setup_logging
+
+    setup_logging(settings.LOG_LEVEL)
+    server = create_model_server()
+    asyncio.run(_serve(server))
+    document_cache = getattr(server.embeddings, "document_cache", None)
+    if document_cache is not None:
+        document_cache.close()
+
+
+if __name__ == "__main__":
+    main()
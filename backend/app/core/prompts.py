@@ -10,3 +10,15 @@ Context:
 Question: {question}
 
 Helpful Answer:"""
+
+
+HISTORY_SUMMARY_PROMPT_TEMPLATE = """Summarize the conversation below so it can serve as memory for later turns.
+Keep facts, names, numbers, decisions and open questions; drop greetings and filler.
+Merge it with the existing summary, if there is one. Use at most {max_words} words.
+
+{previous_summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
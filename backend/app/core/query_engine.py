@@ -1,12 +1,22 @@
 """Query engine for RAG system."""
+import asyncio
+import copy
 import re
-from typing import Dict, AsyncGenerator, Optional
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, AsyncGenerator, List, Optional, Tuple
 from langchain_core.prompts import PromptTemplate
 from langchain_classic.chains import create_retrieval_chain
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.documents import Document
 from app.core.prompts import RAG_PROMPT_TEMPLATE
-from app.core.logging import get_logger
+from app.core.answer_cache import CachedAnswer, SemanticAnswerCache
+from app.core.context import PackedContext, create_context_packer
+from app.core.executor import blocking_executor
+from app.core.reranker import create_reranker
+from app.core.retrieval import RetrievalResult, create_retriever
+from app.core.logging import get_logger, log_timings
+from app.core.metrics import LLM_STREAM_DURATION, LLM_TTFT
 
 logger = get_logger(__name__)
 
@@ -16,78 +26,288 @@ def clean_citations(text: str) -> str:
     return re.sub(r'【.*?】', '', text)
 
 
+def replay_tokens(text: str) -> List[str]:
+    """Split a finished answer into word-sized pieces for token-style replay."""
+    return re.findall(r'\s*\S+|\s+', text)
+
+
+@dataclass
+class StageTimings:
+    """Per-request timing record of the streaming pipeline (milliseconds unless noted)."""
+    embed_ms: Optional[float] = None
+    search_ms: Optional[float] = None
+    rerank_ms: Optional[float] = None
+    prepare_ms: Optional[float] = None  # history section, prompt skeleton and LLM client
+    pack_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    tokens: Optional[int] = None
+    tokens_per_s: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return {stage: round(value, 1) for stage, value in asdict(self).items() if value is not None}
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
 class QueryEngine:
     """Handles query processing and response generation"""
     
-    def __init__(self, llm, vector_store, groq_api_key: str, model_name: str):
-        self.llm = llm
+    def __init__(
+        self,
+        llm_pool,
+        vector_store,
+        groq_api_key: str,
+        model_name: str,
+        answer_cache: Optional[SemanticAnswerCache] = None
+    ):
+        self.llm_pool = llm_pool
+        self.llm = llm_pool.get()
         self.vector_store = vector_store
         self.groq_api_key = groq_api_key
         self.model_name = model_name
+        self.answer_cache = answer_cache
         
         self.prompt = PromptTemplate(
             template=RAG_PROMPT_TEMPLATE,
             input_variables=["context", "question", "chat_history"]
         )
         
-        self.retriever = self.vector_store.as_retriever()
-        self.retriever.search_kwargs = {"k": 4}
+        self.retriever = create_retriever(self.vector_store)
+        self.reranker = create_reranker()
+        self.context_packer = create_context_packer()
+
+    def for_vector_store(self, vector_store, answer_cache: Optional[SemanticAnswerCache] = None) -> "QueryEngine":
+        """
+        Query engine over another vector store (e.g. another tenant's).
+
+        The LLM pool, reranker and context packer are shared with this
+        engine; only the retriever and the answer cache are separate.
+        """
+        engine = copy.copy(self)
+        engine.vector_store = vector_store
+        engine.retriever = create_retriever(vector_store)
+        engine.answer_cache = answer_cache
+        return engine
     
-    def query(self, question: str, chat_history: str = "") -> Dict:
-        """Non-streaming query with optional chat history."""
-        docs = self.retriever.invoke(question)
-        context = "\n\n".join([doc.page_content for doc in docs])
+    def _retrieve(self, question: str, mode: Optional[str], where: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Retrieve context chunks, over-fetching and reranking when a reranker is configured (blocking)."""
+        if self.reranker is None:
+            return self.retriever.retrieve(question, mode, where=where).documents
+        candidates = self.retriever.retrieve(question, mode, k=self.reranker.candidates, where=where)
+        return self.reranker.rerank(question, candidates).documents
+
+    async def aretrieve_candidates(
+        self,
+        question: str,
+        mode: Optional[str],
+        vector: Optional[asyncio.Future] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> RetrievalResult:
+        """First retrieval stage: over-fetch for the reranker when one is configured."""
+        k = self.reranker.candidates if self.reranker is not None else None
+        return await self.retriever.aretrieve(question, mode, k=k, vector=vector, where=where)
 
+    async def arerank(self, question: str, candidates: RetrievalResult) -> List[Document]:
+        """Second retrieval stage: rerank candidates against the (final) question."""
+        if self.reranker is None:
+            return candidates.documents
+        return (await self.reranker.arerank(question, candidates)).documents
+
+    async def _aretrieve(self, question: str, mode: Optional[str], where: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Async counterpart of ``_retrieve``."""
+        return await self.arerank(question, await self.aretrieve_candidates(question, mode, where=where))
+
+    def _prompt_skeleton(self, question: str, chat_history: str) -> PromptTemplate:
+        """Prompt with question and history filled in, waiting only for the context."""
         history_section = ""
         if chat_history:
             history_section = f"Previous conversation:\n{chat_history}\n"
+        return self.prompt.partial(question=question, chat_history=history_section)
 
-        prompt_text = self.prompt.format(
-            context=context,
-            question=question,
-            chat_history=history_section
+    def _fill_prompt(self, skeleton: PromptTemplate, docs: List[Document]) -> Tuple[str, PackedContext]:
+        """Pack retrieved chunks under the context token budget and complete the prompt."""
+        packed = self.context_packer.pack(docs)
+        prompt_text = skeleton.format(context=packed.text)
+        logger.info(
+            "Context: %d/%d chunks, %d/%d tokens (%d over budget, %d duplicate, %d overlap chars trimmed); prompt ~%d tokens",
+            len(packed.documents), len(docs), packed.tokens, packed.budget,
+            packed.dropped, packed.duplicates, packed.trimmed_chars,
+            self.context_packer.count_tokens(prompt_text)
         )
+        return prompt_text, packed
+
+    def _build_prompt(self, docs: List[Document], question: str, chat_history: str) -> Tuple[str, PackedContext]:
+        """Pack retrieved chunks under the context token budget and fill the prompt."""
+        return self._fill_prompt(self._prompt_skeleton(question, chat_history), docs)
+
+    @staticmethod
+    def _collect_sources(docs: List[Document]) -> List[str]:
+        sources = [doc.metadata.get('source', 'Unknown') for doc in docs]
+        return list(set(sources))
+
+    def _uses_answer_cache(self, chat_history: str, where: Optional[Dict[str, Any]]) -> bool:
+        # Follow-up turns depend on their history, and filtered questions on
+        # their filter, so neither is answered from or stored in the cache
+        return self.answer_cache is not None and not chat_history and not where
+
+    def _cache_mode(self, mode: Optional[str]) -> str:
+        # Key on the resolved mode so an omitted mode shares entries with the explicit default
+        return mode or self.retriever.default_mode
+
+    def _lookup_answer(
+        self, question: str, chat_history: str, where: Optional[Dict[str, Any]] = None, mode: Optional[str] = None
+    ) -> Tuple[Optional[List[float]], Optional[CachedAnswer]]:
+        """Embed the question and look for a cached answer (blocking)."""
+        if not self._uses_answer_cache(chat_history, where):
+            return None, None
+        vector = self.vector_store.embeddings.embed_query(question)
+        cached = self.answer_cache.lookup(vector, self.vector_store.corpus_version, self._cache_mode(mode))
+        if cached:
+            logger.info("Answer cache hit (similarity=%.3f)", cached.similarity)
+        return vector, cached
+
+    def _store_answer(
+        self, vector: Optional[List[float]], answer: str, sources: List[str], corpus_version: int,
+        mode: Optional[str] = None
+    ) -> None:
+        if self.answer_cache is not None and vector is not None:
+            self.answer_cache.store(vector, answer, sources, corpus_version, self._cache_mode(mode))
+
+    def query(
+        self, question: str, chat_history: str = "", mode: Optional[str] = None, where: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """Non-streaming query with optional chat history (blocking); ``where`` filters chunks by metadata."""
+        corpus_version = self.vector_store.corpus_version
+        vector, cached = self._lookup_answer(question, chat_history, where, mode)
+        if cached:
+            return {"answer": cached.answer, "sources": cached.sources}
+
+        docs = self._retrieve(question, mode, where)
+        prompt_text, packed = self._build_prompt(docs, question, chat_history)
 
         result = self.llm.invoke(prompt_text)
         answer = clean_citations(result.content if hasattr(result, 'content') else str(result))
 
-        sources = [doc.metadata.get('source', 'Unknown') for doc in docs]
+        sources = self._collect_sources(packed.documents)
+        self._store_answer(vector, answer, sources, corpus_version, mode)
         return {
             "answer": answer,
-            "sources": list(set(sources))
+            "sources": sources
         }
-    
-    async def query_stream(self, question: str, chat_history: str = "") -> AsyncGenerator[Dict, None]:
-        from app.core.llm import create_llm
-        
+
+    async def aquery(
+        self, question: str, chat_history: str = "", mode: Optional[str] = None, where: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """Non-streaming query that never blocks the event loop."""
+        corpus_version = self.vector_store.corpus_version
+        vector, cached = await blocking_executor.run(self._lookup_answer, question, chat_history, where, mode)
+        if cached:
+            return {"answer": cached.answer, "sources": cached.sources}
+
+        docs = await self._aretrieve(question, mode, where)
+        prompt_text, packed = self._build_prompt(docs, question, chat_history)
+
+        result = await self.llm.ainvoke(prompt_text)
+        answer = clean_citations(result.content if hasattr(result, 'content') else str(result))
+
+        sources = self._collect_sources(packed.documents)
+        self._store_answer(vector, answer, sources, corpus_version, mode)
+        return {
+            "answer": answer,
+            "sources": sources
+        }
+
+    async def _embed(self, question: str, timings: StageTimings) -> List[float]:
+        start = time.perf_counter()
+        vector = await blocking_executor.run(self.vector_store.embeddings.embed_query, question)
+        timings.embed_ms = _elapsed_ms(start)
+        return vector
+
+    async def query_stream(
+        self,
+        question: str,
+        chat_history: str = "",
+        mode: Optional[str] = None,
+        candidates: Optional[RetrievalResult] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        Streaming query; ``candidates`` are prefetched retrieval results that skip the search.
+
+        ``where`` is a Chroma metadata filter restricting retrieval to some
+        files or pages (prefetched ``candidates`` must have used the same one).
+
+        The pre-LLM stages overlap: the query is embedded once on the pool
+        and shared by the answer-cache lookup and the dense search, BM25
+        runs alongside, and the history section, prompt skeleton and LLM
+        client are prepared on the loop meanwhile. A per-stage timing
+        record is logged and yielded as a ``timings`` chunk before ``done``.
+        """
+        started = time.perf_counter()
+        timings = StageTimings()
+        embedding: Optional[asyncio.Task] = None
+        retrieval: Optional[asyncio.Task] = None
         try:
             logger.info("Starting query stream for: %s", question[:100])
-            
-            docs: list[Document] = self.retriever.invoke(question)
+
+            corpus_version = self.vector_store.corpus_version
+            use_cache = self._uses_answer_cache(chat_history, where)
+            if use_cache or (candidates is None and self.retriever.uses_dense(mode)):
+                embedding = asyncio.ensure_future(self._embed(question, timings))
+            if candidates is None:
+                retrieval = asyncio.ensure_future(
+                    self.aretrieve_candidates(question, mode, vector=embedding, where=where)
+                )
+
+            # Runs while the embedding and searches are on the pool
+            prepare_start = time.perf_counter()
+            skeleton = self._prompt_skeleton(question, chat_history)
+            streaming_llm = self.llm_pool.get(temperature=0.7)
+            timings.prepare_ms = _elapsed_ms(prepare_start)
+
+            vector = None
+            if use_cache:
+                vector = await embedding
+                cached = self.answer_cache.lookup(vector, corpus_version, self._cache_mode(mode))
+                if cached:
+                    logger.info("Answer cache hit (similarity=%.3f)", cached.similarity)
+                    # Replay as a token stream so clients see the usual protocol
+                    for token in replay_tokens(cached.answer):
+                        yield {"type": "token", "content": token}
+                    yield {"type": "sources", "sources": cached.sources}
+                    timings.total_ms = _elapsed_ms(started)
+                    yield {"type": "timings", "timings": timings.as_dict()}
+                    yield {"type": "done", "content": cached.answer}
+                    return
+
+            if retrieval is not None:
+                candidates = await retrieval
+            timings.search_ms = max(
+                candidates.timings.get("dense", 0.0), candidates.timings.get("sparse", 0.0)
+            ) + candidates.timings.get("fusion", 0.0)
+            if timings.embed_ms is None and "embed" in candidates.timings:
+                timings.embed_ms = candidates.timings["embed"]
+
+            rerank_start = time.perf_counter()
+            docs: list[Document] = await self.arerank(question, candidates)
+            if self.reranker is not None:
+                timings.rerank_ms = _elapsed_ms(rerank_start)
             logger.info("Retrieved %d documents", len(docs))
-            
-            context = "\n\n".join([doc.page_content for doc in docs])
 
-            history_section = ""
-            if chat_history:
-                history_section = f"Previous conversation:\n{chat_history}\n"
+            pack_start = time.perf_counter()
+            prompt_text, packed = self._fill_prompt(skeleton, docs)
+            timings.pack_ms = _elapsed_ms(pack_start)
 
-            prompt_text = self.prompt.format(
-                context=context,
-                question=question,
-                chat_history=history_section
-            )
-            
-            streaming_llm = create_llm(
-                api_key=self.groq_api_key,
-                model_name=self.model_name,
-                temperature=0.7,
-                streaming=True
-            )
-            
             full_response = ""
+            stream_start = time.perf_counter()
             async for chunk in streaming_llm.astream(prompt_text):
                 if hasattr(chunk, 'content') and chunk.content:
+                    if timings.ttft_ms is None:
+                        timings.ttft_ms = _elapsed_ms(started)
+                        LLM_TTFT.observe(timings.ttft_ms / 1000)
                     token = clean_citations(chunk.content)
                     full_response += token
                     yield {
@@ -95,12 +315,24 @@ class QueryEngine:
                         "content": token
                     }
             
+            LLM_STREAM_DURATION.observe(time.perf_counter() - stream_start)
             logger.info("Streaming complete. Response length: %d chars", len(full_response))
-            
-            sources = [doc.metadata.get('source', 'Unknown') for doc in docs]
+            timings.total_ms = _elapsed_ms(started)
+            timings.tokens = self.context_packer.count_tokens(full_response)
+            if timings.ttft_ms is not None and timings.total_ms > timings.ttft_ms:
+                timings.tokens_per_s = timings.tokens / ((timings.total_ms - timings.ttft_ms) / 1000)
+            log_timings(logger, "Query pipeline", timings.as_dict())
+
+            sources = self._collect_sources(packed.documents)
+            self._store_answer(vector, full_response, sources, corpus_version, mode)
             yield {
                 "type": "sources",
-                "sources": list(set(sources))
+                "sources": sources
+            }
+
+            yield {
+                "type": "timings",
+                "timings": timings.as_dict()
             }
             
             yield {
@@ -113,4 +345,14 @@ class QueryEngine:
             yield {
                 "type": "error",
                 "content": f"{type(e).__name__}: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+        finally:
+            # Answer-cache hits, errors and client disconnects leave searches behind
+            for task in (retrieval, embedding):
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # already reported via the awaiting stage
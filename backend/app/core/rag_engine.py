@@ -1,14 +1,29 @@
-from typing import Dict, AsyncGenerator
-from app.core.embeddings import create_embeddings
-from app.core.vector_store import VectorStore
-from app.core.llm import create_llm
-from app.core.document_loader import load_document
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, AsyncGenerator, Optional
+from app.config.settings import settings
+from app.core.answer_cache import SemanticAnswerCache
+from app.core.coalescing import StreamCoalescer
+from app.core.embeddings import create_embeddings, normalize_query
+from app.core.executor import blocking_executor
+from app.core.history import create_history_compactor
+from app.core.ingestion import chunk_metadata
+from app.core.llm import create_llm_pool
+from app.core.document_loader import lazy_load_document
+from app.core.manifest import sha256_file
 from app.core.text_processor import TextProcessor
 from app.core.query_engine import QueryEngine
+from app.core.retrieval import RetrievalResult, where_key
+from app.core.tenants import TenantIndex, TenantRegistry, open_tenant_store
+from app.core.warmup import WarmupTracker
 
 
 class RAGEngine:
     """Main RAG Engine that coordinates all components"""
+
+    # Reported individually while the engine is built (see WarmupTracker)
+    WARMUP_STAGES = ("embedding_model", "vector_store", "llm", "query_engine")
     
     def __init__(
         self,
@@ -17,7 +32,9 @@ class RAGEngine:
         collection_name: str = "documents",
         persist_dir: str = "./chroma_db",
         chunk_size: int = 1000,
-        chunk_overlap: int = 200
+        chunk_overlap: int = 200,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        warmup: Optional[WarmupTracker] = None
     ):
         """
         Initialize RAG Engine
@@ -25,79 +42,246 @@ class RAGEngine:
         Args:
             groq_api_key: Groq API key
             model_name: LLM model name
-            collection_name: Collection name
-            cloud_api_key: Chroma Cloud API key
-            cloud_tenant: Chroma Cloud tenant ID
-            cloud_database: Chroma Cloud database name
+            collection_name: Collection of the default tenant (other tenants get suffixed ones)
+            persist_dir: Chroma data directory
             chunk_size: Text chunk size
             chunk_overlap: Chunk overlap
+            answer_cache: Optional semantic answer cache for repeated questions
+            warmup: Optional tracker that records each component as it loads
         """
         self.groq_api_key = groq_api_key
         self.model_name = model_name
+        self.collection_name = collection_name
+        self.persist_dir = persist_dir
         
+        stage = warmup.stage if warmup is not None else lambda name: nullcontext()
+
         # Initialize components
-        self.embeddings = create_embeddings()
-        self.vector_store = VectorStore(
-            embeddings=self.embeddings,
-            collection_name="documents",
-           persist_dir=persist_dir
-        )
-        self.llm = create_llm(groq_api_key, model_name)
-        self.text_processor = TextProcessor(chunk_size, chunk_overlap)
-        self.query_engine = QueryEngine(self.llm, self.vector_store, groq_api_key, model_name)
+        with stage("embedding_model"):
+            self.embeddings = create_embeddings()
+            self.embeddings.warm_up()
+        with stage("vector_store"):
+            if settings.MODEL_SERVER_ENABLED:
+                # Chroma, the BM25 index and the manifest are owned by the shared model server
+                from app.core.model_server import RemoteManifest, RemoteVectorStore, get_model_server_client
+
+                self.vector_store = RemoteVectorStore(self.embeddings, get_model_server_client())
+                self.manifest = RemoteManifest(get_model_server_client())
+            else:
+                self.vector_store, self.manifest = open_tenant_store(
+                    self.embeddings, settings.DEFAULT_TENANT, collection_name, persist_dir
+                )
+        with stage("llm"):
+            self.llm_pool = create_llm_pool(groq_api_key, model_name)
+            self.llm = self.llm_pool.get()
+            self.history_compactor = create_history_compactor(self.llm_pool)
+        with stage("query_engine"):
+            self.text_processor = TextProcessor(chunk_size, chunk_overlap)
+            self.answer_cache = answer_cache
+            self.query_engine = QueryEngine(
+                self.llm_pool, self.vector_store, groq_api_key, model_name,
+                answer_cache=answer_cache
+            )
+            self.stream_coalescer = StreamCoalescer() if settings.COALESCE_ENABLED else None
+            # The attributes above serve the default tenant; others are opened on demand
+            self.tenants = TenantRegistry(
+                self._open_tenant, max_open=settings.TENANT_MAX_OPEN, keep=(settings.DEFAULT_TENANT,)
+            )
+
+    def _open_tenant(self, tenant: str) -> TenantIndex:
+        """Vector store, manifest and query engine of one tenant."""
+        if tenant == settings.DEFAULT_TENANT:
+            return TenantIndex(tenant, self.vector_store, self.manifest, self.query_engine)
+        if settings.MODEL_SERVER_ENABLED:
+            from app.core.model_server import RemoteManifest, RemoteVectorStore
+
+            client = self.vector_store.client
+            vector_store, manifest = RemoteVectorStore(self.embeddings, client, tenant), RemoteManifest(client, tenant)
+        else:
+            vector_store, manifest = open_tenant_store(
+                self.embeddings, tenant, self.collection_name, self.persist_dir,
+                client=self.vector_store.chroma_client
+            )
+        answer_cache = None
+        if self.answer_cache is not None:
+            # Same settings, separate entries: answers never cross tenants
+            answer_cache = SemanticAnswerCache(
+                self.answer_cache.threshold, self.answer_cache.max_entries, self.answer_cache.ttl
+            )
+        return TenantIndex(tenant, vector_store, manifest, self.query_engine.for_vector_store(vector_store, answer_cache))
+
+    def tenant(self, tenant: Optional[str] = None) -> TenantIndex:
+        """Index of a tenant (the default one if None), opened if needed (blocking)."""
+        return self.tenants.get(tenant or settings.DEFAULT_TENANT)
+
+    async def atenant(self, tenant: Optional[str] = None) -> TenantIndex:
+        """Index of a tenant; one that is not open yet is opened on the blocking pool."""
+        tenant = tenant or settings.DEFAULT_TENANT
+        return self.tenants.get_open(tenant) or await blocking_executor.run(self.tenants.get, tenant)
     
-    def process_document(self, file_path: str) -> int:
+    def process_document(self, file_path: str, batch_size: int = 64, tenant: Optional[str] = None) -> int:
         """
-        Process and add document to vector store
+        Process and add document to vector store, streaming page by page
+        
+        Unchanged files are skipped; for modified files only new chunks are
+        embedded and chunks that no longer exist are deleted.
         
         Args:
             file_path: Path to document
+            batch_size: Chunks embedded and written per batch
+            tenant: Tenant whose collection receives the chunks (default tenant if None)
         
         Returns:
-            int: Number of chunks created
+            int: Number of chunks in the document
         """
-        # Load document
-        documents = load_document(file_path)
-        
-        # Split into chunks
-        chunks = self.text_processor.split_documents(documents)
-        
-        # Add to vector store
-        self.vector_store.add_documents(chunks)
+        index = self.tenant(tenant)
+        content_hash = sha256_file(file_path)
+        plan = index.manifest.plan(file_path, content_hash, os.path.getsize(file_path))
+        # Only this path's own entry counts: identical content under another path is indexed here too
+        if index.manifest.content_hash(file_path) == content_hash:
+            return len(plan.previous)
+        if plan.is_new_source:
+            index.vector_store.delete_where({"source": file_path})
+
+        total = 0
+        stamp = chunk_metadata(file_path, content_hash, index.tenant, time.time())
+        pages = lazy_load_document(file_path)
+        for batch in self.text_processor.iter_chunk_batches(pages, batch_size):
+            for chunk in batch:
+                chunk.metadata.update(stamp)
+            ids, fresh = plan.assign(batch)
+            if fresh:
+                index.vector_store.add_documents(fresh, ids=ids)
+            total += len(batch)
         
-        return len(chunks)
+        index.vector_store.delete(plan.stale_ids())
+        index.manifest.commit(plan)
+        return total
     
-    def query(self, question: str, chat_history: str = "") -> Dict:
+    def query(
+        self,
+        question: str,
+        chat_history: str = "",
+        mode: Optional[str] = None,
+        tenant: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict:
         """
         Query the RAG system (non-streaming)
         
         Args:
             question: User question
             chat_history: Formatted conversation history
+            mode: Retrieval mode (dense, sparse or hybrid); defaults to settings
+            tenant: Tenant whose documents are searched (default tenant if None)
+            where: Chroma metadata filter restricting the search (see ``build_where``)
         
         Returns:
             Dict: Answer and sources
         """
-        return self.query_engine.query(question, chat_history=chat_history)
+        return self.tenant(tenant).query_engine.query(question, chat_history=chat_history, mode=mode, where=where)
+
+    async def aquery(
+        self,
+        question: str,
+        chat_history: str = "",
+        mode: Optional[str] = None,
+        tenant: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        Query the RAG system (non-streaming) without blocking the event loop
+        
+        Args:
+            question: User question
+            chat_history: Formatted conversation history
+            mode: Retrieval mode (dense, sparse or hybrid); defaults to settings
+            tenant: Tenant whose documents are searched (default tenant if None)
+            where: Chroma metadata filter restricting the search (see ``build_where``)
+        
+        Returns:
+            Dict: Answer and sources
+        """
+        query_engine = (await self.atenant(tenant)).query_engine
+        return await query_engine.aquery(question, chat_history=chat_history, mode=mode, where=where)
     
-    async def query_stream(self, question: str, chat_history: str = "") -> AsyncGenerator[Dict, None]:
+    async def query_stream(
+        self,
+        question: str,
+        chat_history: str = "",
+        mode: Optional[str] = None,
+        candidates: Optional[RetrievalResult] = None,
+        tenant: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[Dict, None]:
         """
         Query the RAG system with streaming response
         
         Args:
             question: User question
             chat_history: Formatted conversation history
+            mode: Retrieval mode (dense, sparse or hybrid); defaults to settings
+            candidates: Retrieval results prefetched from a draft (skips the search)
+            tenant: Tenant whose documents are searched (default tenant if None)
+            where: Chroma metadata filter restricting the search (see ``build_where``)
         
         Yields:
             Dict: Streaming response chunks
         """
-        async for chunk in self.query_engine.query_stream(question, chat_history=chat_history):
+        index = await self.atenant(tenant)
+        query_engine = index.query_engine
+        if self.stream_coalescer is None or chat_history:
+            # Follow-up turns depend on their own history, so they are never shared
+            async for chunk in query_engine.query_stream(
+                question, chat_history=chat_history, mode=mode, candidates=candidates, where=where
+            ):
+                yield chunk
+            return
+
+        # Identical first-turn questions in flight at the same time share one retrieval and LLM stream
+        key = (
+            index.tenant, normalize_query(question), mode or settings.RETRIEVAL_MODE, where_key(where),
+            index.vector_store.corpus_version
+        )
+        async for chunk in self.stream_coalescer.subscribe(
+            key, lambda: query_engine.query_stream(question, mode=mode, candidates=candidates, where=where)
+        ):
             yield chunk
     
-    def get_document_count(self) -> int:
-        """Get number of documents in vector store"""
-        return self.vector_store.get_document_count()
+    def get_document_count(self, tenant: Optional[str] = None) -> int:
+        """Get number of documents in a tenant's vector store (default tenant if None)"""
+        return self.tenant(tenant).vector_store.get_document_count()
     
-    def clear_documents(self):
-        """Clear all documents from vector store"""
-        self.vector_store.clear()
+    def clear_documents(self, tenant: Optional[str] = None):
+        """Clear all documents of one tenant (default tenant if None); other tenants are untouched"""
+        index = self.tenant(tenant)
+        index.vector_store.clear()
+        index.manifest.clear()
+
+    def delete_document(self, source: str, tenant: Optional[str] = None) -> bool:
+        """
+        Remove one indexed file from a tenant's vector store and manifest
+        
+        Args:
+            source: Path the file was indexed under
+            tenant: Tenant ID (default tenant if None)
+        
+        Returns:
+            bool: False if the tenant had no such file indexed
+        """
+        index = self.tenant(tenant)
+        index.vector_store.delete_where({"source": source})
+        return index.manifest.remove(source) is not None
+
+    async def aclose(self):
+        """Release pooled LLM connections, the reranker and the chunk-embedding cache"""
+        if self.stream_coalescer is not None:
+            await self.stream_coalescer.aclose()
+        await self.history_compactor.aclose()
+        await self.llm_pool.aclose()
+        if self.query_engine.reranker is not None:
+            self.query_engine.reranker.shutdown()
+        if getattr(self.embeddings, "document_cache", None) is not None:
+            self.embeddings.document_cache.close()
+        if settings.MODEL_SERVER_ENABLED:
+            self.vector_store.client.close()
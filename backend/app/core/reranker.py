@@ -0,0 +1,194 @@
+"""Cross-encoder reranking of retrieved chunks under a strict latency budget."""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.core.embeddings import normalize_query
+from app.core.executor import BlockingExecutor
+from app.core.logging import get_logger
+from app.core.retrieval import RetrievalResult
+
+logger = get_logger(__name__)
+
+
+class RerankScoreCache:
+    """Bounded LRU of cross-encoder scores keyed on (query hash, chunk ID)."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, query_key: str, ids: List[str]) -> Dict[str, float]:
+        found = {}
+        with self._lock:
+            for chunk_id in ids:
+                score = self._scores.get((query_key, chunk_id))
+                if score is not None:
+                    self._scores.move_to_end((query_key, chunk_id))
+                    found[chunk_id] = score
+        return found
+
+    def put_many(self, query_key: str, scores: Dict[str, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for chunk_id, score in scores.items():
+                self._scores[(query_key, chunk_id)] = score
+                self._scores.move_to_end((query_key, chunk_id))
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores over-fetched candidates with a local CPU cross-encoder and keeps the top ``top_n``.
+
+    Scoring runs in batches on a dedicated thread; the caller waits at most
+    ``budget_ms``. On timeout the retrieval order is kept, while the
+    in-flight scoring finishes its current batch and still fills the score
+    cache for the next identical question.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        candidates: int = 20,
+        top_n: int = 4,
+        batch_size: int = 16,
+        budget_ms: float = 150.0,
+        cache_size: int = 10000,
+        max_length: int = 512
+    ):
+        self.model_name = model_name
+        self.candidates = max(candidates, top_n)
+        self.top_n = top_n
+        self.batch_size = max(1, batch_size)
+        self.budget = budget_ms / 1000
+        self.max_length = max_length
+        self.cache = RerankScoreCache(cache_size)
+        self.timeouts = 0
+        self._model = None
+        self._model_lock = threading.Lock()
+        # One scoring thread: the model already uses every core for a batch
+        self._executor = BlockingExecutor(1, name="rerank")
+
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                start = time.perf_counter()
+                self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                logger.info("Loaded cross-encoder %s in %.1fs", self.model_name, time.perf_counter() - start)
+        return self._model
+
+    @staticmethod
+    def _query_key(question: str) -> str:
+        return hashlib.sha256(normalize_query(question).encode("utf-8")).hexdigest()
+
+    def _score(self, question: str, query_key: str, pending: List[Tuple[str, str]], deadline: float) -> None:
+        """Score (chunk_id, text) pairs in batches, caching each batch as it completes."""
+        model = self._load_model()
+        for start in range(0, len(pending), self.batch_size):
+            if time.monotonic() > deadline:
+                return
+            batch = pending[start:start + self.batch_size]
+            scores = model.predict([(question, text) for _, text in batch], batch_size=self.batch_size)
+            self.cache.put_many(query_key, {chunk_id: float(s) for (chunk_id, _), s in zip(batch, scores)})
+
+    def _submit(self, question: str, result: RetrievalResult) -> Tuple[str, Optional[Future]]:
+        query_key = self._query_key(question)
+        cached = self.cache.get_many(query_key, result.ids)
+        pending = [
+            (chunk_id, doc.page_content)
+            for chunk_id, doc in zip(result.ids, result.documents)
+            if chunk_id not in cached
+        ]
+        if not pending:
+            return query_key, None
+        # Stop burning CPU well after the caller has given up on this request
+        deadline = time.monotonic() + 2 * self.budget
+        return query_key, self._executor.submit(self._score, question, query_key, pending, deadline)
+
+    def _finish(self, result: RetrievalResult, query_key: str, timed_out: bool, started: float) -> RetrievalResult:
+        scores = self.cache.get_many(query_key, result.ids)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        result.timings["rerank"] = elapsed_ms
+
+        if len(scores) < len(result.ids):
+            if timed_out:
+                self.timeouts += 1
+                logger.warning("Rerank exceeded %.0fms budget, keeping retrieval order", self.budget * 1000)
+            ranked = list(zip(result.ids, result.documents))[:self.top_n]
+        else:
+            ranked = sorted(
+                zip(result.ids, result.documents), key=lambda pair: scores[pair[0]], reverse=True
+            )[:self.top_n]
+
+        logger.info("Reranked %d candidates -> %d in %.1fms", len(result.ids), len(ranked), elapsed_ms)
+        return RetrievalResult(
+            documents=[doc for _, doc in ranked],
+            ids=[chunk_id for chunk_id, _ in ranked],
+            mode=result.mode,
+            timings=result.timings
+        )
+
+    def rerank(self, question: str, result: RetrievalResult) -> RetrievalResult:
+        """Rerank retrieval candidates (blocking, at most ``budget_ms``)."""
+        started = time.perf_counter()
+        query_key, future = self._submit(question, result)
+        timed_out = False
+        if future is not None:
+            try:
+                future.result(timeout=self.budget)
+            except FutureTimeout:
+                timed_out = True
+            except Exception as e:
+                logger.error("Rerank failed, keeping retrieval order: %s", e)
+        return self._finish(result, query_key, timed_out, started)
+
+    async def arerank(self, question: str, result: RetrievalResult) -> RetrievalResult:
+        """Rerank retrieval candidates without blocking the event loop (at most ``budget_ms``)."""
+        started = time.perf_counter()
+        query_key, future = self._submit(question, result)
+        timed_out = False
+        if future is not None:
+            try:
+                # shield: a timeout must not cancel the scoring that fills the cache
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.budget)
+            except asyncio.TimeoutError:
+                timed_out = True
+            except Exception as e:
+                logger.error("Rerank failed, keeping retrieval order: %s", e)
+        return self._finish(result, query_key, timed_out, started)
+
+    def warm_up(self) -> Future:
+        """Start loading the model in the background so the first request fits the budget."""
+        return self._executor.submit(self._load_model)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def create_reranker() -> Optional[CrossEncoderReranker]:
+    """Create the reranker from settings, or None when reranking is disabled."""
+    if not settings.RERANK_ENABLED:
+        return None
+    reranker = CrossEncoderReranker(
+        model_name=settings.RERANK_MODEL,
+        candidates=settings.RERANK_CANDIDATES,
+        top_n=settings.RERANK_TOP_N,
+        batch_size=settings.RERANK_BATCH_SIZE,
+        budget_ms=settings.RERANK_BUDGET_MS,
+        cache_size=settings.RERANK_CACHE_SIZE
+    )
+    reranker.warm_up()
+    return reranker
@@ -0,0 +1,215 @@
+"""Dense, sparse (BM25) and hybrid retrieval with reciprocal rank fusion."""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from app.config.settings import settings
+from app.core.executor import blocking_executor
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+
+Ranking = List[Tuple[str, Document]]
+
+
+def build_where(
+    sources: Optional[Iterable[str]] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Chroma metadata filter restricting retrieval to some files and pages.
+
+    Args:
+        sources: Chunk ``source`` values (paths the files were indexed under)
+        page_from: First page, 0-based as the PDF loader numbers them
+        page_to: Last page (inclusive)
+
+    Returns:
+        Optional[Dict]: ``where`` clause, or None when nothing is filtered
+    """
+    clauses: List[Dict[str, Any]] = []
+    if sources:
+        sources = sorted(set(sources))
+        clauses.append({"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}})
+    if page_from is not None:
+        clauses.append({"page": {"$gte": page_from}})
+    if page_to is not None:
+        clauses.append({"page": {"$lte": page_to}})
+    if not clauses:
+        return None
+    # Chroma rejects an $and with a single operand
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def where_key(where: Optional[Dict[str, Any]]) -> str:
+    """Hashable, order-independent form of a ``where`` clause, for cache and coalescing keys."""
+    return json.dumps(where, sort_keys=True) if where else ""
+
+
+def reciprocal_rank_fusion(rankings: List[Ranking], k: int = 60) -> Ranking:
+    """
+    Merge ranked lists by summing 1 / (k + rank) for every list a chunk appears in.
+
+    Args:
+        rankings: Ranked (chunk_id, document) lists, best first
+        k: Damping constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        Fused (chunk_id, document) list, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, (chunk_id, doc) in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(chunk_id, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [(chunk_id, documents[chunk_id]) for chunk_id in ordered]
+
+
+@dataclass
+class RetrievalResult:
+    documents: List[Document]
+    mode: str
+    ids: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> milliseconds
+
+
+class HybridRetriever:
+    """
+    Retrieves chunks by embedding similarity, BM25 keywords, or both.
+
+    Hybrid mode over-fetches ``candidates`` from each retriever and fuses
+    them with reciprocal rank fusion before keeping the top ``k``.
+    """
+
+    def __init__(self, vector_store, k: int = 4, candidates: int = 20, rrf_k: int = 60, default_mode: str = "hybrid"):
+        self.vector_store = vector_store
+        self.k = k
+        self.candidates = max(candidates, k)
+        self.rrf_k = rrf_k
+        self.default_mode = default_mode
+
+    def _resolve_mode(self, mode: Optional[str] = None) -> str:
+        mode = mode or self.default_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Use one of: {', '.join(RETRIEVAL_MODES)}")
+        return mode
+
+    def uses_dense(self, mode: Optional[str] = None) -> bool:
+        """Whether retrieval in ``mode`` needs a query embedding."""
+        return self._resolve_mode(mode) != "sparse"
+
+    @staticmethod
+    def _timed(func, *args) -> Tuple[Ranking, float]:
+        start = time.perf_counter()
+        ranking = func(*args)
+        return ranking, (time.perf_counter() - start) * 1000
+
+    def _finish(self, mode: str, k: int, rankings: Dict[str, Ranking], timings: Dict[str, float]) -> RetrievalResult:
+        if mode == "hybrid":
+            start = time.perf_counter()
+            ranking = reciprocal_rank_fusion([rankings["dense"], rankings["sparse"]], k=self.rrf_k)
+            timings["fusion"] = (time.perf_counter() - start) * 1000
+        else:
+            ranking = rankings[mode]
+        ranking = ranking[:k]
+
+        logger.info("Retrieval (%s): %d chunks | %s", mode, len(ranking),
+                    " ".join(f"{stage}={ms:.1f}ms" for stage, ms in timings.items()))
+        return RetrievalResult(
+            documents=[doc for _, doc in ranking],
+            ids=[chunk_id for chunk_id, _ in ranking],
+            mode=mode,
+            timings=timings
+        )
+
+    def _searches(self, mode: str, k: int, where: Optional[Dict[str, Any]] = None) -> Dict[str, Tuple]:
+        fetch = max(self.candidates, k) if mode == "hybrid" else k
+        searches = {}
+        if mode in ("dense", "hybrid"):
+            searches["dense"] = (self.vector_store.dense_search, fetch)
+        if mode in ("sparse", "hybrid"):
+            searches["sparse"] = (self.vector_store.sparse_search, fetch)
+        if where:
+            searches = {stage: (partial(search, where=where), fetch) for stage, (search, fetch) in searches.items()}
+        return searches
+
+    def retrieve(
+        self,
+        question: str,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> RetrievalResult:
+        """Retrieve chunks for a question (blocking; searches run one after another); ``where`` filters by metadata."""
+        mode = self._resolve_mode(mode)
+        k = k or self.k
+        rankings, timings = {}, {}
+        for stage, (search, fetch) in self._searches(mode, k, where).items():
+            rankings[stage], timings[stage] = self._timed(search, question, fetch)
+        return self._finish(mode, k, rankings, timings)
+
+    async def aretrieve(
+        self,
+        question: str,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        vector: Optional[Awaitable[List[float]]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> RetrievalResult:
+        """
+        Retrieve chunks without blocking the event loop; hybrid searches run concurrently.
+
+        Args:
+            question: User question
+            mode: dense, sparse or hybrid (defaults to the retriever's mode)
+            k: Number of chunks to return
+            vector: Query embedding already being computed elsewhere (a task or
+                future); the dense search awaits it instead of embedding again
+            where: Chroma metadata filter (see ``build_where``) applied to
+                both the dense and the keyword search
+
+        Returns:
+            RetrievalResult: Chunks best first, with per-stage timings in ms
+        """
+        mode = self._resolve_mode(mode)
+        k = k or self.k
+        searches = self._searches(mode, k, where)
+        timings: Dict[str, float] = {}
+
+        async def run(stage: str, search, fetch: int) -> Tuple[Ranking, float]:
+            if stage != "dense":
+                return await blocking_executor.run(self._timed, search, question, fetch)
+            if vector is None:
+                query_vector, timings["embed"] = await blocking_executor.run(
+                    self._timed, self.vector_store.embeddings.embed_query, question
+                )
+            else:
+                query_vector = await vector
+            return await blocking_executor.run(self._timed, search, question, fetch, query_vector)
+
+        results = await asyncio.gather(*(
+            run(stage, search, fetch) for stage, (search, fetch) in searches.items()
+        ))
+        rankings = {}
+        for stage, (ranking, elapsed) in zip(searches, results):
+            rankings[stage], timings[stage] = ranking, elapsed
+        return self._finish(mode, k, rankings, timings)
+
+
+def create_retriever(vector_store) -> HybridRetriever:
+    """Create a HybridRetriever configured from settings."""
+    return HybridRetriever(
+        vector_store,
+        k=settings.RETRIEVAL_TOP_K,
+        candidates=settings.RETRIEVAL_CANDIDATES,
+        rrf_k=settings.RRF_K,
+        default_mode=settings.RETRIEVAL_MODE
+    )
@@ -0,0 +1,154 @@
+"""Speculative retrieval from draft input, so the final question can skip the search."""
+import asyncio
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config.settings import settings
+from app.core.embeddings import normalize_query
+from app.core.logging import get_logger
+from app.core.metrics import DRAFT_PREFETCH_HIT, DRAFT_PREFETCH_MISS
+from app.core.retrieval import RetrievalResult, where_key
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _Prefetch:
+    text: str  # normalized draft
+    mode: Optional[str]
+    filter_key: str  # where_key() of the draft's metadata filter
+    corpus_version: int
+    task: asyncio.Task
+    started: float
+
+
+class DraftPrefetcher:
+    """
+    Per-connection speculative retrieval driven by ``{"type": "draft"}`` messages.
+
+    Drafts are debounced: a search starts only once the input has been
+    stable for ``debounce_ms``, and a newer draft cancels a pending one.
+    Only the latest prefetch is kept. When the final question matches the
+    draft (identical after normalization, or a similarity ratio of at
+    least ``match_threshold``) with the same retrieval mode and metadata
+    filter, against the same corpus version, its
+    candidates are reused, awaiting the search if it is still running.
+    Reranking still uses the final question.
+    """
+
+    def __init__(
+        self,
+        retrieve: Callable[..., Awaitable[RetrievalResult]],
+        corpus_version: Callable[[], int],
+        debounce_ms: float = 250.0,
+        match_threshold: float = 0.9,
+        min_chars: int = 8
+    ):
+        self.retrieve = retrieve
+        self.corpus_version = corpus_version
+        self.debounce = debounce_ms / 1000
+        self.match_threshold = match_threshold
+        self.min_chars = min_chars
+        self._latest: Optional[_Prefetch] = None
+        self.hits = 0
+        self.misses = 0
+
+    def submit(self, draft: str, mode: Optional[str] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """Schedule a debounced search for the current draft."""
+        text = normalize_query(draft)
+        if len(text) < self.min_chars:
+            return
+        filter_key = where_key(where)
+        latest = self._latest
+        if latest is not None and latest.text == text and latest.mode == mode and latest.filter_key == filter_key:
+            return
+        if latest is not None and not latest.task.done():
+            latest.task.cancel()
+        task = asyncio.get_running_loop().create_task(self._search(draft.strip(), mode, where))
+        task.add_done_callback(self._discard_result)
+        self._latest = _Prefetch(text, mode, filter_key, self.corpus_version(), task, time.perf_counter())
+
+    async def _search(self, draft: str, mode: Optional[str], where: Optional[Dict[str, Any]]) -> RetrievalResult:
+        await asyncio.sleep(self.debounce)
+        return await self.retrieve(draft, mode, where=where)
+
+    @staticmethod
+    def _discard_result(task: asyncio.Task) -> None:
+        # Most prefetches are never taken; retrieve their errors so asyncio does not warn
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Speculative retrieval failed: %s", task.exception())
+
+    def _matches(self, prefetch: _Prefetch, text: str, mode: Optional[str], filter_key: str) -> bool:
+        if prefetch.mode != mode or prefetch.filter_key != filter_key:
+            return False
+        if prefetch.corpus_version != self.corpus_version():
+            return False
+        if prefetch.text == text:
+            return True
+        return SequenceMatcher(None, prefetch.text, text).ratio() >= self.match_threshold
+
+    async def take(
+        self, question: str, mode: Optional[str] = None, where: Optional[Dict[str, Any]] = None
+    ) -> Optional[RetrievalResult]:
+        """
+        Prefetched candidates for the final question, if a draft matched.
+
+        Args:
+            question: Final question as sent by the client
+            mode: Retrieval mode of the final question
+            where: Metadata filter of the final question
+
+        Returns:
+            Optional[RetrievalResult]: Candidates to reuse, or None to search normally
+        """
+        prefetch, self._latest = self._latest, None
+        if prefetch is None:
+            return None
+        if not self._matches(prefetch, normalize_query(question), mode, where_key(where)):
+            prefetch.task.cancel()
+            self._miss()
+            return None
+        try:
+            # A prefetch still debouncing has not saved anything yet; search right away instead
+            if not prefetch.task.done() and time.perf_counter() - prefetch.started < self.debounce:
+                prefetch.task.cancel()
+                self._miss()
+                return None
+            result = await prefetch.task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            self._miss()
+            return None
+        except Exception as e:
+            logger.warning("Speculative retrieval failed, searching again: %s", e)
+            self._miss()
+            return None
+        self.hits += 1
+        DRAFT_PREFETCH_HIT.inc()
+        logger.info("Reusing speculative retrieval (%d candidates)", len(result.ids))
+        return result
+
+    def _miss(self) -> None:
+        self.misses += 1
+        DRAFT_PREFETCH_MISS.inc()
+
+    def close(self) -> None:
+        """Cancel any pending prefetch."""
+        if self._latest is not None:
+            self._latest.task.cancel()
+            self._latest = None
+
+
+def create_draft_prefetcher(query_engine, vector_store) -> Optional[DraftPrefetcher]:
+    """Create a per-connection DraftPrefetcher from settings, or None when disabled."""
+    if not settings.DRAFT_PREFETCH_ENABLED:
+        return None
+    return DraftPrefetcher(
+        query_engine.aretrieve_candidates,
+        lambda: vector_store.corpus_version,
+        debounce_ms=settings.DRAFT_DEBOUNCE_MS,
+        match_threshold=settings.DRAFT_MATCH_THRESHOLD,
+        min_chars=settings.DRAFT_MIN_CHARS
+    )
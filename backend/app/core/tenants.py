@@ -0,0 +1,223 @@
+"""Tenant resolution, per-tenant storage layout, quotas and the LRU of open tenant indexes."""
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+from app.config.settings import settings
+from app.core.logging import get_logger
+from app.core.metrics import TENANT_STORE_EVICTIONS, TENANT_STORES_OPEN
+
+logger = get_logger(__name__)
+
+# Also has to fit in a Chroma collection name (3-63 chars, alphanumeric at both ends)
+_TENANT_ID_RE = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9_-]{0,46}[A-Za-z0-9])?$")
+
+
+class InvalidTenant(Exception):
+    """Raised when a request names a malformed tenant ID."""
+
+
+class InvalidApiKey(InvalidTenant):
+    """Raised when TENANT_API_KEYS is configured and a request's API key is missing or unknown."""
+
+
+class TenantQuotaExceeded(Exception):
+    """Raised when an upload would take a tenant past its document or storage quota."""
+
+
+def validate_tenant_id(tenant: str) -> str:
+    if not _TENANT_ID_RE.match(tenant):
+        raise InvalidTenant(
+            "Invalid tenant ID: use 1-48 letters, digits, '-' or '_', starting and ending with a letter or digit"
+        )
+    return tenant
+
+
+def resolve_tenant(api_key: Optional[str] = None, requested: Optional[str] = None) -> str:
+    """
+    Tenant for a request.
+
+    With TENANT_API_KEYS configured the API key decides and is required;
+    otherwise, with TENANTS_ENABLED, the requested tenant is used as given.
+
+    Args:
+        api_key: API key sent by the client, if any
+        requested: Tenant ID from the tenant header, if any
+
+    Returns:
+        str: Tenant ID (DEFAULT_TENANT when multi-tenancy is off or none was named)
+
+    Raises:
+        InvalidTenant: If the API key is missing or unknown, or the tenant ID is malformed
+    """
+    if settings.TENANT_API_KEYS:
+        tenant = settings.TENANT_API_KEYS.get(api_key or "")
+        if tenant is None:
+            raise InvalidApiKey("Missing or unknown API key")
+        return validate_tenant_id(tenant)
+    if not settings.TENANTS_ENABLED or not requested:
+        return settings.DEFAULT_TENANT
+    return validate_tenant_id(requested)
+
+
+def tenant_collection_name(collection_name: str, tenant: str) -> str:
+    """Chroma collection of a tenant; the default tenant keeps the configured collection."""
+    return collection_name if tenant == settings.DEFAULT_TENANT else f"{collection_name}-{tenant}"
+
+
+def tenant_persist_dir(persist_dir: str, tenant: str) -> str:
+    """Directory of a tenant's BM25 index and manifest; the default tenant keeps ``persist_dir``."""
+    return persist_dir if tenant == settings.DEFAULT_TENANT else os.path.join(persist_dir, "tenants", tenant)
+
+
+def tenant_upload_dir(tenant: str) -> Path:
+    """Where a tenant's uploads are saved, so equal filenames from different tenants never collide."""
+    if tenant == settings.DEFAULT_TENANT:
+        return settings.UPLOAD_DIRECTORY
+    directory = settings.UPLOAD_DIRECTORY / "tenants" / tenant
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def open_tenant_store(embeddings, tenant: str, collection_name: str, persist_dir: str, client=None):
+    """
+    Open one tenant's vector store and ingestion manifest.
+
+    Args:
+        embeddings: Embedding model shared by every tenant
+        tenant: Tenant ID
+        collection_name: Collection of the default tenant (others get a suffixed one)
+        persist_dir: Chroma data directory shared by every tenant
+        client: Open Chroma client to reuse
+
+    Returns:
+        (VectorStore, IngestionManifest)
+    """
+    from app.core.manifest import IngestionManifest
+    from app.core.vector_store import VectorStore
+
+    index_dir = tenant_persist_dir(persist_dir, tenant)
+    vector_store = VectorStore(
+        embeddings,
+        tenant_collection_name(collection_name, tenant),
+        persist_dir,
+        index_dir=index_dir,
+        client=client
+    )
+    return vector_store, IngestionManifest(index_dir)
+
+
+def check_quota(tenant: str, documents: int, stored_bytes: int, upload_bytes: int) -> None:
+    """
+    Check that one more document of ``upload_bytes`` fits within the tenant's quotas.
+
+    Args:
+        tenant: Tenant ID, for the error message
+        documents: Documents the tenant already has (indexed or queued)
+        stored_bytes: Their total size
+        upload_bytes: Size of the new upload
+
+    Raises:
+        TenantQuotaExceeded: If the document count or storage quota would be exceeded
+    """
+    if settings.TENANT_MAX_DOCUMENTS and documents + 1 > settings.TENANT_MAX_DOCUMENTS:
+        raise TenantQuotaExceeded(
+            f"Document quota reached for tenant '{tenant}' ({settings.TENANT_MAX_DOCUMENTS} documents)"
+        )
+    limit = settings.TENANT_MAX_STORAGE_MB * 1024 * 1024
+    if limit and stored_bytes + upload_bytes > limit:
+        raise TenantQuotaExceeded(
+            f"Storage quota exceeded for tenant '{tenant}' "
+            f"({(stored_bytes + upload_bytes) / 1024 / 1024:.1f}MB of {settings.TENANT_MAX_STORAGE_MB}MB)"
+        )
+
+
+@dataclass(eq=False)
+class TenantIndex:
+    """One tenant's vector store and manifest, with a query engine over them where queries are served."""
+    tenant: str
+    vector_store: Any
+    manifest: Any
+    query_engine: Any = None
+
+
+class TenantRegistry:
+    """
+    Tenant indexes opened on first use, at most ``max_open`` of them kept in an LRU.
+
+    An evicted index is only dropped by the registry: work still holding it
+    (an ingestion job, a running query) keeps it alive, and asking for the
+    tenant again meanwhile revives that same index instead of opening a
+    second copy over the same files. Tenants in ``keep`` are never evicted.
+    """
+
+    def __init__(self, open_index: Callable[[str], TenantIndex], max_open: int = 32, keep: Iterable[str] = ()):
+        self._open_index = open_index
+        self.max_open = max(1, max_open)
+        self.keep = set(keep)
+        self.evictions = 0
+        self._open: "OrderedDict[str, TenantIndex]" = OrderedDict()
+        self._evicted: "weakref.WeakValueDictionary[str, TenantIndex]" = weakref.WeakValueDictionary()
+        self._opening: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def get_open(self, tenant: str) -> Optional[TenantIndex]:
+        """The tenant's index if it is already in memory, without opening anything."""
+        with self._lock:
+            index = self._open.get(tenant)
+            if index is not None:
+                self._open.move_to_end(tenant)
+                return index
+            index = self._evicted.pop(tenant, None)
+            if index is not None:
+                self._insert(tenant, index)
+            return index
+
+    def get(self, tenant: str) -> TenantIndex:
+        """The tenant's index, opening it if needed (blocking: may load its BM25 index from disk)."""
+        index = self.get_open(tenant)
+        if index is not None:
+            return index
+        with self._lock:
+            opening = self._opening.setdefault(tenant, threading.Lock())
+        # Concurrent first requests for one tenant open it once; other tenants are not held up
+        with opening:
+            index = self.get_open(tenant)
+            if index is not None:
+                return index
+            try:
+                index = self._open_index(tenant)
+            except BaseException:
+                with self._lock:
+                    self._opening.pop(tenant, None)
+                raise
+            with self._lock:
+                self._opening.pop(tenant, None)
+                self._insert(tenant, index)
+            logger.info("Opened index for tenant %s (%d open)", tenant, len(self._open))
+        return index
+
+    def _insert(self, tenant: str, index: TenantIndex) -> None:
+        self._open[tenant] = index
+        self._open.move_to_end(tenant)
+        for candidate in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            if candidate in self.keep or candidate == tenant:
+                continue
+            self._evicted[candidate] = self._open.pop(candidate)
+            self.evictions += 1
+            TENANT_STORE_EVICTIONS.inc()
+            logger.info("Evicted index for tenant %s", candidate)
+        TENANT_STORES_OPEN.set(len(self._open))
+
+    def stats(self) -> Dict[str, int]:
+        return {"open": len(self._open), "max_open": self.max_open, "evictions": self.evictions}
+
@@ -1,4 +1,6 @@
 """Text processing and chunking"""
+from typing import Iterable, Iterator, List
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
@@ -32,3 +34,36 @@ class TextProcessor:
             List: Chunked documents
         """
         return self.text_splitter.split_documents(documents)
+
+    def split_documents_lazy(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Split documents into chunks one input document (page) at a time
+        
+        Args:
+            documents: Iterable of documents, typically a lazy page loader
+        
+        Yields:
+            Document: Next chunk
+        """
+        for document in documents:
+            yield from self.text_splitter.split_documents([document])
+
+    def iter_chunk_batches(self, documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+        """
+        Split documents lazily and group the chunks into fixed-size batches
+        
+        Args:
+            documents: Iterable of documents, typically a lazy page loader
+            batch_size: Number of chunks per batch
+        
+        Yields:
+            List[Document]: Next batch of at most ``batch_size`` chunks
+        """
+        batch = []
+        for chunk in self.split_documents_lazy(documents):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -1,9 +1,13 @@
 """Vector store management using ChromaDB."""
+import time
+import uuid
 import chromadb
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-from typing import List, Any
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.bm25 import BM25Index
 from app.core.logging import get_logger
+from app.core.metrics import CHROMA_QUERY_LATENCY
 
 logger = get_logger(__name__)
 
@@ -14,19 +18,34 @@ class VectorStore:
         self,
         embeddings: Any,
         collection_name: str,
-        persist_dir: str = "./chroma_db"
+        persist_dir: str = "./chroma_db",
+        index_dir: Optional[str] = None,
+        client: Optional[Any] = None
     ):
+        """
+        Args:
+            embeddings: Embedding model for the collection
+            collection_name: Chroma collection holding the chunks
+            persist_dir: Chroma data directory
+            index_dir: Directory of the BM25 index; defaults to ``persist_dir``
+            client: Open Chroma client to share (e.g. between tenants' collections)
+        """
         self.collection_name = collection_name
         self.embeddings = embeddings
         self.persist_directory = persist_dir
+        # Bumped on every write so caches can tell when the corpus changed
+        self.corpus_version = 0
 
-        logger.info("Initializing local ChromaDB", extra={"persist_dir": persist_dir})
-        try:
-            self.chroma_client = chromadb.PersistentClient(path=persist_dir)
-            logger.info("Local ChromaDB initialized successfully")
-        except Exception as e:
-            logger.error("ChromaDB initialization failed: %s", e, exc_info=True)
-            raise
+        if client is not None:
+            self.chroma_client = client
+        else:
+            logger.info("Initializing local ChromaDB", extra={"persist_dir": persist_dir})
+            try:
+                self.chroma_client = chromadb.PersistentClient(path=persist_dir)
+                logger.info("Local ChromaDB initialized successfully")
+            except Exception as e:
+                logger.error("ChromaDB initialization failed: %s", e, exc_info=True)
+                raise
 
         self.collection = self.chroma_client.get_or_create_collection(
             name=collection_name
@@ -38,8 +57,113 @@ class VectorStore:
             embedding_function=embeddings,
         )
 
-    def add_documents(self, documents: List[Document]):
-        return self.vector_store.add_documents(documents)
+        # Keyword index over the same chunk IDs, updated on every write
+        self.sparse_index = BM25Index(index_dir or persist_dir)
+        if self.sparse_index.outdated:
+            self.sparse_index.clear()
+        if not len(self.sparse_index) and self.get_document_count():
+            self._backfill_sparse_index()
+
+    def _backfill_sparse_index(self, batch_size: int = 1000) -> None:
+        """Build the keyword index from the stored chunk texts (new index, or one from an older tokenizer)."""
+        total = self.get_document_count()
+        logger.info("Building BM25 index for %d existing chunks", total)
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(include=["documents"], limit=batch_size, offset=offset)
+            self.sparse_index.add(batch["ids"], batch["documents"])
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None):
+        ids = self.vector_store.add_documents(documents, ids=ids)
+        self.sparse_index.add(ids, [doc.page_content for doc in documents])
+        self.corpus_version += 1
+        return ids
+
+    def add_embedded_documents(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Write documents whose vectors were computed ahead of time, in one upsert."""
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata or None for doc in documents]
+        )
+        self.sparse_index.add(ids, [doc.page_content for doc in documents])
+        self.corpus_version += 1
+        return ids
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks by ID."""
+        if ids:
+            self.collection.delete(ids=ids)
+            self.sparse_index.remove(ids)
+            self.corpus_version += 1
+
+    def delete_where(self, where: Dict[str, Any]) -> None:
+        """Delete chunks matching a metadata filter."""
+        # Resolve IDs first so the keyword index can drop the same chunks
+        self.delete(self.collection.get(where=where, include=[])["ids"])
+
+    def dense_search(
+        self,
+        query: str,
+        k: int = 4,
+        vector: Optional[List[float]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, Document]]:
+        """
+        Nearest chunks by embedding similarity, as (chunk_id, document) pairs.
+
+        Args:
+            query: Query text
+            k: Number of chunks to return
+            vector: Query embedding computed ahead of time (skips embedding)
+            where: Chroma metadata filter; only matching chunks are searched
+        """
+        if not self.get_document_count():
+            return []
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+        start = time.perf_counter()
+        result = self.collection.query(
+            query_embeddings=[vector],
+            n_results=k,
+            where=where or None,
+            include=["documents", "metadatas"]
+        )
+        CHROMA_QUERY_LATENCY.observe(time.perf_counter() - start)
+        return [
+            (chunk_id, Document(page_content=text, metadata=metadata or {}))
+            for chunk_id, text, metadata in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0]
+            )
+        ]
+
+    def sparse_search(self, query: str, k: int = 4, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Document]]:
+        """Best BM25 keyword matches, as (chunk_id, document) pairs; ``where`` restricts them by metadata."""
+        allowed = None
+        if where:
+            # The keyword index holds no metadata: resolve the matching chunk IDs in Chroma first
+            allowed = self.collection.get(where=where, include=[])["ids"]
+            if not allowed:
+                return []
+        hits = [chunk_id for chunk_id, _ in self.sparse_index.search(query, k, ids=allowed)]
+        return self.get_by_ids(hits)
+
+    def get_by_ids(self, ids: List[str]) -> List[Tuple[str, Document]]:
+        """Fetch chunks by ID, preserving the order of ``ids``."""
+        if not ids:
+            return []
+        result = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        found = {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+        return [(chunk_id, found[chunk_id]) for chunk_id in ids if chunk_id in found]
 
     def as_retriever(self, k: int = 4):
         return self.vector_store.as_retriever(search_kwargs={"k": k})
@@ -69,6 +193,8 @@ class VectorStore:
                 collection_name=self.collection_name,
                 embedding_function=self.embeddings
             )
+            self.sparse_index.clear()
+            self.corpus_version += 1
             logger.info("Collection cleared and re-initialized")
         except Exception as e:
             logger.error("Error clearing documents: %s", e, exc_info=True)
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""Progress tracking for loading heavy components after the server has bound."""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Sequence
+
+
+class EngineNotReady(Exception):
+    """Raised when a request needs a component that is still warming up (or failed to)."""
+
+
+@dataclass
+class ComponentStatus:
+    name: str
+    state: str = "pending"  # pending | loading | ready | failed
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        end = self.finished_at or time.perf_counter()
+        return {
+            "state": self.state,
+            "elapsed_ms": round((end - self.started_at) * 1000, 1) if self.started_at else None,
+            "error": self.error,
+        }
+
+
+class WarmupTracker:
+    """
+    Per-component warm-up state, written by the loading thread and read by health checks.
+
+    Components are listed up front so progress can be reported before any
+    of them has started loading.
+    """
+
+    def __init__(self, components: Sequence[str]):
+        self.components: Dict[str, ComponentStatus] = {name: ComponentStatus(name) for name in components}
+        self._created = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mark ``name`` loading for the duration of the block, then ready (or failed if it raises)."""
+        with self._lock:
+            status = self.components.setdefault(name, ComponentStatus(name))
+            status.state, status.started_at = "loading", time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            status.state, status.error = "failed", f"{type(e).__name__}: {e}"
+            raise
+        else:
+            status.state = "ready"
+        finally:
+            status.finished_at = time.perf_counter()
+
+    @property
+    def ready(self) -> bool:
+        return all(status.state == "ready" for status in self.components.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(status.state == "failed" for status in self.components.values())
+
+    def summary(self) -> str:
+        """One-line progress, e.g. for error messages."""
+        done = sum(status.state == "ready" for status in self.components.values())
+        if self.failed:
+            return "Warm-up failed; see /health/ready"
+        return f"Models are still loading ({done}/{len(self.components)} components ready), try again shortly"
+
+    def progress(self) -> Dict:
+        with self._lock:
+            components = {name: status.to_dict() for name, status in self.components.items()}
+        return {
+            "ready": self.ready,
+            "components_ready": sum(c["state"] == "ready" for c in components.values()),
+            "components_total": len(components),
+            "since_start_ms": round((time.perf_counter() - self._created) * 1000, 1),
+            "components": components,
+        }
@@ -1,4 +1,6 @@
 """FastAPI application entry point."""
+import asyncio
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.exceptions import RequestValidationError
@@ -8,11 +10,17 @@ from slowapi.middleware import SlowAPIMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.config.settings import settings
 from app.config.cors import setup_cors
-from app.routes import health, documents, chat, websocket
+from app.routes import health, documents, chat, websocket, metrics
 from app.core.logging import setup_logging, get_logger, generate_request_id, request_id_var
 from app.core.rate_limiter import limiter
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.executor import blocking_executor
 from app.middleware import ExceptionMiddleware
-from app.middleware.exceptions import http_exception_handler, validation_exception_handler
+from app.middleware.exceptions import (
+    engine_not_ready_handler, http_exception_handler, invalid_tenant_handler, validation_exception_handler
+)
+from app.core.tenants import InvalidTenant
+from app.core.warmup import EngineNotReady
 
 # Initialize logging BEFORE anything else
 setup_logging(settings.LOG_LEVEL)
@@ -35,6 +43,7 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
 
 async def _rate_limit_handler(request: Request, exc: RateLimitExceeded):
     """Return 429 with a JSON body when rate limit is exceeded."""
+    RATE_LIMIT_REJECTIONS.inc()
     from fastapi.responses import JSONResponse
     return JSONResponse(
         status_code=429,
@@ -42,12 +51,34 @@ async def _rate_limit_handler(request: Request, exc: RateLimitExceeded):
     )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop process-wide background resources."""
+    from app.services.rag_service import rag_service
+    from app.services.ingestion_service import ingestion_pipeline
+    from app.services.warmup_service import warm_up
+    from app.core.conversation import conversation_manager
+
+    # Models load after the server binds; /health/ready reports progress meanwhile
+    warmup_task = asyncio.create_task(warm_up())
+    conversation_manager.start_sweeper(settings.CONVERSATION_SWEEP_INTERVAL_SECONDS)
+    yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    await ingestion_pipeline.stop()
+    if rag_service.ready:
+        await rag_service.aclose()
+    await conversation_manager.aclose()
+    blocking_executor.shutdown(wait=False)
+
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application"""
     app = FastAPI(
         title=settings.APP_TITLE,
         description=settings.APP_DESCRIPTION,
-        version=settings.APP_VERSION
+        version=settings.APP_VERSION,
+        lifespan=lifespan
     )
 
     # Rate limiter state
@@ -65,12 +96,15 @@ def create_app() -> FastAPI:
     app.add_exception_handler(HTTPException, http_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(RateLimitExceeded, _rate_limit_handler)
+    app.add_exception_handler(EngineNotReady, engine_not_ready_handler)
+    app.add_exception_handler(InvalidTenant, invalid_tenant_handler)
 
     # Include routers
     app.include_router(health.router)
     app.include_router(documents.router)
     app.include_router(chat.router)
     app.include_router(websocket.router)
+    app.include_router(metrics.router)
 
     logger.info(
         "App created | env=%s | model=%s",
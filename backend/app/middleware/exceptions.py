@@ -3,6 +3,8 @@ from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from app.core.logging import get_logger
+from app.core.tenants import InvalidApiKey, InvalidTenant
+from app.core.warmup import EngineNotReady
 
 logger = get_logger(__name__)
 
@@ -22,6 +24,32 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+async def engine_not_ready_handler(request: Request, exc: EngineNotReady):
+    """Return 503 while models are still warming up, so clients retry instead of failing."""
+    logger.info("Not ready for %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": "Service is warming up",
+            "detail": str(exc),
+        },
+        headers={"Retry-After": "5"},
+    )
+
+
+async def invalid_tenant_handler(request: Request, exc: InvalidTenant):
+    """Return 401 for a missing or unknown API key, 400 for a malformed tenant ID."""
+    status_code = 401 if isinstance(exc, InvalidApiKey) else 400
+    logger.warning("Rejected %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": "Unauthorized" if status_code == 401 else "Invalid tenant",
+            "detail": str(exc),
+        },
+    )
+
+
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle Pydantic validation errors with readable messages."""
     errors = exc.errors()
@@ -1,6 +1,32 @@
 """Pydantic models for request/response validation."""
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+
+class RetrievalFilters(BaseModel):
+    """Restricts retrieval to some uploaded files and/or a page range."""
+    sources: Optional[List[str]] = Field(
+        default=None,
+        min_length=1,
+        max_length=50,
+        description="Only search these uploaded files (names as uploaded)"
+    )
+    page_from: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="First page to search (1-based; only paged formats such as PDF have pages)"
+    )
+    page_to: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Last page to search (inclusive)"
+    )
+
+    @model_validator(mode="after")
+    def check_page_range(self) -> "RetrievalFilters":
+        if self.page_from is not None and self.page_to is not None and self.page_from > self.page_to:
+            raise ValueError("page_from must not be greater than page_to")
+        return self
 
 
 class ChatMessage(BaseModel):
@@ -16,6 +42,14 @@ class ChatMessage(BaseModel):
         max_length=64,
         description="Conversation ID for memory tracking"
     )
+    retrieval_mode: Optional[Literal["dense", "sparse", "hybrid"]] = Field(
+        default=None,
+        description="Retrieval mode: dense, sparse (BM25) or hybrid; server default if omitted"
+    )
+    filters: Optional[RetrievalFilters] = Field(
+        default=None,
+        description="Restrict retrieval to some files and pages"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -2,8 +2,11 @@
 import uuid
 from fastapi import APIRouter, HTTPException, Request
 from app.models.schemas import ChatMessage, ChatResponse
-from app.services.document_service import query_documents
+from app.services.document_service import aquery_documents, build_filter
+from app.services.tenant_service import get_tenant
 from app.core.rate_limiter import limiter
+from app.core.tenants import InvalidTenant
+from app.core.warmup import EngineNotReady
 
 router = APIRouter(tags=["Chat"])
 
@@ -13,9 +16,14 @@ router = APIRouter(tags=["Chat"])
 async def chat(request: Request, message: ChatMessage):
     """Chat endpoint (non-streaming) with conversation memory and rate limiting."""
     try:
-        result = query_documents(
+        tenant = get_tenant(request)
+        where = build_filter(tenant=tenant, **message.filters.model_dump()) if message.filters else None
+        result = await aquery_documents(
             message.message,
-            conversation_id=message.conversation_id
+            conversation_id=message.conversation_id,
+            retrieval_mode=message.retrieval_mode,
+            tenant=tenant,
+            where=where
         )
         
         return ChatResponse(
@@ -24,5 +32,7 @@ async def chat(request: Request, message: ChatMessage):
             conversation_id=result.get('conversation_id', message.conversation_id or str(uuid.uuid4()))
         )
     
+    except (EngineNotReady, InvalidTenant):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,43 +1,61 @@
 """Document routes - upload, status, count, delete."""
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from app.models.schemas import DocumentUploadResponse
-from app.services.file_service import save_uploaded_file
-from app.services.document_service import process_document, get_document_count, clear_all_documents
+from app.services.file_service import commit_upload, discard_upload, save_uploaded_file
+from app.services.document_service import get_document_count, clear_all_documents, delete_document
+from app.services.ingestion_service import ingestion_pipeline
+from app.services.rag_service import rag_service
+from app.services.tenant_service import check_upload_quota, get_tenant
+from app.core.executor import blocking_executor
+from app.core.ingestion import DuplicateContent, IngestionQueueFull
 from app.core.rate_limiter import limiter
+from app.core.tenants import InvalidTenant, TenantQuotaExceeded, tenant_upload_dir
+from app.core.warmup import EngineNotReady
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="", tags=["Documents"])
 
-# Track processing status
-processing_status: dict = {}
-
-
-def process_in_background(file_path: str, filename: str):
-    """Background task to process document."""
-    try:
-        processing_status[filename] = {"status": "processing", "chunks": 0}
-        chunks_created = process_document(str(file_path))
-        processing_status[filename] = {"status": "success", "chunks": chunks_created}
-        logger.info("Document processed: %s → %d chunks", filename, chunks_created)
-    except Exception as e:
-        processing_status[filename] = {"status": "error", "error": str(e)}
-        logger.error("Document processing failed: %s: %s", filename, e, exc_info=True)
-
-
 @router.post("/upload", response_model=DocumentUploadResponse)
 @limiter.limit("5/minute")
-async def upload_document(
-    request: Request,
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks()
-):
-    """Upload document and process in background."""
+async def upload_document(request: Request, file: UploadFile = File(...)):
+    """Upload document into the caller's tenant and queue it on the ingestion pipeline."""
     try:
-        file_path = await save_uploaded_file(file)
-        processing_status[file.filename] = {"status": "processing", "chunks": 0}
-        background_tasks.add_task(process_in_background, str(file_path), file.filename)
+        tenant = get_tenant(request)
+        index = await rag_service.atenant(tenant)
+        saved = await save_uploaded_file(file, tenant_upload_dir(tenant))
+        file_path = saved.path
+        # Until the job is queued the upload stays in its temp file: a rejected
+        # re-upload must not replace (or delete) the indexed file of that name
+        try:
+            # Duplicates are skipped without storing anything, so they never count against quotas
+            if ingestion_pipeline.find_duplicate(saved.sha256, index) is None:
+                await check_upload_quota(index, str(file_path), saved.size)
+            job = ingestion_pipeline.submit(str(file_path), file.filename, saved.sha256, index, saved.size)
+            if job.status != "duplicate":
+                # No await since submit(), so the parse stage cannot have opened the path yet
+                try:
+                    commit_upload(saved)
+                except OSError as e:
+                    job.fail(e)
+                    raise
+        except DuplicateContent as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except IngestionQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except TenantQuotaExceeded as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            discard_upload(saved)
+
+        if job.status == "duplicate":
+            return DocumentUploadResponse(
+                filename=file.filename,
+                status="duplicate",
+                chunks_created=0,
+                message="This file is already indexed with identical content, skipped."
+            )
 
         return DocumentUploadResponse(
             filename=file.filename,
@@ -46,31 +64,55 @@ async def upload_document(
             message="File uploaded, processing in background..."
         )
 
-    except HTTPException:
+    except (HTTPException, EngineNotReady, InvalidTenant):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/documents/status")
+@limiter.limit("60/minute")
+async def ingestion_status(request: Request):
+    """Per-stage ingestion progress and the status of the tenant's recent jobs."""
+    return ingestion_pipeline.status(get_tenant(request))
+
+
 @router.get("/documents/status/{filename}")
 @limiter.limit("60/minute")
 async def document_status(request: Request, filename: str):
     """Poll processing status of a document."""
-    status = processing_status.get(filename, {"status": "unknown"})
-    return status
+    job = ingestion_pipeline.find_job(filename, get_tenant(request))
+    return job.to_dict() if job else {"status": "unknown"}
 
 
 @router.get("/documents/count")
-async def document_count():
-    count = get_document_count()
+async def document_count(request: Request):
+    count = await blocking_executor.run(get_document_count, get_tenant(request))
     return {"count": count}
 
 
 @router.delete("/documents")
-async def clear_documents():
+async def clear_documents(request: Request):
+    """Clear the caller's tenant; other tenants' documents are untouched."""
     try:
-        clear_all_documents()
-        processing_status.clear()
+        tenant = get_tenant(request)
+        await blocking_executor.run(clear_all_documents, tenant)
+        ingestion_pipeline.clear_finished(tenant)
         return {"status": "success", "message": "All documents cleared"}
+    except (EngineNotReady, InvalidTenant):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/documents/{filename}")
+async def remove_document(request: Request, filename: str):
+    """Delete one document of the caller's tenant: its chunks, manifest entry and uploaded file."""
+    try:
+        if not await blocking_executor.run(delete_document, filename, get_tenant(request)):
+            raise HTTPException(status_code=404, detail=f"Document not found: {filename}")
+        return {"status": "success", "message": f"Deleted {filename}"}
+    except (HTTPException, EngineNotReady, InvalidTenant):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
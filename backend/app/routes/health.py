@@ -2,7 +2,11 @@
 from fastapi import APIRouter
 from app.config.settings import settings
 from app.services.document_service import get_document_count
+from app.services.rag_service import RAGService, rag_service
+from app.core.embeddings import query_embedding_cache
+from app.core.executor import blocking_executor
 from app.core.logging import get_logger
+from app.core.rate_limiter import limiter
 
 logger = get_logger(__name__)
 
@@ -20,6 +24,7 @@ async def root():
 
 
 @router.get("/health")
+@limiter.exempt
 async def health_check():
     """Liveness check — returns healthy if app is up."""
     return {
@@ -30,16 +35,32 @@ async def health_check():
 
 
 @router.get("/health/ready")
+@limiter.exempt
 async def readiness_check():
     """
-    Readiness check — verifies backend dependencies are reachable.
-    Returns 503 if any dependency is unhealthy.
+    Readiness check — verifies models are loaded and backend dependencies are reachable.
+    Returns 503 with per-component warm-up progress until everything is loaded,
+    and 503 if any dependency is unhealthy.
     """
+    from fastapi.responses import JSONResponse
+
+    warmup = RAGService.warmup.progress()
+    if not warmup["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "failed" if RAGService.warmup.failed else "warming_up",
+                "model": settings.GROQ_MODEL,
+                "warmup": warmup,
+            },
+            headers={"Retry-After": "5"},
+        )
+
     checks = {}
 
     # Check ChromaDB
     try:
-        doc_count = get_document_count()
+        doc_count = await blocking_executor.run(get_document_count)
         checks["chromadb"] = {"status": "ok", "documents_indexed": doc_count}
     except Exception as e:
         logger.error("Readiness: ChromaDB check failed: %s", e)
@@ -49,14 +70,22 @@ async def readiness_check():
     groq_ok = bool(settings.GROQ_API_KEY and len(settings.GROQ_API_KEY) > 10)
     checks["groq_api"] = {"status": "ok" if groq_ok else "error"}
 
+    # Blocking pool saturation is reported but never fails readiness
+    checks["blocking_pool"] = {"status": "ok", **blocking_executor.stats()}
+    checks["query_embedding_cache"] = {"status": "ok", **query_embedding_cache.stats()}
+    checks["tenant_stores"] = {"status": "ok", **rag_service.tenants.stats()}
+    chunk_cache = getattr(rag_service.embeddings, "document_cache", None)
+    if chunk_cache is not None:
+        checks["chunk_embedding_cache"] = {"status": "ok", **chunk_cache.stats()}
+
     all_ok = all(c["status"] == "ok" for c in checks.values())
 
-    from fastapi.responses import JSONResponse
     return JSONResponse(
         status_code=200 if all_ok else 503,
         content={
             "status": "ready" if all_ok else "not_ready",
             "model": settings.GROQ_MODEL,
             "checks": checks,
+            "warmup": warmup,
         }
     )
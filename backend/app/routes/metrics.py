@@ -0,0 +1,59 @@
+"""Prometheus metrics endpoint."""
+from typing import Dict, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.rag_service import rag_service
+from app.services.ingestion_service import ingestion_pipeline
+from app.utils.websocket_manager import manager
+from app.core.conversation import conversation_manager
+from app.core.embeddings import query_embedding_cache
+from app.core.metrics import (
+    REGISTRY, Counter, INGEST_QUEUE_DEPTH, LIVE_CONVERSATIONS, WEBSOCKET_CONNECTIONS
+)
+from app.core.rate_limiter import limiter
+
+router = APIRouter(tags=["Metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # charset=utf-8 is appended by the response
+
+
+def _caches() -> Dict[str, object]:
+    caches = {"query_embedding": query_embedding_cache}
+    if not rag_service.ready:
+        return caches
+    chunk_cache = getattr(rag_service.embeddings, "document_cache", None)
+    if chunk_cache is not None:
+        caches["chunk_embedding"] = chunk_cache
+    if rag_service.answer_cache is not None:
+        caches["answer"] = rag_service.answer_cache
+    return caches
+
+
+def _cache_hits() -> Dict[Tuple[str, ...], float]:
+    hits = {(name,): cache.hits for name, cache in _caches().items()}
+    if rag_service.ready and rag_service.stream_coalescer is not None:
+        # A request that joined an in-flight identical answer is a hit on the coalescer
+        hits[("coalesced_stream",)] = rag_service.stream_coalescer.joined
+    return hits
+
+
+def _cache_misses() -> Dict[Tuple[str, ...], float]:
+    misses = {(name,): cache.misses for name, cache in _caches().items()}
+    if rag_service.ready and rag_service.stream_coalescer is not None:
+        misses[("coalesced_stream",)] = rag_service.stream_coalescer.started
+    return misses
+
+
+# Existing running totals and sizes are read at scrape time rather than mirrored
+Counter("rag_cache_hits_total", "Cache hits by cache", labelnames=("cache",), function=_cache_hits)
+Counter("rag_cache_misses_total", "Cache misses by cache", labelnames=("cache",), function=_cache_misses)
+WEBSOCKET_CONNECTIONS.set_function(manager.get_connection_count)
+INGEST_QUEUE_DEPTH.set_function(ingestion_pipeline.queue_depth)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+@limiter.exempt
+async def metrics():
+    """Metrics in the Prometheus text exposition format."""
+    LIVE_CONVERSATIONS.set(await conversation_manager.store.count())
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
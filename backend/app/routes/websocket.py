@@ -1,19 +1,46 @@
 """WebSocket endpoint for streaming chat."""
 import json
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from app.config.settings import settings
+from app.models.schemas import RetrievalFilters
 from app.utils.websocket_manager import manager
-from app.services.document_service import query_documents_stream, get_document_count
+from app.services.document_service import (
+    build_filter, create_prefetcher, query_documents_stream, get_document_count
+)
+from app.services.rag_service import rag_service
+from app.services.tenant_service import get_tenant
+from app.core.executor import blocking_executor
+from app.core.retrieval import RETRIEVAL_MODES
 from app.core.logging import get_logger
+from app.core.tenants import InvalidTenant
+from app.core.warmup import EngineNotReady
 
 logger = get_logger(__name__)
 
 router = APIRouter(tags=["WebSocket"])
 
 
+def parse_filters(message_data: Dict, tenant: str) -> Optional[Dict[str, Any]]:
+    """Metadata filter of a message's ``filters`` object; raises ValidationError if it is malformed."""
+    filters = message_data.get("filters")
+    if not filters:
+        return None
+    return build_filter(tenant=tenant, **RetrievalFilters.model_validate(filters).model_dump())
+
+
 @router.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
     """WebSocket endpoint for real-time streaming chat"""
+    try:
+        tenant = get_tenant(websocket)
+    except InvalidTenant as e:
+        # Refuse the handshake (policy violation) before the connection is accepted
+        await websocket.close(code=1008, reason=str(e))
+        return
     await manager.connect(websocket)
+    prefetcher = None
     
     try:
         while True:
@@ -21,14 +48,31 @@ async def websocket_chat(websocket: WebSocket):
                 # Receive message from client
                 data = await websocket.receive_text()
                 message_data = json.loads(data)
+
+                # Connections opened during warm-up get their prefetcher once the engine is ready
+                if prefetcher is None and rag_service.ready:
+                    prefetcher = await create_prefetcher(tenant)
                 
                 # Handle heartbeat ping
                 if message_data.get("type") == "ping":
                     await websocket.send_json({"type": "pong"})
                     continue
+
+                # Partial input while the user types: prefetch retrieval, no reply
+                if message_data.get("type") == "draft":
+                    draft_mode = message_data.get("retrieval_mode")
+                    if prefetcher is not None and draft_mode in (None, *RETRIEVAL_MODES):
+                        try:
+                            draft_where = parse_filters(message_data, tenant)
+                        except ValidationError:
+                            continue
+                        prefetcher.submit(message_data.get("message", ""), draft_mode, draft_where)
+                    continue
                 
                 question = message_data.get("message", "")
                 conversation_id = message_data.get("conversation_id")
+                retrieval_mode = message_data.get("retrieval_mode")
+                send_timings = bool(message_data.get("timings", settings.STREAM_TIMINGS_ENABLED))
                 logger.info("Received question via WebSocket: %s (conv=%s)",
                           question[:100], conversation_id or "new")
                 
@@ -38,22 +82,56 @@ async def websocket_chat(websocket: WebSocket):
                         "content": "No message provided"
                     })
                     continue
+
+                if retrieval_mode is not None and retrieval_mode not in RETRIEVAL_MODES:
+                    await websocket.send_json({
+                        "type": "error",
+                        "content": f"Invalid retrieval_mode. Use one of: {', '.join(RETRIEVAL_MODES)}"
+                    })
+                    continue
+
+                try:
+                    where = parse_filters(message_data, tenant)
+                except ValidationError as e:
+                    await websocket.send_json({
+                        "type": "error",
+                        "content": "Invalid filters: " + "; ".join(
+                            f"{'.'.join(str(part) for part in error['loc']) or 'filters'}: {error['msg']}"
+                            for error in e.errors()
+                        )
+                    })
+                    continue
                 
                 # Check if there are documents
-                if get_document_count() == 0:
+                if await blocking_executor.run(get_document_count, tenant) == 0:
                     await websocket.send_json({
                         "type": "info",
                         "content": "No documents uploaded yet. Please upload documents first to use RAG features."
                     })
                     continue
                 
+                # Reuse retrieval already done for a matching draft
+                candidates = await prefetcher.take(question, retrieval_mode, where) if prefetcher is not None else None
+
                 # Stream response with conversation memory
-                async for chunk in query_documents_stream(question, conversation_id=conversation_id):
+                async for chunk in query_documents_stream(
+                    question, conversation_id=conversation_id, retrieval_mode=retrieval_mode,
+                    candidates=candidates, tenant=tenant, where=where
+                ):
+                    if chunk.get("type") == "timings" and not send_timings:
+                        continue
                     await websocket.send_json(chunk)
                 
                 logger.debug("Streaming complete, connection staying open")
                 continue
                 
+            except EngineNotReady as e:
+                await websocket.send_json({
+                    "type": "info",
+                    "content": str(e)
+                })
+                continue
+
             except json.JSONDecodeError as e:
                 logger.warning("Invalid JSON received: %s", e)
                 await websocket.send_json({
@@ -83,9 +161,14 @@ async def websocket_chat(websocket: WebSocket):
                 continue
     
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     
     except Exception as e:
         logger.error("WebSocket fatal error: %s: %s",
                     type(e).__name__, str(e), exc_info=True)
+
+    finally:
+        # Every exit path, including a disconnect seen mid-message, must unregister
         manager.disconnect(websocket)
+        if prefetcher is not None:
+            prefetcher.close()
@@ -1,86 +1,179 @@
 """Document service - Document processing and RAG operations."""
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from app.config.settings import settings
 from app.services.rag_service import rag_service
+from app.services.file_service import delete_file, sanitize_filename
 from app.core.conversation import conversation_manager
+from app.core.retrieval import RetrievalResult, build_where
+from app.core.speculative import DraftPrefetcher, create_draft_prefetcher
+from app.core.tenants import tenant_upload_dir
 
 
-def process_document(file_path: str) -> int:
+def process_document(file_path: str, tenant: Optional[str] = None) -> int:
     """
     Process document and add to vector store.
     
     Args:
         file_path: Path to document
+        tenant: Tenant the document belongs to (default tenant if None)
     
     Returns:
         int: Number of chunks created
     """
-    return rag_service.process_document(file_path)
+    return rag_service.process_document(file_path, tenant=tenant)
 
 
-def get_document_count() -> int:
+def get_document_count(tenant: Optional[str] = None) -> int:
     """
     Get count of indexed documents.
     
+    Args:
+        tenant: Tenant to count for (default tenant if None)
+    
     Returns:
         int: Number of documents
     """
-    return rag_service.get_document_count()
+    return rag_service.get_document_count(tenant)
+
 
+def clear_all_documents(tenant: Optional[str] = None):
+    """Clear all documents of one tenant from vector store (default tenant if None)."""
+    rag_service.clear_documents(tenant)
 
-def clear_all_documents():
-    """Clear all documents from vector store."""
-    rag_service.clear_documents()
+
+def delete_document(filename: str, tenant: Optional[str] = None) -> bool:
+    """
+    Delete one uploaded document, its chunks and its manifest entry.
+    
+    Args:
+        filename: Name the document was uploaded under
+        tenant: Tenant the document belongs to (default tenant if None)
+    
+    Returns:
+        bool: False if the tenant had no such document indexed
+    """
+    file_path = tenant_upload_dir(tenant or settings.DEFAULT_TENANT) / sanitize_filename(filename)
+    deleted = rag_service.delete_document(str(file_path), tenant)
+    delete_file(file_path)
+    return deleted
+
+
+def build_filter(
+    sources: Optional[List[str]] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None,
+    tenant: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the metadata filter of a chat request.
+    
+    Args:
+        sources: Names the files were uploaded under
+        page_from: First page to search (1-based)
+        page_to: Last page to search (inclusive)
+        tenant: Tenant the files belong to (default tenant if None)
+    
+    Returns:
+        Optional[Dict]: Chroma ``where`` clause, or None when nothing is filtered
+    """
+    directory = tenant_upload_dir(tenant or settings.DEFAULT_TENANT)
+    # Chunks are indexed under the path the upload was saved to, with 0-based pages
+    return build_where(
+        [str(directory / sanitize_filename(name)) for name in sources or ()],
+        page_from - 1 if page_from is not None else None,
+        page_to - 1 if page_to is not None else None
+    )
 
 
-async def query_documents_stream(question: str, conversation_id: Optional[str] = None):
+async def create_prefetcher(tenant: Optional[str] = None) -> Optional[DraftPrefetcher]:
+    """
+    Create a speculative-retrieval prefetcher for one WebSocket connection.
+    
+    Args:
+        tenant: Tenant whose documents are searched (default tenant if None)
+    
+    Returns:
+        Optional[DraftPrefetcher]: None when draft prefetching is disabled
+    """
+    index = await rag_service.atenant(tenant)
+    return create_draft_prefetcher(index.query_engine, index.vector_store)
+
+
+async def query_documents_stream(
+    question: str,
+    conversation_id: Optional[str] = None,
+    retrieval_mode: Optional[str] = None,
+    candidates: Optional[RetrievalResult] = None,
+    tenant: Optional[str] = None,
+    where: Optional[Dict[str, Any]] = None
+):
     """
     Query documents with streaming response and conversation memory.
     
     Args:
         question: User question
         conversation_id: Optional conversation ID for history tracking
+        retrieval_mode: dense, sparse or hybrid (defaults to settings)
+        candidates: Retrieval results prefetched from a draft of this question
+        tenant: Tenant whose documents are searched (default tenant if None)
+        where: Metadata filter from ``build_filter``
     
     Yields:
         Dict: Streaming response chunks
     """
     # Get or create conversation
-    conv = conversation_manager.get_or_create(conversation_id)
-    conv.add_user_message(question)
-    chat_history = conv.get_history_text()
+    conv = await conversation_manager.get_or_create(conversation_id)
+    chat_history = rag_service.history_compactor.render(conv)
+    await conversation_manager.add_user_message(conv, question)
 
     # Yield the established conversation_id first so the client can reuse it
     yield {"type": "conversation_id", "content": conv.id}
 
     full_response = ""
-    async for chunk in rag_service.query_stream(question, chat_history=chat_history):
+    async for chunk in rag_service.query_stream(
+        question, chat_history=chat_history, mode=retrieval_mode, candidates=candidates, tenant=tenant, where=where
+    ):
         if chunk.get("type") == "done":
             full_response = chunk.get("content", "")
         yield chunk
 
-    # Save assistant response to history
+    # Save assistant response to history, then fold older turns into the summary
     if full_response:
-        conv.add_assistant_message(full_response)
+        await conversation_manager.add_assistant_message(conv, full_response)
+        rag_service.history_compactor.schedule(conv)
 
 
-def query_documents(question: str, conversation_id: Optional[str] = None) -> dict:
+async def aquery_documents(
+    question: str,
+    conversation_id: Optional[str] = None,
+    retrieval_mode: Optional[str] = None,
+    tenant: Optional[str] = None,
+    where: Optional[Dict[str, Any]] = None
+) -> dict:
     """
-    Query documents (non-streaming) with conversation memory.
+    Query documents (non-streaming) with conversation memory, off the event loop.
     
     Args:
         question: User question
         conversation_id: Optional conversation ID for history tracking
+        retrieval_mode: dense, sparse or hybrid (defaults to settings)
+        tenant: Tenant whose documents are searched (default tenant if None)
+        where: Metadata filter from ``build_filter``
     
     Returns:
         dict: Answer, sources, and conversation_id
     """
-    conv = conversation_manager.get_or_create(conversation_id)
-    conv.add_user_message(question)
-    chat_history = conv.get_history_text()
+    conv = await conversation_manager.get_or_create(conversation_id)
+    chat_history = rag_service.history_compactor.render(conv)
+    await conversation_manager.add_user_message(conv, question)
 
-    result = rag_service.query(question, chat_history=chat_history)
+    result = await rag_service.aquery(
+        question, chat_history=chat_history, mode=retrieval_mode, tenant=tenant, where=where
+    )
 
-    # Save assistant response to history
-    conv.add_assistant_message(result["answer"])
+    # Save assistant response to history, then fold older turns into the summary
+    await conversation_manager.add_assistant_message(conv, result["answer"])
+    rag_service.history_compactor.schedule(conv)
 
     result["conversation_id"] = conv.id
     return result
@@ -1,10 +1,17 @@
 """File service - Handle file upload, validation, and storage."""
+import hashlib
+import os
 import re
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 from fastapi import UploadFile, HTTPException
 from app.config.settings import settings
 from app.utils.validators import validate_file_extension, validate_file_size
+from app.core.executor import blocking_executor
 from app.core.logging import get_logger
+from app.core.metrics import UPLOAD_SIZE
 
 logger = get_logger(__name__)
 
@@ -36,15 +43,72 @@ def sanitize_filename(filename: str) -> str:
     return name
 
 
-async def save_uploaded_file(file: UploadFile) -> Path:
+@dataclass
+class SavedFile:
     """
-    Save uploaded file to disk with validation.
+    An upload written to disk, with its size and SHA-256 computed while streaming.
+
+    The content sits in ``tmp_path`` until ``commit_upload`` moves it to
+    ``path``, so a rejected upload never touches a file already stored
+    under the same name.
+    """
+    path: Path
+    size: int
+    sha256: str
+    tmp_path: Optional[Path] = None
+
+
+def commit_upload(saved: SavedFile) -> None:
+    """Move an accepted upload to its final name (atomic; replaces an earlier upload of that name)."""
+    if saved.tmp_path is not None:
+        os.replace(saved.tmp_path, saved.path)
+        saved.tmp_path = None
+
+
+def discard_upload(saved: SavedFile) -> None:
+    """Delete a rejected upload's temp file; the file under the final name is left alone."""
+    if saved.tmp_path is not None:
+        saved.tmp_path.unlink(missing_ok=True)
+        saved.tmp_path = None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE_MB}MB"
+    )
+
+
+def _copy_chunk(src, dst, digest, chunk_size: int) -> int:
+    """Copy one chunk from the spooled upload to disk; one thread hop per chunk."""
+    chunk = src.read(chunk_size)
+    if chunk:
+        digest.update(chunk)
+        dst.write(chunk)
+    return len(chunk)
+
+
+def _discard(f, tmp_path: Path) -> None:
+    f.close()
+    tmp_path.unlink(missing_ok=True)
+
+
+async def save_uploaded_file(file: UploadFile, directory: Optional[Path] = None) -> SavedFile:
+    """
+    Stream uploaded file to disk with validation.
+    
+    The upload is copied in UPLOAD_CHUNK_SIZE pieces, so memory use per
+    upload is constant. Size is checked as bytes arrive (aborting early)
+    and the content hash is computed on the fly. The upload is left in a
+    temp file next to its final name: call ``commit_upload`` once it is
+    accepted, or ``discard_upload`` to drop it.
     
     Args:
         file: Uploaded file
+        directory: Target directory (a tenant's upload directory); defaults to UPLOAD_DIRECTORY
     
     Returns:
-        Path: Path to saved file
+        SavedFile: Final path, temp path, size and SHA-256 of the upload
     
     Raises:
         HTTPException: If file type or size not valid
@@ -56,24 +120,37 @@ async def save_uploaded_file(file: UploadFile) -> Path:
             detail=f"File type not supported. Allowed: {settings.ALLOWED_FILE_EXTENSIONS}"
         )
 
-    # Read content and validate size
-    content = await file.read()
-
-    if not validate_file_size(len(content), settings.MAX_FILE_SIZE_MB):
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE_MB}MB"
-        )
+    # Reject up front when the client declared the size
+    if file.size is not None and not validate_file_size(file.size, settings.MAX_FILE_SIZE_MB):
+        raise _too_large()
 
     # Sanitize filename
     safe_name = sanitize_filename(file.filename)
-    file_path = settings.UPLOAD_DIRECTORY / safe_name
-    
-    with open(file_path, "wb") as f:
-        f.write(content)
-    
-    logger.info("File saved: %s (%d bytes, original: %s)", safe_name, len(content), file.filename)
-    return file_path
+    directory = directory or settings.UPLOAD_DIRECTORY
+    file_path = directory / safe_name
+    # Same directory as the target so the final rename is atomic
+    tmp_path = directory / f".{safe_name}.{uuid.uuid4().hex}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+    f = await blocking_executor.run(open, tmp_path, "wb")
+    try:
+        await blocking_executor.run(file.file.seek, 0)
+        while copied := await blocking_executor.run(
+            _copy_chunk, file.file, f, digest, settings.UPLOAD_CHUNK_SIZE
+        ):
+            size += copied
+            if not validate_file_size(size, settings.MAX_FILE_SIZE_MB):
+                raise _too_large()
+        await blocking_executor.run(f.close)
+    except BaseException:
+        # Synchronous so cleanup still happens if the request is cancelled
+        _discard(f, tmp_path)
+        raise
+
+    logger.info("File saved: %s (%d bytes, original: %s)", safe_name, size, file.filename)
+    UPLOAD_SIZE.observe(size)
+    return SavedFile(path=file_path, size=size, sha256=digest.hexdigest(), tmp_path=tmp_path)
 
 
 def delete_file(file_path: Path) -> bool:
@@ -0,0 +1,16 @@
+"""Ingestion service - Shared document ingestion pipeline."""
+from app.config.settings import settings
+from app.core.ingestion import IngestionPipeline
+
+
+# Global ingestion pipeline instance (started by the warm-up, stopped by the app lifespan)
+ingestion_pipeline = IngestionPipeline(
+    chunk_size=settings.CHUNK_SIZE,
+    chunk_overlap=settings.CHUNK_OVERLAP,
+    queue_size=settings.INGEST_QUEUE_SIZE,
+    parse_workers=settings.INGEST_PARSE_WORKERS,
+    embed_workers=settings.INGEST_EMBED_WORKERS,
+    embed_batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+    write_batch_size=settings.INGEST_WRITE_BATCH_SIZE,
+    stage_queue_size=settings.INGEST_STAGE_QUEUE_SIZE
+)
@@ -1,5 +1,8 @@
 """RAG service - Wrapper for RAG engine with singleton pattern"""
+import threading
 from app.core.rag_engine import RAGEngine
+from app.core.answer_cache import SemanticAnswerCache
+from app.core.warmup import EngineNotReady, WarmupTracker
 from app.config.settings import settings
 
 
@@ -7,19 +10,36 @@ class RAGService:
     """Singleton wrapper for RAG Engine"""
     
     _instance = None
+    _lock = threading.Lock()
+    # The ingestion pipeline is started last, once the engine it writes through exists
+    warmup = WarmupTracker((*RAGEngine.WARMUP_STAGES, "ingestion_pipeline"))
     
     @classmethod
     def get_instance(cls) -> RAGEngine:
-        """Get or create RAG Engine instance"""
+        """Get or create RAG Engine instance (blocking: loads every model on first call)"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = RAGEngine(
+                    groq_api_key=settings.GROQ_API_KEY,
+                    model_name=settings.GROQ_MODEL,
+                    collection_name=settings.CHROMA_COLLECTION_NAME,
+                    persist_dir=settings.CHROMA_PERSIST_DIR,
+                    chunk_size=settings.CHUNK_SIZE,
+                    chunk_overlap=settings.CHUNK_OVERLAP,
+                    answer_cache=SemanticAnswerCache(
+                        threshold=settings.ANSWER_CACHE_THRESHOLD,
+                        max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS
+                    ) if settings.ANSWER_CACHE_ENABLED else None,
+                    warmup=cls.warmup
+                )
+        return cls._instance
+
+    @classmethod
+    def get_ready_instance(cls) -> RAGEngine:
+        """Get the RAG Engine if warm-up has built it, without ever loading it here"""
         if cls._instance is None:
-            cls._instance = RAGEngine(
-                groq_api_key=settings.GROQ_API_KEY,
-                model_name=settings.GROQ_MODEL,
-                collection_name=settings.CHROMA_COLLECTION_NAME,
-                persist_dir=settings.CHROMA_PERSIST_DIR,
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP
-            )
+            raise EngineNotReady(cls.warmup.summary())
         return cls._instance
     
     @classmethod
@@ -28,5 +48,21 @@ class RAGService:
         cls._instance = None
 
 
-# Global RAG service instance
-rag_service = RAGService.get_instance()
+class LazyRAGEngine:
+    """
+    Module-level handle on the engine that the background warm-up builds.
+
+    Attribute access is forwarded to the engine once it exists and raises
+    EngineNotReady until then, so importing this module loads nothing.
+    """
+
+    @property
+    def ready(self) -> bool:
+        return RAGService._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(RAGService.get_ready_instance(), name)
+
+
+# Global RAG service handle
+rag_service = LazyRAGEngine()
@@ -0,0 +1,52 @@
+"""Tenant service - Resolve the tenant of a request and enforce upload quotas."""
+from starlette.requests import HTTPConnection
+from app.config.settings import settings
+from app.core.executor import blocking_executor
+from app.core.tenants import TenantIndex, check_quota, resolve_tenant
+from app.services.ingestion_service import ingestion_pipeline
+
+API_KEY_HEADER = "X-API-Key"
+
+
+def get_tenant(connection: HTTPConnection) -> str:
+    """
+    Get the tenant of an HTTP request or WebSocket connection.
+    
+    Headers are read first; ``api_key`` and ``tenant`` query parameters are
+    accepted too, since browsers cannot set headers on WebSocket connections.
+    
+    Args:
+        connection: Request or WebSocket
+    
+    Returns:
+        str: Tenant ID
+    
+    Raises:
+        InvalidTenant: If the API key is missing or unknown, or the tenant ID is malformed
+    """
+    return resolve_tenant(
+        connection.headers.get(API_KEY_HEADER) or connection.query_params.get("api_key"),
+        connection.headers.get(settings.TENANT_HEADER) or connection.query_params.get("tenant")
+    )
+
+
+async def check_upload_quota(index: TenantIndex, file_path: str, size: int) -> None:
+    """
+    Check a saved upload against its tenant's document and storage quotas.
+    
+    Indexed and still-queued files both count; re-uploading a file under
+    the same name replaces it, so the old copy is left out.
+    
+    Args:
+        index: The tenant's index
+        file_path: Path the upload was saved to
+        size: Upload size in bytes
+    
+    Raises:
+        TenantQuotaExceeded: If the upload does not fit
+    """
+    if not (settings.TENANT_MAX_DOCUMENTS or settings.TENANT_MAX_STORAGE_MB):
+        return
+    documents, stored_bytes = await blocking_executor.run(index.manifest.usage, file_path)
+    queued, queued_bytes = ingestion_pipeline.pending_usage(index.tenant, excluding=file_path)
+    check_quota(index.tenant, documents + queued, stored_bytes + queued_bytes, size)
@@ -0,0 +1,25 @@
+"""Warmup service - Loads heavy components in the background once the server is up."""
+from app.core.executor import blocking_executor
+from app.core.logging import get_logger
+from app.services.rag_service import RAGService
+from app.services.ingestion_service import ingestion_pipeline
+
+logger = get_logger(__name__)
+
+
+async def warm_up() -> None:
+    """
+    Build the RAG engine off the event loop, then start the ingestion pipeline.
+
+    Progress is recorded on ``RAGService.warmup`` and reported by
+    ``/health/ready``; requests that need the engine get a 503 until it is ready.
+    """
+    tracker = RAGService.warmup
+    try:
+        await blocking_executor.run(RAGService.get_instance)
+        with tracker.stage("ingestion_pipeline"):
+            ingestion_pipeline.start()
+    except Exception as e:
+        logger.error("Warm-up failed: %s: %s", type(e).__name__, e, exc_info=True)
+        return
+    logger.info("Warm-up complete in %.1fs", tracker.progress()["since_start_ms"] / 1000)
@@ -0,0 +1,121 @@
+"""
+Conversation lookup cost with many live sessions: full-scan expiry (previous behaviour) vs ordered expiry.
+
+Fills the manager with N sessions of one turn each, then times chat
+requests (get_or_create plus one user and one assistant message) against
+random existing sessions. Also reports the heap held per session.
+
+Usage (from backend/):
+    python -m benchmarks.bench_conversations
+    python -m benchmarks.bench_conversations --sessions 10000 100000 --requests 500
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from benchmarks.common import summarize_ms
+from app.core.conversation import CONVERSATION_TTL_SECONDS, ConversationManager
+from app.core.conversation_store import InMemoryConversationStore
+
+
+@dataclass
+class LegacyMessage:
+    role: str
+    content: str
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class LegacyConversation:
+    id: str
+    messages: List[LegacyMessage] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    last_active: float = field(default_factory=time.time)
+
+    @property
+    def is_expired(self) -> bool:
+        return (time.time() - self.last_active) > CONVERSATION_TTL_SECONDS
+
+
+class LegacyManager:
+    """The old manager: unslotted dataclasses and a scan of every session on each request."""
+
+    def __init__(self):
+        self._conversations: Dict[str, LegacyConversation] = {}
+        # Off while filling, which would otherwise be quadratic
+        self.scan = True
+
+    async def get_or_create(self, conversation_id=None):
+        if self.scan:
+            expired = [cid for cid, conv in self._conversations.items() if conv.is_expired]
+            for cid in expired:
+                del self._conversations[cid]
+        conv = self._conversations.get(conversation_id) if conversation_id else None
+        if conv is None:
+            conv = LegacyConversation(id=conversation_id or uuid.uuid4().hex[:16])
+            self._conversations[conv.id] = conv
+        return conv
+
+    async def add_user_message(self, conv, content):
+        conv.messages.append(LegacyMessage("user", content))
+        conv.last_active = time.time()
+
+    async def add_assistant_message(self, conv, content):
+        conv.messages.append(LegacyMessage("assistant", content))
+        conv.last_active = time.time()
+
+
+async def turn(manager, conversation_id):
+    conv = await manager.get_or_create(conversation_id)
+    await manager.add_user_message(conv, "What is the refund policy?")
+    await manager.add_assistant_message(conv, "Refunds are accepted within 30 days.")
+    return conv.id
+
+
+async def run(make_manager, sessions: int, requests: int):
+    tracemalloc.start()
+    manager = make_manager()
+    legacy = isinstance(manager, LegacyManager)
+    if legacy:
+        manager.scan = False
+    before, _ = tracemalloc.get_traced_memory()
+    ids = [await turn(manager, None) for _ in range(sessions)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if legacy:
+        manager.scan = True
+
+    samples = []
+    for conversation_id in random.choices(ids, k=requests):
+        start = time.perf_counter()
+        await turn(manager, conversation_id)
+        samples.append(time.perf_counter() - start)
+    return samples, (after - before) / sessions
+
+
+async def main():
+    logging.getLogger("app.core.conversation").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    managers = (
+        ("full-scan", LegacyManager),
+        ("ordered", lambda: ConversationManager(InMemoryConversationStore(max_sessions=10 ** 9))),
+    )
+    print(f"{'mode':<12}{'sessions':>10}{'bytes/session':>15}  per-request latency")
+    for sessions in args.sessions:
+        for label, make_manager in managers:
+            samples, per_session = await run(make_manager, sessions, args.requests)
+            print(f"{label:<12}{sessions:>10}{per_session:>15.0f}  {summarize_ms(samples)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
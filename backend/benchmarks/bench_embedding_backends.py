@@ -0,0 +1,111 @@
+"""
+Embedding backends compared on a fixed corpus: docs/s, query latency and retrieval drift.
+
+Recall drift is the overlap of each backend's top-k neighbours with those of
+the first backend listed (the reference), averaged over the queries. Hit@k is
+how often the passage a query was written from comes back in the top k.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_backends
+    python -m benchmarks.bench_embedding_backends --backends sentence-transformers onnx-int8 --threads 4
+"""
+import argparse
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.common import summarize_ms
+from app.core.embedding_backends import EMBEDDING_BACKENDS, create_embedding_model
+
+TOPICS = {
+    "refunds": ["refund", "return window", "receipt", "store credit", "damaged item", "exchange"],
+    "shipping": ["courier", "tracking number", "delivery estimate", "customs", "express option", "parcel"],
+    "accounts": ["password reset", "two-factor login", "email change", "account deletion", "profile", "session"],
+    "billing": ["invoice", "card declined", "VAT number", "subscription renewal", "proration", "payment plan"],
+    "warranty": ["manufacturer warranty", "repair", "serial number", "replacement part", "coverage", "claim"],
+    "privacy": ["personal data", "cookie consent", "data export", "retention period", "processor", "opt-out"],
+}
+VERBS = ["covers", "explains", "limits", "requires", "describes", "changes", "excludes", "extends"]
+QUALIFIERS = ["within 30 days", "for business customers", "outside the EU", "after the first year",
+              "for orders over 100 euros", "during the holiday period", "for refurbished products"]
+
+
+def build_corpus(size: int, seed: int = 7) -> List[str]:
+    """Deterministic policy-style passages spread over a handful of overlapping topics."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        topic, terms = rng.choice(list(TOPICS.items()))
+        picked = rng.sample(terms, 3)
+        corpus.append(
+            f"Section {i} ({topic}). The policy {rng.choice(VERBS)} the {picked[0]} {rng.choice(QUALIFIERS)}. "
+            f"Customers asking about the {picked[1]} should note it {rng.choice(VERBS)} the {picked[2]}. "
+            f"This applies {rng.choice(QUALIFIERS)} unless stated otherwise."
+        )
+    return corpus
+
+
+def build_queries(corpus: List[str], count: int, seed: int = 11) -> List[tuple]:
+    """(question, index of the passage it was written from) pairs."""
+    rng = random.Random(seed)
+    queries = []
+    for index in rng.sample(range(len(corpus)), min(count, len(corpus))):
+        words = corpus[index].split(". ")[1].split()
+        queries.append((f"What should customers know about {' '.join(words[4:10])}?", index))
+    return queries
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run(backend: str, corpus: List[str], queries: List[tuple], args):
+    start = time.perf_counter()
+    model = create_embedding_model(backend, args.model, threads=args.threads, batch_size=args.batch)
+    load_s = time.perf_counter() - start
+
+    model.embed_query("warm-up")
+    start = time.perf_counter()
+    doc_vectors = np.asarray(model.embed_documents(corpus), dtype=np.float32)
+    docs_per_s = len(corpus) / (time.perf_counter() - start)
+
+    latencies, query_vectors = [], []
+    for question, _ in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+    return load_s, docs_per_s, latencies, top_k(doc_vectors, np.asarray(query_vectors, dtype=np.float32), args.k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--model", default=None, help="HuggingFace model id (default: EMBEDDING_MODEL)")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads (default: EMBEDDING_THREADS)")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.docs)
+    queries = build_queries(corpus, args.queries)
+    sources = np.asarray([index for _, index in queries])
+
+    print(f"{args.docs} passages, {len(queries)} queries, top-{args.k}; drift is against {args.backends[0]}")
+    print(f"{'backend':<24}{'load s':>8}{'docs/s':>9}{'hit@k':>8}{'recall vs ref':>15}  query latency")
+    reference = None
+    for backend in args.backends:
+        load_s, docs_per_s, latencies, neighbours = run(backend, corpus, queries, args)
+        if reference is None:
+            reference = neighbours
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(neighbours, reference)])
+        hit = np.mean([source in row for source, row in zip(sources, neighbours)])
+        print(f"{backend:<24}{load_s:>8.1f}{docs_per_s:>9.1f}{hit:>8.2%}{overlap:>15.2%}  {summarize_ms(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Query-embedding throughput against concurrency, with and without micro-batching.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_batcher
+    python -m benchmarks.bench_embedding_batcher --real   # load bge-m3 instead of the simulator
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import SimulatedEmbeddings, summarize_ms
+from app.core.embeddings import BatchedEmbeddings
+
+
+def run(embeddings, concurrency: int, queries_per_worker: int):
+    latencies = []
+
+    def worker(worker_id: int):
+        for i in range(queries_per_worker):
+            start = time.perf_counter()
+            embeddings.embed_query(f"question {worker_id}-{i} about the refund policy")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return concurrency * queries_per_worker / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--real", action="store_true", help="benchmark the configured HuggingFace model")
+    parser.add_argument("--queries", type=int, default=20, help="queries per concurrent caller")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    if args.real:
+        model = create_model()
+    else:
+        model = SimulatedEmbeddings()
+
+    batched = BatchedEmbeddings(model, max_batch_size=args.max_batch, window_ms=args.window_ms)
+
+    print(f"{'conc':>5} | {'mode':>9} | {'q/s':>9} | latency")
+    for concurrency in args.concurrency:
+        for label, embeddings in (("unbatched", model), ("batched", batched)):
+            qps, latencies = run(embeddings, concurrency, args.queries)
+            print(f"{concurrency:>5} | {label:>9} | {qps:>9.1f} | {summarize_ms(latencies)}")
+
+
+def create_model():
+    from app.core.embeddings import create_embeddings
+    return create_embeddings().inner
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Search latency and context focus with and without a source filter pushed into the search.
+
+Indexes ``--sources`` files of ``--chunks-per-source`` chunks each into a
+real VectorStore (Chroma + BM25), then times dense and sparse searches
+over the whole collection against the same searches scoped to one file.
+"on-target" is the share of returned chunks that come from the file the
+question is about: what is left of it without a filter is prompt noise.
+
+Usage (from backend/):
+    python -m benchmarks.bench_filtered_retrieval
+    python -m benchmarks.bench_filtered_retrieval --sources 200 --chunks-per-source 100 --queries 300
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.common import SimulatedEmbeddings, summarize_ms
+from langchain_core.documents import Document
+from app.core.retrieval import build_where
+from app.core.vector_store import VectorStore
+
+TOPICS = ["refund", "shipping", "warranty", "invoice", "login", "export", "billing", "support"]
+
+
+def build_corpus(store: VectorStore, embeddings, sources: int, per_source: int) -> None:
+    rng = random.Random(0)
+    for s in range(sources):
+        docs = [
+            Document(
+                page_content=f"{rng.choice(TOPICS)} policy, section {c}: terms for product line {s} "
+                             f"and {rng.choice(TOPICS)} requests within {c % 30} days.",
+                metadata={"source": f"uploads/file-{s}.pdf", "page": c // 10}
+            )
+            for c in range(per_source)
+        ]
+        vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        store.add_embedded_documents(docs, vectors, [f"{s}-{c}" for c in range(per_source)])
+
+
+def run(store: VectorStore, embeddings, questions, k: int, filtered: bool):
+    timings = {"dense": [], "sparse": []}
+    on_target = total = 0
+    for source, question in questions:
+        where = build_where([source]) if filtered else None
+        vector = embeddings.embed_query(question)
+        for stage in timings:
+            start = time.perf_counter()
+            if stage == "dense":
+                hits = store.dense_search(question, k, vector=vector, where=where)
+            else:
+                hits = store.sparse_search(question, k, where=where)
+            timings[stage].append(time.perf_counter() - start)
+            on_target += sum(doc.metadata.get("source") == source for _, doc in hits)
+            total += len(hits)
+    return timings, on_target / max(1, total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sources", type=int, default=100)
+    parser.add_argument("--chunks-per-source", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20, help="chunks per search (the hybrid candidate count)")
+    args = parser.parse_args()
+
+    embeddings = SimulatedEmbeddings(call_overhead_ms=0.0, per_text_ms=0.0, dim=256)
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(embeddings, "bench", tmp)
+        build_corpus(store, embeddings, args.sources, args.chunks_per_source)
+        questions = [
+            (f"uploads/file-{rng.randrange(args.sources)}.pdf", f"What are the {rng.choice(TOPICS)} terms?")
+            for _ in range(args.queries)
+        ]
+        print(f"{args.sources} sources x {args.chunks_per_source} chunks, {args.queries} queries, k={args.k}")
+        for label, filtered in (("whole collection", False), ("one source", True)):
+            timings, focus = run(store, embeddings, questions, args.k, filtered)
+            print(f"{label}:  on-target {focus:.0%}")
+            for stage, samples in timings.items():
+                print(f"    {stage:<7}{summarize_ms(samples)}")
+
+
+if __name__ == "__main__":
+    main()
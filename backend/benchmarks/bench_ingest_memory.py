@@ -0,0 +1,115 @@
+"""
+Peak RSS of eager vs lazy (page-at-a-time) ingestion on a synthetic PDF.
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+Embedding uses the simulator with no delay and vectors are discarded, so
+the numbers reflect loader/splitter/batch memory only.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest_memory --pages 100 500 1000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import SimulatedEmbeddings
+
+LINE = "Section {page}.{line}: the quarterly widget report lists part XJ-{line:03d} with refund terms."
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """Write a minimal text-only PDF with ``pages`` pages."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = ["BT /F1 9 Tf 40 800 Td 11 TL"]
+        for line in range(lines_per_page):
+            text.append("(%s) '" % LINE.format(page=page, line=line))
+        text.append("ET")
+        stream = "\n".join(text).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def run_mode(mode: str, path: str, batch_size: int) -> dict:
+    from app.core.document_loader import lazy_load_document, load_document
+    from app.core.text_processor import TextProcessor
+
+    processor = TextProcessor(1000, 200)
+    embeddings = SimulatedEmbeddings(call_overhead_ms=0, per_text_ms=0)
+    start = time.perf_counter()
+    chunks = 0
+    if mode == "eager":
+        # The old path: every page, then every chunk, materialized up front
+        documents = load_document(path)
+        all_chunks = processor.split_documents(documents)
+        for i in range(0, len(all_chunks), batch_size):
+            embeddings.embed_documents([c.page_content for c in all_chunks[i:i + batch_size]])
+        chunks = len(all_chunks)
+    else:
+        for batch in processor.iter_chunk_batches(lazy_load_document(path), batch_size):
+            embeddings.embed_documents([c.page_content for c in batch])
+            chunks += len(batch)
+
+    # ru_maxrss is KiB on Linux
+    return {
+        "chunks": chunks,
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child[0], args.child[1], args.batch_size)))
+        return
+
+    print(f"{'pages':>6} | {'mode':>5} | {'chunks':>7} | {'seconds':>7} | peak RSS")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"synthetic-{pages}.pdf")
+            write_synthetic_pdf(path, pages)
+            for mode in ("eager", "lazy"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest_memory",
+                     "--batch-size", str(args.batch_size), "--child", mode, path],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(f"{pages:>6} | {mode:>5} | {result['chunks']:>7} | "
+                      f"{result['seconds']:>7.2f} | {result['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
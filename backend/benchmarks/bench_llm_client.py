@@ -0,0 +1,111 @@
+"""
+Per-query ChatGroq construction vs the pooled LLM client, against a local stub server.
+
+The stub speaks Groq's OpenAI-compatible streaming chat API, so the real
+ChatGroq/groq/httpx stack is exercised end to end. Pass --tls-cert and
+--tls-key (a self-signed cert for 127.0.0.1) to serve HTTPS and include
+the handshake cost, as against Groq.
+
+Usage (from backend/):
+    python -m benchmarks.bench_llm_client --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import summarize_ms
+from app.core.llm import LLMClientPool, create_llm
+
+TOKENS = ["The", " refund", " policy", " allows", " returns", "."]
+
+
+class StubGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(TOKENS):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": token},
+                             "finish_reason": None if i < len(TOKENS) - 1 else "stop"}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def start_server(cert: str, key: str) -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGroqHandler)
+    scheme = "http"
+    if cert and key:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+async def stream_once(llm):
+    start = time.perf_counter()
+    ttft = None
+    async for chunk in llm.astream("What is the refund policy?"):
+        if ttft is None and chunk.content:
+            ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+async def run(label: str, get_llm, requests: int):
+    ttfts, totals = [], []
+    for _ in range(requests):
+        ttft, total = await stream_once(get_llm())
+        ttfts.append(ttft)
+        totals.append(total)
+    print(f"{label:>10} | ttft {summarize_ms(ttfts)} | total {summarize_ms(totals)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--tls-cert", default="")
+    parser.add_argument("--tls-key", default="")
+    args = parser.parse_args()
+
+    if args.tls_cert:
+        # httpx trusts SSL_CERT_FILE, so the self-signed stub certificate verifies
+        os.environ["SSL_CERT_FILE"] = args.tls_cert
+    base_url = start_server(args.tls_cert, args.tls_key)
+
+    def per_query():
+        # What query_stream used to do for every question
+        return create_llm("stub-key", "stub-model", base_url=base_url)
+
+    pool = LLMClientPool("stub-key", "stub-model", base_url=base_url)
+
+    print(f"stub server: {base_url}")
+    await run("per-query", per_query, args.requests)
+    await run("pooled", pool.get, args.requests)
+    await pool.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
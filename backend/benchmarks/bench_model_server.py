@@ -0,0 +1,197 @@
+"""
+Retrieval throughput and memory as web workers are added, with and without the shared model server.
+
+Each worker process runs ``--concurrency`` threads issuing the web worker's
+retrieval path (embed the question, dense search) for ``--duration``
+seconds. In ``shared`` mode the workers talk to one model-server process;
+in ``standalone`` mode every worker loads its own model and vector store,
+as separate uvicorn workers do without the server.
+
+The simulated model holds ``--model-mb`` of memory to stand in for the
+weights. Its cost is a sleep, so standalone throughput here ignores the
+CPU/GPU contention real model copies would have; the memory columns are
+the point of that mode.
+
+Usage (from backend/):
+    python -m benchmarks.bench_model_server
+    python -m benchmarks.bench_model_server --workers 1 2 4 --modes shared --duration 10
+    python -m benchmarks.bench_model_server --embed-only   # isolate cross-worker batching
+    python -m benchmarks.bench_model_server --real   # serve the configured embedding model
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import SimulatedEmbeddings, percentile
+from langchain_core.documents import Document
+
+CORPUS_SIZE = 200
+
+
+def rss_mb(pid: str = "self", field: str = "VmRSS") -> float:
+    """Resident memory of a process from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def load_components(persist_dir: str, model_mb: int, real: bool):
+    """Embeddings, vector store and manifest as one process would load them."""
+    from app.core.embeddings import BatchedEmbeddings, CachedEmbeddings, QueryEmbeddingCache, create_embeddings
+    from app.core.manifest import IngestionManifest
+    from app.core.vector_store import VectorStore
+
+    if real:
+        embeddings = create_embeddings(remote=False)
+    else:
+        model = SimulatedEmbeddings(call_overhead_ms=8.0, per_text_ms=0.5, dim=256)
+        model.weights = bytearray(model_mb * 1024 * 1024)  # resident stand-in for the model weights
+        embeddings = CachedEmbeddings(BatchedEmbeddings(model, max_batch_size=32, window_ms=5.0), QueryEmbeddingCache())
+    embeddings.warm_up()
+    store = VectorStore(embeddings, "bench", persist_dir)
+    return embeddings, store, IngestionManifest(persist_dir)
+
+
+def seed(store) -> None:
+    if store.get_document_count() >= CORPUS_SIZE:
+        return
+    documents = [
+        Document(page_content=f"Section {i}: the refund window for order type {i % 7} is {i % 30} days.",
+                 metadata={"source": f"policy-{i // 20}.txt"})
+        for i in range(CORPUS_SIZE)
+    ]
+    store.add_documents(documents, ids=[f"chunk-{i}" for i in range(CORPUS_SIZE)])
+
+
+def run_server(socket_path: str, persist_dir: str, model_mb: int, real: bool) -> None:
+    from app.core.model_server import ModelServer, _serve
+
+    embeddings, store, manifest = load_components(persist_dir, model_mb, real)
+    asyncio.run(_serve(ModelServer(embeddings, store, manifest, socket_path, workers=8)))
+
+
+def run_worker(mode, worker_id, socket_path, persist_dir, model_mb, real, concurrency, duration, embed_only,
+               barrier, results):
+    if mode == "shared":
+        from app.core.model_server import ModelServerClient, RemoteEmbeddings, RemoteVectorStore
+
+        client = ModelServerClient(socket_path, slots=concurrency, slot_rows=16, timeout=60, connect_timeout=120)
+        embeddings = RemoteEmbeddings(client)
+        store = RemoteVectorStore(embeddings, client)
+    else:
+        worker_dir = os.path.join(persist_dir, f"worker-{worker_id}")
+        embeddings, store, _ = load_components(worker_dir, model_mb, real)
+        seed(store)
+
+    latencies = []
+    barrier.wait()
+    deadline = time.perf_counter() + duration
+
+    def caller(thread_id: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            # Unique text per call so no cache layer can answer it
+            question = f"What is the refund window for order type {i % 7}? ({worker_id}-{thread_id}-{i})"
+            start = time.perf_counter()
+            vector = embeddings.embed_query(question)
+            if not embed_only:
+                store.dense_search(question, k=4, vector=vector)
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=caller, args=(t,)) for t in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, rss_mb(field="VmHWM")))
+    if mode == "shared":
+        client.close()
+
+
+def measure(mode: str, workers: int, args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    persist_dir = tempfile.mkdtemp(prefix="bench-model-server-")
+    socket_path = os.path.join(persist_dir, "model-server.sock")
+    server = None
+    try:
+        if mode == "shared":
+            # A separate interpreter, as in a deployment (spawned children would share our resource tracker)
+            server = subprocess.Popen([
+                sys.executable, "-c", "from benchmarks.bench_model_server import run_server; "
+                f"run_server({socket_path!r}, {persist_dir!r}, {args.model_mb}, {args.real})"
+            ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            from app.core.model_server import ModelServerClient, RemoteEmbeddings, RemoteVectorStore
+
+            client = ModelServerClient(socket_path, slots=1, slot_rows=64, timeout=120, connect_timeout=300)
+            seed(RemoteVectorStore(RemoteEmbeddings(client), client))
+            client.close()
+
+        barrier, results = ctx.Barrier(workers + 1), ctx.Queue()
+        processes = [
+            ctx.Process(target=run_worker, args=(
+                mode, i, socket_path, persist_dir, args.model_mb, args.real,
+                args.concurrency, args.duration, args.embed_only, barrier, results
+            ))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        barrier.wait(timeout=600)
+        start = time.perf_counter()
+        collected = [results.get(timeout=args.duration + 120) for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        server_rss = rss_mb(str(server.pid), "VmHWM") if server else 0.0
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+    latencies = [latency for worker_latencies, _ in collected for latency in worker_latencies]
+    worker_rss = [rss for _, rss in collected]
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "server_mb": server_rss,
+        "worker_mb": max(worker_rss),
+        "total_mb": server_rss + sum(worker_rss),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--real", action="store_true", help="load the configured embedding model instead of the simulator")
+    parser.add_argument("--modes", nargs="+", default=["shared", "standalone"], choices=["shared", "standalone"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent requests per worker")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per run")
+    parser.add_argument("--embed-only", action="store_true", help="skip the vector search, timing only embeddings")
+    parser.add_argument("--model-mb", type=int, default=512, help="memory held by the simulated model")
+    args = parser.parse_args()
+
+    print(f"{'mode':<11}{'workers':>8}{'q/s':>9}{'p50':>9}{'p99':>9}{'server':>10}{'per worker':>12}{'total':>10}")
+    for mode in args.modes:
+        for workers in args.workers:
+            r = measure(mode, workers, args)
+            print(f"{mode:<11}{workers:>8}{r['qps']:>9.1f}{r['p50']:>7.1f}ms{r['p99']:>7.1f}ms"
+                  f"{r['server_mb']:>8.0f}MB{r['worker_mb']:>10.0f}MB{r['total_mb']:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Re-indexing time for an unchanged corpus, with and without the chunk-embedding cache.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reindex_cache
+    python -m benchmarks.bench_reindex_cache --chunks 20000 --batch 64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import SimulatedEmbeddings
+from app.core.embedding_store import ChunkEmbeddingCache
+from app.core.embeddings import CachedEmbeddings, QueryEmbeddingCache
+
+
+def index(embeddings, texts, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        embeddings.embed_documents(texts[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--changed", type=float, default=0.05, help="fraction of chunks edited before re-indexing")
+    args = parser.parse_args()
+
+    texts = [f"chunk {i}: " + "lorem ipsum dolor sit amet " * 30 for i in range(args.chunks)]
+    edited = list(texts)
+    for i in range(0, args.chunks, max(1, int(1 / args.changed)) if args.changed else args.chunks + 1):
+        edited[i] = edited[i] + " (edited)"
+
+    model = SimulatedEmbeddings(dim=1024)
+    uncached = CachedEmbeddings(model, QueryEmbeddingCache())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkEmbeddingCache(os.path.join(tmp, "cache.sqlite3"), model.model_name)
+        cached = CachedEmbeddings(model, QueryEmbeddingCache(), store)
+
+        print(f"{args.chunks} chunks, batch {args.batch}, {args.changed:.0%} edited on re-index")
+        print(f"{'run':<28}{'seconds':>10}{'chunks/s':>12}")
+        for label, embeddings, corpus in (
+            ("no cache: initial", uncached, texts),
+            ("no cache: re-index", uncached, edited),
+            ("cache: initial (cold)", cached, texts),
+            ("cache: re-index (warm)", cached, edited),
+        ):
+            elapsed = index(embeddings, corpus, args.batch)
+            print(f"{label:<28}{elapsed:>10.2f}{len(corpus) / elapsed:>12.0f}")
+
+        stats = store.stats()
+        size_mb = os.path.getsize(store.path) / 1e6
+        print(f"\ncache: {stats['entries']} entries, {size_mb:.1f} MB on disk, hit rate {stats['hit_rate']:.2%}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
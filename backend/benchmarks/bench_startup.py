@@ -0,0 +1,112 @@
+"""
+Cold-start time of the API: until the port answers /health, and until /health/ready is 200.
+
+Each run launches uvicorn in a fresh process. ``eager`` reproduces the old
+startup, building the RAG engine before uvicorn binds; ``lazy`` is the
+current one, which binds first and warms up in the background.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --modes lazy
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Imported only for its side effect: it sets a placeholder GROQ_API_KEY, which the child server inherits
+import benchmarks.common  # noqa: F401
+
+
+LAUNCHERS = {
+    "lazy": "import uvicorn; uvicorn.run('app.main:app', port={port}, log_level='warning')",
+    "eager": (
+        "from app.services.rag_service import RAGService; RAGService.get_instance(); "
+        "import uvicorn; uvicorn.run('app.main:app', port={port}, log_level='warning')"
+    ),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(url: str):
+    """(status, parsed body) or None if the server is not accepting connections yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+def measure(mode: str, timeout: float):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", LAUNCHERS[mode].format(port=port)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    bound = ready = None
+    components = {}
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode}: server exited with code {process.returncode}")
+            if bound is None:
+                if get(f"{base}/health") is not None:
+                    bound = time.perf_counter() - start
+                else:
+                    time.sleep(0.02)
+                    continue
+            status, body = get(f"{base}/health/ready") or (None, None)
+            if status == 200:
+                ready = time.perf_counter() - start
+                components = body.get("warmup", {}).get("components", {})
+                break
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return bound, ready, components
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=list(LAUNCHERS), choices=list(LAUNCHERS))
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for readiness per run")
+    args = parser.parse_args()
+
+    print(f"{'mode':<7}{'bind p50':>10}{'bind max':>10}{'ready p50':>11}{'ready max':>11}")
+    for mode in args.modes:
+        binds, readies, components = [], [], {}
+        for _ in range(args.runs):
+            bound, ready, components = measure(mode, args.timeout)
+            binds.append(bound)
+            readies.append(ready)
+        if None in binds or None in readies:
+            print(f"{mode:<7} did not become ready within {args.timeout:.0f}s")
+            continue
+        print(f"{mode:<7}{statistics.median(binds):>9.2f}s{max(binds):>9.2f}s"
+              f"{statistics.median(readies):>10.2f}s{max(readies):>10.2f}s")
+        if components:
+            print("        last run: " + ", ".join(
+                f"{name} {c['elapsed_ms'] / 1000:.2f}s" for name, c in components.items() if c["elapsed_ms"] is not None
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Concurrent upload saving: buffered read-all (previous behaviour) vs chunked streaming.
+
+Drives save_uploaded_file directly with UploadFile objects backed by temp
+files, measuring wall time and peak Python heap (tracemalloc) for N
+concurrent uploads.
+
+Usage (from backend/):
+    python -m benchmarks.bench_upload
+    python -m benchmarks.bench_upload --size-mb 40 --concurrency 1 4 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+_upload_dir = tempfile.mkdtemp(prefix="bench-upload-")
+os.environ["UPLOAD_DIRECTORY"] = _upload_dir
+
+# Imported only for its side effect: it sets a placeholder GROQ_API_KEY so Settings() loads
+import benchmarks.common  # noqa: F401
+from fastapi import UploadFile
+from app.config.settings import settings
+from app.core.executor import blocking_executor
+from app.core.manifest import sha256_file
+from app.services.file_service import commit_upload, save_uploaded_file, sanitize_filename
+
+
+async def buffered_save(file: UploadFile):
+    """The old path: read everything, write on the event loop, then re-read to hash."""
+    content = await file.read()
+    file_path = settings.UPLOAD_DIRECTORY / sanitize_filename(file.filename)
+    with open(file_path, "wb") as f:
+        f.write(content)
+    await blocking_executor.run(sha256_file, str(file_path))
+    return file_path
+
+
+async def streaming_save(file: UploadFile):
+    """The current path: chunked copy to a temp file, then the rename an accepted upload gets."""
+    saved = await save_uploaded_file(file)
+    await blocking_executor.run(commit_upload, saved)
+    return saved.path
+
+
+def make_source(size_mb: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    block = os.urandom(1024 * 1024)
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+async def run(save, source: str, concurrency: int):
+    handles = [open(source, "rb") for _ in range(concurrency)]
+    uploads = [UploadFile(h, filename=f"upload_{i}.txt") for i, h in enumerate(handles)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(save(u) for u in uploads))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for h in handles:
+        h.close()
+    return elapsed, peak
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    settings.MAX_FILE_SIZE_MB = max(settings.MAX_FILE_SIZE_MB, args.size_mb + 1)
+    source = make_source(args.size_mb)
+    try:
+        print(f"{args.size_mb} MB per upload, chunk size {settings.UPLOAD_CHUNK_SIZE // 1024} KB")
+        print(f"{'mode':<12}{'concurrent':>12}{'seconds':>10}{'MB/s':>10}{'peak heap MB':>15}")
+        for concurrency in args.concurrency:
+            for label, save in (("buffered", buffered_save), ("streaming", streaming_save)):
+                elapsed, peak = await run(save, source, concurrency)
+                throughput = args.size_mb * concurrency / elapsed
+                print(f"{label:<12}{concurrency:>12}{elapsed:>10.2f}{throughput:>10.0f}{peak / 1e6:>15.1f}")
+    finally:
+        os.unlink(source)
+        for name in os.listdir(_upload_dir):
+            os.unlink(os.path.join(_upload_dir, name))
+        os.rmdir(_upload_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
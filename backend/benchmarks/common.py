@@ -0,0 +1,65 @@
+"""Shared helpers for the benchmark scripts."""
+import hashlib
+import math
+import os
+import statistics
+import threading
+import time
+from typing import List
+
+# Settings() requires a Groq key; benchmarks never call Groq
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder-key")
+
+from langchain_core.embeddings import Embeddings
+
+
+class SimulatedEmbeddings(Embeddings):
+    """
+    Deterministic stand-in for bge-m3 with a realistic cost model.
+
+    Each call pays a fixed overhead (tokenisation, kernel launch) plus a
+    per-text cost. Calls are serialised on a lock, because one model
+    instance saturates the device, and sleep instead of computing.
+    """
+
+    def __init__(self, call_overhead_ms: float = 8.0, per_text_ms: float = 0.5, dim: int = 64):
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self.dim = dim
+        self.model_name = "simulated-bge-m3"
+        self.calls = 0
+        self._device = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        raw = [(digest[i % len(digest)] - 127.5) / 127.5 for i in range(self.dim)]
+        norm = math.sqrt(sum(x * x for x in raw)) or 1.0
+        return [x / norm for x in raw]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._device:
+            self.calls += 1
+            time.sleep(self.call_overhead + self.per_text * len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_ms(samples: List[float]) -> str:
+    """Format a list of second-valued latencies as p50/p99 milliseconds."""
+    if not samples:
+        return "n/a"
+    return "p50=%.1fms p99=%.1fms mean=%.1fms" % (
+        percentile(samples, 50) * 1000,
+        percentile(samples, 99) * 1000,
+        statistics.fmean(samples) * 1000,
+    )
@@ -0,0 +1,9 @@
+"""Shared pytest setup: run from backend/ with ``python -m pytest``."""
+import os
+import sys
+from pathlib import Path
+
+# Settings() requires a Groq key; tests never call Groq
+os.environ.setdefault("GROQ_API_KEY", "test-placeholder-key")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
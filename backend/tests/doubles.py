@@ -0,0 +1,50 @@
+"""In-memory test doubles for the model-backed components, shared by the tests."""
+
+
+class StubEmbeddings:
+    """Deterministic two-dimensional vectors; no model is loaded."""
+
+    model_name = "stub"
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class MemoryVectorStore:
+    """The slice of VectorStore that ingestion and document management write through."""
+
+    def __init__(self, embeddings=None):
+        self.embeddings = embeddings or StubEmbeddings()
+        self.chunks = {}
+        self.corpus_version = 0
+
+    def add_embedded_documents(self, documents, embeddings, ids):
+        for chunk_id, doc in zip(ids, documents):
+            self.chunks[chunk_id] = doc
+        self.corpus_version += 1
+        return ids
+
+    def add_documents(self, documents, ids):
+        return self.add_embedded_documents(documents, self.embeddings.embed_documents(
+            [doc.page_content for doc in documents]), ids)
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.chunks.pop(chunk_id, None)
+        self.corpus_version += 1
+
+    def delete_where(self, where):
+        self.delete([
+            chunk_id for chunk_id, doc in self.chunks.items()
+            if all(doc.metadata.get(key) == value for key, value in where.items())
+        ])
+
+    def clear(self):
+        self.chunks.clear()
+        self.corpus_version += 1
+
+    def get_document_count(self):
+        return len(self.chunks)
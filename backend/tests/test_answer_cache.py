@@ -0,0 +1,74 @@
+"""Semantic answer cache: similarity threshold, TTL, corpus versions and retrieval modes."""
+from app.core import answer_cache as answer_cache_module
+from app.core.answer_cache import SemanticAnswerCache
+
+QUESTION = [1.0, 0.0, 0.0]
+NEAR = [0.99, 0.1, 0.0]   # cosine ~0.995 to QUESTION
+FAR = [0.7, 0.7, 0.0]     # cosine ~0.707 to QUESTION
+
+
+def filled_cache(**kwargs):
+    cache = SemanticAnswerCache(threshold=0.95, **kwargs)
+    cache.store(QUESTION, "forty-two", ["guide.txt"], corpus_version=1, mode="hybrid")
+    return cache
+
+
+def test_hit_above_threshold_miss_below():
+    cache = filled_cache()
+    hit = cache.lookup(NEAR, 1, "hybrid")
+    assert hit.answer == "forty-two" and hit.sources == ["guide.txt"]
+    assert hit.similarity > 0.95
+    assert cache.lookup(FAR, 1, "hybrid") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: clock[0])
+    cache = filled_cache(ttl_seconds=60)
+    clock[0] += 59
+    assert cache.lookup(QUESTION, 1, "hybrid") is not None
+    clock[0] += 2
+    assert cache.lookup(QUESTION, 1, "hybrid") is None
+
+
+def test_newer_corpus_version_flushes_entries():
+    cache = filled_cache()
+    assert cache.lookup(QUESTION, 2, "hybrid") is None
+    assert cache.stats()["entries"] == 0 and cache.corpus_version == 2
+
+
+def test_answer_from_an_older_version_is_not_stored():
+    cache = filled_cache()
+    cache.store(FAR, "fresh", ["new.txt"], corpus_version=2, mode="hybrid")
+    # A slow request that started before the write finishes afterwards
+    cache.store(QUESTION, "stale", ["guide.txt"], corpus_version=1, mode="hybrid")
+    assert cache.corpus_version == 2
+    assert cache.lookup(FAR, 2, "hybrid").answer == "fresh"
+    assert cache.lookup(QUESTION, 2, "hybrid") is None
+
+
+def test_lookup_with_an_older_version_misses_without_flushing():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store(QUESTION, "current", [], corpus_version=3, mode="hybrid")
+    assert cache.lookup(QUESTION, 2, "hybrid") is None
+    assert cache.corpus_version == 3
+    assert cache.lookup(QUESTION, 3, "hybrid").answer == "current"
+
+
+def test_entries_only_answer_their_own_retrieval_mode():
+    cache = filled_cache()
+    assert cache.lookup(QUESTION, 1, "sparse") is None
+    cache.store(QUESTION, "keyword answer", [], corpus_version=1, mode="sparse")
+    assert cache.lookup(QUESTION, 1, "sparse").answer == "keyword answer"
+    assert cache.lookup(QUESTION, 1, "hybrid").answer == "forty-two"
+
+
+def test_ring_buffer_overwrites_oldest_entry():
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=2)
+    cache.store([1.0, 0.0, 0.0], "x", [], corpus_version=1)
+    cache.store([0.0, 1.0, 0.0], "y", [], corpus_version=1)
+    cache.store([0.0, 0.0, 1.0], "z", [], corpus_version=1)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup([1.0, 0.0, 0.0], 1) is None
+    assert cache.lookup([0.0, 0.0, 1.0], 1).answer == "z"
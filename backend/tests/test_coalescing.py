@@ -0,0 +1,148 @@
+"""Single-flight sharing of streaming answers."""
+import asyncio
+
+from app.core.coalescing import StreamCoalescer
+
+
+class Upstream:
+    """Hand-fed stream: push chunks, then None to finish or an exception to fail."""
+
+    def __init__(self):
+        self.feed = asyncio.Queue()
+        self.starts = 0
+        self.closed = False
+
+    def start(self):
+        self.starts += 1
+        return self._stream()
+
+    async def _stream(self):
+        try:
+            while True:
+                item = await self.feed.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.closed = True
+
+
+def token(text):
+    return {"type": "token", "content": text}
+
+
+async def collect(stream, into):
+    async for chunk in stream:
+        into.append(chunk)
+    return into
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_identical_requests_share_one_upstream():
+    async def main():
+        coalescer, upstream = StreamCoalescer(), Upstream()
+        first, second = [], []
+        readers = [
+            asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), first)),
+            asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), second)),
+        ]
+        await settle()
+        for text in ("a", "b", None):
+            upstream.feed.put_nowait(token(text) if text else None)
+        await asyncio.gather(*readers)
+
+        assert upstream.starts == 1
+        assert (coalescer.started, coalescer.joined) == (1, 1)
+        assert first == second == [token("a"), token("b")]
+        assert coalescer.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_late_joiner_replays_missed_chunks():
+    async def main():
+        coalescer, upstream = StreamCoalescer(), Upstream()
+        leader, late = [], []
+        leading = asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), leader))
+        upstream.feed.put_nowait(token("a"))
+        upstream.feed.put_nowait(token("b"))
+        await settle()
+        assert leader == [token("a"), token("b")]
+
+        joining = asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), late))
+        await settle()
+        assert late == [token("a"), token("b")]
+        upstream.feed.put_nowait(token("c"))
+        upstream.feed.put_nowait(None)
+        await asyncio.gather(leading, joining)
+
+        assert leader == late == [token("a"), token("b"), token("c")]
+        assert upstream.starts == 1
+
+    asyncio.run(main())
+
+
+def test_failed_upstream_reaches_every_subscriber_and_is_forgotten():
+    async def main():
+        coalescer, upstream = StreamCoalescer(), Upstream()
+        first, second = [], []
+        readers = [
+            asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), first)),
+            asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), second)),
+        ]
+        await settle()
+        upstream.feed.put_nowait(token("a"))
+        upstream.feed.put_nowait(RuntimeError("model unavailable"))
+        await asyncio.gather(*readers)
+
+        error = {"type": "error", "content": "RuntimeError: model unavailable"}
+        assert first == second == [token("a"), error]
+        assert coalescer.in_flight == 0
+
+        # The failure is not cached: the next request starts a fresh upstream
+        retry = Upstream()
+        retry.feed.put_nowait(token("ok"))
+        retry.feed.put_nowait(None)
+        assert await collect(coalescer.subscribe("q", retry.start), []) == [token("ok")]
+        assert coalescer.started == 2
+
+    asyncio.run(main())
+
+
+def test_upstream_is_cancelled_when_every_subscriber_leaves():
+    async def main():
+        coalescer, upstream = StreamCoalescer(), Upstream()
+        readers = [asyncio.create_task(collect(coalescer.subscribe("q", upstream.start), [])) for _ in range(2)]
+        upstream.feed.put_nowait(token("a"))
+        await settle()
+
+        readers[0].cancel()
+        await settle()
+        assert not upstream.closed and coalescer.in_flight == 1
+
+        readers[1].cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await settle()
+        assert upstream.closed
+        assert coalescer.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_requests_that_do_not_overlap_are_not_coalesced():
+    async def main():
+        coalescer = StreamCoalescer()
+        for _ in range(2):
+            upstream = Upstream()
+            upstream.feed.put_nowait(token("a"))
+            upstream.feed.put_nowait(None)
+            assert await collect(coalescer.subscribe("q", upstream.start), []) == [token("a")]
+        assert (coalescer.started, coalescer.joined) == (2, 0)
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""Token counting and context packing."""
+import sys
+import types
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core.context import ContextPacker, get_token_counter
+
+
+@pytest.fixture
+def fake_tiktoken(monkeypatch):
+    """A tiktoken whose "chars" encoding counts characters and which knows no other encoding."""
+    class CharEncoding:
+        def encode(self, text, disallowed_special=()):
+            return list(text)
+
+    def get_encoding(name):
+        if name != "chars":
+            raise ValueError(f"Unknown encoding {name}")
+        return CharEncoding()
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+    get_token_counter.cache_clear()
+    yield
+    get_token_counter.cache_clear()
+
+
+def test_token_counter_is_cached_per_encoding(fake_tiktoken):
+    assert get_token_counter("chars") is get_token_counter("chars")
+
+
+def test_each_encoding_gets_its_own_counter(fake_tiktoken):
+    # The first encoding asked for must not decide what later callers get
+    estimate = get_token_counter("no-such-encoding")
+    chars = get_token_counter("chars")
+    text = "Refunds within 30 days."
+    assert chars(text) == len(text)
+    assert 0 < estimate(text) < len(text)
+
+
+def test_packer_stops_at_token_budget(fake_tiktoken):
+    docs = [Document(page_content=f"chunk {i} " * 5, metadata={"source": f"s{i}"}) for i in range(5)]
+    packed = ContextPacker(max_tokens=100, count_tokens=get_token_counter("chars")).pack(docs)
+    assert 0 < len(packed.documents) < 5
+    assert packed.tokens <= 100
@@ -0,0 +1,171 @@
+"""Conversation store behaviour, run against every backend."""
+import asyncio
+
+import pytest
+
+from app.core.conversation import Message
+from app.core.conversation_store import (
+    InMemoryConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    """Factory for a store of the parametrized backend (built inside the test's event loop)."""
+    def make(**limits):
+        if request.param == "sqlite":
+            return SQLiteConversationStore(str(tmp_path / "conversations.sqlite3"), **limits)
+        if request.param == "redis":
+            fakeredis = pytest.importorskip("fakeredis")
+            return RedisConversationStore(client=fakeredis.aioredis.FakeRedis(decode_responses=True), **limits)
+        return InMemoryConversationStore(**limits)
+    return make
+
+
+def run(make_store, scenario, **limits):
+    async def main():
+        store = make_store(**limits)
+        try:
+            await scenario(store)
+        finally:
+            await store.aclose()
+    asyncio.run(main())
+
+
+def turns(n):
+    return [Message(role="user" if i % 2 == 0 else "assistant", content=f"m{i}") for i in range(n)]
+
+
+def test_append_assigns_sequence_numbers(make_store):
+    async def scenario(store):
+        await store.create("c1")
+        first, second = turns(3), turns(2)
+        await store.append("c1", first)
+        await store.append("c1", second)
+        assert [m.seq for m in first + second] == [0, 1, 2, 3, 4]
+
+    run(make_store, scenario)
+
+
+def test_load_returns_newest_messages_in_order(make_store):
+    async def scenario(store):
+        await store.create("c1")
+        await store.append("c1", turns(10))
+        conversation = await store.load("c1", last_n=4)
+        assert [m.seq for m in conversation.messages] == [6, 7, 8, 9]
+        assert [m.content for m in conversation.messages] == ["m6", "m7", "m8", "m9"]
+        assert conversation.messages[0].role == "user"
+        assert await store.count() == 1
+
+    run(make_store, scenario)
+
+
+def test_append_trims_to_max_messages(make_store):
+    async def scenario(store):
+        await store.append("c1", turns(10))  # no create(): append starts the conversation
+        conversation = await store.load("c1", last_n=100)
+        assert [m.seq for m in conversation.messages] == [6, 7, 8, 9]
+        await store.append("c1", turns(1))
+        assert [m.seq for m in (await store.load("c1", last_n=100)).messages] == [7, 8, 9, 10]
+
+    run(make_store, scenario, max_messages=4)
+
+
+def test_create_resets_conversation(make_store):
+    async def scenario(store):
+        await store.append("c1", turns(4))
+        await store.set_summary("c1", "old", 2)
+        await store.create("c1")
+        conversation = await store.load("c1", last_n=10)
+        assert conversation.messages == [] and conversation.summary == ""
+        fresh = turns(1)
+        await store.append("c1", fresh)
+        assert fresh[0].seq == 0
+
+    run(make_store, scenario)
+
+
+def test_summary_hides_the_messages_it_covers(make_store):
+    async def scenario(store):
+        await store.create("c1")
+        await store.append("c1", turns(6))
+        await store.set_summary("c1", "first four", 4)
+        conversation = await store.load("c1", last_n=10)
+        assert conversation.summary == "first four"
+        assert conversation.summary_upto == 4
+        assert [m.seq for m in conversation.messages] == [4, 5]
+
+    run(make_store, scenario)
+
+
+def test_older_summary_never_replaces_newer_one(make_store):
+    async def scenario(store):
+        await store.create("c1")
+        await store.append("c1", turns(8))
+        await store.set_summary("c1", "up to six", 6)
+        await store.set_summary("c1", "up to two", 2)  # a slower summarizer finishing late
+        conversation = await store.load("c1", last_n=10)
+        assert (conversation.summary, conversation.summary_upto) == ("up to six", 6)
+        assert [m.seq for m in conversation.messages] == [6, 7]
+
+    run(make_store, scenario)
+
+
+def test_summary_of_missing_conversation_is_ignored(make_store):
+    async def scenario(store):
+        await store.set_summary("ghost", "nothing", 3)
+        assert await store.load("ghost", last_n=10) is None
+
+    run(make_store, scenario)
+
+
+def test_conversation_expires_after_ttl(make_store):
+    async def scenario(store):
+        await store.create("stale")
+        await store.append("stale", turns(2))
+        await asyncio.sleep(0.3)
+        await store.create("fresh")
+        assert await store.load("stale", last_n=10) is None
+        assert await store.load("fresh", last_n=10) is not None
+        await store.purge_expired()
+        assert await store.count() == 1
+
+    run(make_store, scenario, ttl_seconds=0.2)
+
+
+def test_access_refreshes_ttl(make_store):
+    async def scenario(store):
+        await store.create("c1")
+        for _ in range(3):
+            await asyncio.sleep(0.15)
+            assert await store.load("c1", last_n=10) is not None
+
+    run(make_store, scenario, ttl_seconds=0.3)
+
+
+def test_delete_drops_conversation(make_store):
+    async def scenario(store):
+        await store.append("c1", turns(2))
+        await store.delete("c1")
+        assert await store.load("c1", last_n=10) is None
+        assert await store.count() == 0
+
+    run(make_store, scenario)
+
+
+def test_sweeper_evicts_least_recently_used_beyond_cap(make_store):
+    async def scenario(store):
+        for cid in ("a", "b"):
+            await store.create(cid)
+            await asyncio.sleep(0.01)
+        await store.load("a", last_n=1)  # "b" is now the least recently used
+        await asyncio.sleep(0.01)
+        await store.create("c")
+        await store.purge_expired()
+        assert await store.count() == 2
+        assert await store.load("b", last_n=1) is None
+        assert await store.load("a", last_n=1) is not None
+
+    run(make_store, scenario, max_sessions=2)
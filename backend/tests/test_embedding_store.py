@@ -0,0 +1,84 @@
+"""Persistent chunk embedding cache: namespaces, the size cap and LRU eviction."""
+import itertools
+
+import pytest
+
+from app.core import embedding_store as embedding_store_module
+from app.core.embedding_store import ChunkEmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time(), so last_used orders writes and reads."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(embedding_store_module.time, "time", lambda: float(next(ticks)))
+
+
+def open_cache(tmp_path, model_name="model-a", **kwargs):
+    return ChunkEmbeddingCache(str(tmp_path / "embeddings.db"), model_name, **kwargs)
+
+
+def test_round_trip_and_persistence(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many(["alpha", "beta"], [[0.5, 1.0], [0.25, -2.0]])
+    assert cache.get_many(["alpha", "gamma", "beta"]) == [[0.5, 1.0], None, [0.25, -2.0]]
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+    reopened = open_cache(tmp_path)
+    assert reopened.stats()["entries"] == 2
+    assert reopened.get_many(["alpha"]) == [[0.5, 1.0]]
+    reopened.close()
+
+
+def test_namespaces_isolate_models_and_normalization(tmp_path):
+    cache_a = open_cache(tmp_path, "model-a")
+    cache_a.put_many(["alpha"], [[1.0, 0.0]])
+    cache_b = open_cache(tmp_path, "model-b")
+    unnormalized = open_cache(tmp_path, "model-a", normalize=False)
+    try:
+        assert cache_b.get_many(["alpha"]) == [None]
+        assert unnormalized.get_many(["alpha"]) == [None]
+        cache_b.put_many(["alpha"], [[0.0, 1.0]])
+        assert cache_a.get_many(["alpha"]) == [[1.0, 0.0]]
+        assert cache_b.get_many(["alpha"]) == [[0.0, 1.0]]
+    finally:
+        for cache in (cache_a, cache_b, unnormalized):
+            cache.close()
+
+
+def test_repeated_put_does_not_grow_the_count(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many(["alpha"], [[1.0]])
+    cache.put_many(["alpha"], [[2.0]])
+    assert cache.stats()["entries"] == 1
+    assert cache.get_many(["alpha"]) == [[1.0]]
+    cache.close()
+
+
+def test_exceeding_the_cap_evicts_down_to_ninety_percent(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=10)
+    texts = [f"chunk {i}" for i in range(10)]
+    for text in texts:
+        cache.put_many([text], [[1.0]])
+    assert cache.stats()["entries"] == 10
+
+    cache.put_many(["chunk 10"], [[1.0]])
+    assert cache.stats()["entries"] == 9
+    # The two oldest writes went
+    assert cache.get_many(texts[:2]) == [None, None]
+    assert None not in cache.get_many(texts[2:] + ["chunk 10"])
+    cache.close()
+
+
+def test_reads_promote_entries_past_eviction(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=10)
+    texts = [f"chunk {i}" for i in range(10)]
+    for text in texts:
+        cache.put_many([text], [[1.0]])
+    cache.get_many(texts[:2])  # now the most recently used
+
+    cache.put_many(["chunk 10"], [[1.0]])
+    assert None not in cache.get_many(texts[:2])
+    assert cache.get_many(texts[2:4]) == [None, None]
+    cache.close()
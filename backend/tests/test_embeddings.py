@@ -0,0 +1,122 @@
+"""Query-embedding cache (normalized keys, TTL, model binding, counters) and query batching."""
+import pytest
+
+from app.core import embeddings as embeddings_module
+from app.core.embeddings import BatchedEmbeddings, CachedEmbeddings, QueryEmbeddingCache
+from doubles import StubEmbeddings
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embeddings_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def bound_cache(**kwargs):
+    cache = QueryEmbeddingCache(**kwargs)
+    cache.bind_model("model-a")
+    return cache
+
+
+def test_trivially_different_questions_share_an_entry():
+    cache = bound_cache()
+    cache.put("What is the  refund policy?", [0.5, 1.0])
+    assert cache.get("  what IS the refund\tpolicy? ") == [0.5, 1.0]
+    assert cache.get("what is the refund policy") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = bound_cache(ttl_seconds=60)
+    cache.put("question", [1.0])
+    clock[0] += 59
+    assert cache.get("question") == [1.0]
+    clock[0] += 2
+    assert cache.get("question") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_binding_another_model_flushes_the_cache():
+    cache = bound_cache()
+    cache.put("question", [1.0])
+    cache.bind_model("model-a")
+    assert cache.get("question") == [1.0]
+
+    cache.bind_model("model-b")
+    assert cache.stats()["entries"] == 0
+    assert cache.get("question") is None
+
+
+def test_least_recently_used_entry_is_dropped_at_the_cap():
+    cache = bound_cache(max_entries=2)
+    cache.put("first", [1.0])
+    cache.put("second", [2.0])
+    cache.get("first")
+    cache.put("third", [3.0])
+    assert cache.get("second") is None
+    assert cache.get("first") == [1.0] and cache.get("third") == [3.0]
+
+
+def test_hit_and_miss_counters():
+    cache = bound_cache()
+    cache.get("question")
+    cache.put("question", [1.0])
+    cache.get("Question")
+    cache.get("question ")
+    assert cache.stats() == {
+        "entries": 1, "max_entries": cache.max_entries, "hits": 2, "misses": 1, "hit_rate": round(2 / 3, 4)
+    }
+
+
+def test_cached_embeddings_only_embeds_a_repeated_query_once():
+    class CountingEmbeddings(StubEmbeddings):
+        calls = 0
+
+        def embed_query(self, text):
+            CountingEmbeddings.calls += 1
+            return super().embed_query(text)
+
+    cache = QueryEmbeddingCache()
+    embeddings = CachedEmbeddings(CountingEmbeddings(), cache)
+    assert cache.model_name == "stub"
+    first = embeddings.embed_query("Where is the office?")
+    assert embeddings.embed_query("where is the office?") == first
+    assert CountingEmbeddings.calls == 1
+
+
+class PrefixedQueryEmbeddings(StubEmbeddings):
+    """A model whose queries carry an instruction that documents do not."""
+
+    def embed_documents(self, texts):
+        return [StubEmbeddings.embed_query(self, text) for text in texts]
+
+    def embed_query(self, text):
+        return super().embed_query("query: " + text)
+
+    def embed_queries(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class PromptedHuggingFaceEmbeddings(PrefixedQueryEmbeddings):
+    """Like HuggingFaceEmbeddings with a query prompt: no batch query method."""
+
+    embed_queries = None
+    query_encode_kwargs = {"prompt": "query: "}
+
+
+def test_coalesced_queries_go_through_the_model_query_path():
+    model = PrefixedQueryEmbeddings()
+    batched = BatchedEmbeddings(model, max_batch_size=8, window_ms=20)
+    texts = ("a", "bb", "ccc")
+    futures = [batched.submit(text) for text in texts]
+    # embed_documents would have dropped the "query: " instruction
+    assert [future.result(timeout=5) for future in futures] == [model.embed_query(text) for text in texts]
+    assert model.embed_query("a") != model.embed_documents(["a"])[0]
+
+
+def test_models_with_a_query_prompt_but_no_batch_path_are_not_coalesced():
+    model = PromptedHuggingFaceEmbeddings()
+    batched = BatchedEmbeddings(model, max_batch_size=8)
+    assert batched.max_batch_size == 1
+    assert batched.embed_query("a") == model.embed_query("a")
+    assert BatchedEmbeddings(StubEmbeddings(), max_batch_size=8).max_batch_size == 8
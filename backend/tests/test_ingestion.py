@@ -0,0 +1,128 @@
+"""End-to-end ingestion pipeline runs with a stub embedder and an in-memory vector store."""
+import asyncio
+import time
+
+import pytest
+
+from app.core.ingestion import DuplicateContent, IngestionPipeline, IngestionQueueFull
+from app.core.manifest import IngestionManifest, sha256_file
+from app.core.tenants import TenantIndex
+from doubles import MemoryVectorStore
+
+PARAGRAPH = "Refunds are accepted within {n} days of delivery for items in their original packaging."
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TenantIndex(tenant="acme", vector_store=MemoryVectorStore(), manifest=IngestionManifest(str(tmp_path / "db")))
+
+
+def write_doc(tmp_path, name, paragraphs=12, variant=""):
+    path = tmp_path / name
+    path.write_text("\n\n".join(PARAGRAPH.format(n=n) + variant for n in range(paragraphs)), encoding="utf-8")
+    return str(path)
+
+
+def submit(pipeline, index, path):
+    return pipeline.submit(path, path.rsplit("/", 1)[-1], sha256_file(path), index)
+
+
+async def wait_done(job, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        await asyncio.sleep(0.05)
+    return job
+
+
+def run_pipeline(scenario, **options):
+    async def main():
+        pipeline = IngestionPipeline(chunk_size=200, chunk_overlap=0, parse_workers=1, embed_batch_size=4, **options)
+        pipeline.start()
+        try:
+            await scenario(pipeline)
+        finally:
+            await pipeline.stop()
+    asyncio.run(main())
+
+
+def test_file_is_parsed_embedded_and_written(tmp_path, index):
+    async def scenario(pipeline):
+        path = write_doc(tmp_path, "policy.txt")
+        job = await wait_done(submit(pipeline, index, path))
+
+        assert job.status == "success", job.error
+        assert job.chunks_total > 1
+        assert job.chunks_written == job.chunks_total == len(index.vector_store.chunks)
+        doc = next(iter(index.vector_store.chunks.values()))
+        assert doc.metadata["source"] == path
+        assert doc.metadata["source_id"] == "policy.txt"
+        assert doc.metadata["tenant"] == "acme"
+        assert index.manifest.find_by_hash(job.content_hash) == path
+
+        # Unchanged re-upload: nothing new to embed or write
+        again = await wait_done(pipeline.submit(path, "policy.txt", "rehashed", index))
+        assert again.status == "success"
+        assert again.chunks_written == 0 and again.chunks_unchanged == job.chunks_total
+
+    run_pipeline(scenario)
+
+
+def test_full_queue_rejects_without_registering_the_job(tmp_path, index):
+    async def scenario(pipeline):
+        first = write_doc(tmp_path, "a.txt")
+        second = write_doc(tmp_path, "b.txt", variant=" Other terms apply.")
+        # submit() never yields, so the parse worker cannot drain the queue in between
+        accepted = submit(pipeline, index, first)
+        with pytest.raises(IngestionQueueFull):
+            submit(pipeline, index, second)
+        assert [job.filename for job in pipeline.jobs.values()] == ["a.txt"]
+
+        assert (await wait_done(accepted)).status == "success"
+        retried = await wait_done(submit(pipeline, index, second))
+        assert retried.status == "success"
+
+    run_pipeline(scenario, queue_size=1)
+
+
+def test_identical_content_under_another_name_is_rejected(tmp_path, index):
+    async def scenario(pipeline):
+        original = write_doc(tmp_path, "a.txt")
+        copy = tmp_path / "copy.txt"
+        copy.write_bytes((tmp_path / "a.txt").read_bytes())
+
+        # Still queued, then indexed: both count as the same content, and the new name is refused
+        queued = submit(pipeline, index, original)
+        with pytest.raises(DuplicateContent, match="'a.txt'"):
+            submit(pipeline, index, str(copy))
+        await wait_done(queued)
+        with pytest.raises(DuplicateContent) as rejected:
+            submit(pipeline, index, str(copy))
+        assert rejected.value.existing == original
+        assert [job.filename for job in pipeline.jobs.values()] == ["a.txt"]
+
+        # The same file under its own name is a no-op
+        again = submit(pipeline, index, original)
+        assert again.status == "duplicate" and again.duplicate_of == original
+        assert len(index.vector_store.chunks) == queued.chunks_written
+
+    run_pipeline(scenario)
+
+
+def test_dead_parse_worker_is_replaced(tmp_path, index):
+    async def scenario(pipeline):
+        assert (await wait_done(submit(pipeline, index, write_doc(tmp_path, "a.txt")))).status == "success"
+
+        broken = pipeline._parse_pool
+        for process in list(broken._processes.values()):
+            process.kill()
+        deadline = time.monotonic() + 30
+        while not broken._broken:
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.05)
+
+        job = await wait_done(submit(pipeline, index, write_doc(tmp_path, "b.txt", variant=" Other terms apply.")))
+        assert job.status == "success", job.error
+        assert pipeline._parse_pool is not broken
+
+    run_pipeline(scenario)
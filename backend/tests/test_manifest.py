@@ -0,0 +1,121 @@
+"""Incremental re-indexing plans and the persistent ingestion manifest."""
+from langchain_core.documents import Document
+
+from app.core.manifest import IngestionManifest
+
+SOURCE = "uploads/policy.txt"
+
+
+def docs(*texts):
+    return [Document(page_content=text, metadata={"source": SOURCE}) for text in texts]
+
+
+def index_file(manifest, texts, content_hash):
+    """Plan, 'write' and commit a file; returns the plan and the IDs that needed embedding."""
+    plan = manifest.plan(SOURCE, content_hash, size=100)
+    ids, fresh = plan.assign(docs(*texts))
+    assert len(ids) == len(fresh)
+    manifest.commit(plan)
+    return plan, ids
+
+
+def test_first_ingest_embeds_every_chunk(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    plan, ids = index_file(manifest, ["alpha", "beta", "gamma"], "v1")
+    assert plan.is_new_source
+    assert len(ids) == 3 and len(set(ids)) == 3
+    assert plan.stale_ids() == []
+
+
+def test_unchanged_file_is_a_no_op(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    _, first_ids = index_file(manifest, ["alpha", "beta", "gamma"], "v1")
+
+    plan = manifest.plan(SOURCE, "v1")
+    ids, fresh = plan.assign(docs("alpha", "beta", "gamma"))
+    assert not plan.is_new_source
+    assert ids == [] and fresh == []
+    assert plan.stale_ids() == []
+    assert sorted(plan.chunks) == sorted(first_ids)
+
+
+def test_edited_file_deletes_only_stale_ids(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    _, (alpha, beta, gamma) = index_file(manifest, ["alpha", "beta", "gamma"], "v1")
+
+    plan = manifest.plan(SOURCE, "v2")
+    ids, fresh = plan.assign(docs("alpha", "BETA (edited)", "gamma", "delta"))
+    assert [doc.page_content for doc in fresh] == ["BETA (edited)", "delta"]
+    assert plan.stale_ids() == [beta]
+    assert alpha in plan.chunks and gamma in plan.chunks
+
+
+def test_repeated_chunks_get_distinct_stable_ids(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    _, ids = index_file(manifest, ["same", "same", "other"], "v1")
+    assert len(set(ids)) == 3
+
+    # Dropping one repeat leaves exactly one stale ID: the second occurrence
+    plan = manifest.plan(SOURCE, "v2")
+    new_ids, _ = plan.assign(docs("same", "other"))
+    assert new_ids == []
+    assert plan.stale_ids() == [ids[1]]
+
+
+def test_identical_content_is_found_by_hash(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    index_file(manifest, ["alpha"], "abc123")
+    assert manifest.find_by_hash("abc123") == SOURCE
+    assert manifest.find_by_hash("other") is None
+
+
+def test_manifest_survives_restart(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    _, ids = index_file(manifest, ["alpha", "beta"], "v1")
+
+    reopened = IngestionManifest(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.find_by_hash("v1") == SOURCE
+    assert reopened.usage() == (1, 100)
+    assert sorted(reopened.remove(SOURCE)) == sorted(ids)
+    assert reopened.remove(SOURCE) is None
+    assert len(IngestionManifest(str(tmp_path))) == 0
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    manifest.path.write_text("{not json", encoding="utf-8")
+    assert len(IngestionManifest(str(tmp_path))) == 0
+
+
+def test_content_hash_is_per_source(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    index_file(manifest, ["alpha"], "v1")
+    assert manifest.content_hash(SOURCE) == "v1"
+    assert manifest.content_hash("uploads/other.txt") is None
+
+
+def test_process_document_counts_chunks_of_identical_content_under_a_new_path(tmp_path):
+    from app.core.rag_engine import RAGEngine
+    from app.core.tenants import TenantIndex, TenantRegistry
+    from app.core.text_processor import TextProcessor
+    from doubles import MemoryVectorStore
+
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.text_processor = TextProcessor(60, 0)
+    store = MemoryVectorStore()
+    engine.tenants = TenantRegistry(lambda tenant: TenantIndex(tenant, store, IngestionManifest(str(tmp_path / "db"))))
+    text = "\n\n".join(f"Paragraph {n} about refunds and shipping terms." for n in range(6))
+    original, copy = tmp_path / "a.txt", tmp_path / "b.txt"
+    original.write_text(text, encoding="utf-8")
+    copy.write_text(text, encoding="utf-8")
+
+    chunks = engine.process_document(str(original), tenant="acme")
+    assert chunks > 1
+    # Unchanged re-ingest: skipped, still reports the document's chunks
+    assert engine.process_document(str(original), tenant="acme") == chunks
+    assert len(store.chunks) == chunks
+    # Same content under another path is indexed under that path too
+    assert engine.process_document(str(copy), tenant="acme") == chunks
+    assert len(store.chunks) == 2 * chunks
+    assert {doc.metadata["source"] for doc in store.chunks.values()} == {str(original), str(copy)}
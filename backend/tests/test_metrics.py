@@ -0,0 +1,110 @@
+"""Prometheus text exposition of the lock-free counters, histograms and gauges."""
+import threading
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry, _Metric
+
+
+def rendered(registry):
+    """Map each sample line's ``name{labels}`` to its value."""
+    samples = {}
+    for line in registry.render().splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = value
+    return samples
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    samples = rendered(registry)
+    # ``le`` is inclusive: 0.1 lands in the 0.1 bucket
+    assert samples['latency_seconds_bucket{le="0.1"}'] == "2"
+    assert samples['latency_seconds_bucket{le="1"}'] == "3"
+    assert samples['latency_seconds_bucket{le="+Inf"}'] == "4"
+    assert samples["latency_seconds_count"] == "4"
+    assert float(samples["latency_seconds_sum"]) == pytest.approx(3.65)
+    assert "# TYPE latency_seconds histogram" in registry.render()
+
+
+def test_labelled_children_render_separately():
+    registry = MetricsRegistry()
+    counter = Counter("prefetch_total", "Prefetches", labelnames=("result",), registry=registry)
+    hit, miss = counter.labels("hit"), counter.labels("miss")
+    hit.inc()
+    hit.inc()
+    miss.inc()
+
+    assert counter.labels("hit") is hit
+    samples = rendered(registry)
+    assert samples['prefetch_total{result="hit"}'] == "2"
+    assert samples['prefetch_total{result="miss"}'] == "1"
+    with pytest.raises(ValueError):
+        counter.labels("hit", "extra")
+
+
+def test_labelled_histogram_merges_child_and_bucket_labels():
+    registry = MetricsRegistry()
+    histogram = Histogram("embed_seconds", "Embedding", buckets=(1.0,), labelnames=("kind",), registry=registry)
+    histogram.labels("query").observe(0.5)
+
+    samples = rendered(registry)
+    assert samples['embed_seconds_bucket{kind="query",le="1"}'] == "1"
+    assert samples['embed_seconds_count{kind="query"}'] == "1"
+
+
+def test_function_counter_reads_running_totals_at_scrape():
+    registry = MetricsRegistry()
+    totals = {("answer",): 3}
+    Counter("cache_hits_total", "Hits", labelnames=("cache",), function=lambda: totals, registry=registry)
+    assert rendered(registry)['cache_hits_total{cache="answer"}'] == "3"
+    totals[("answer",)] = 5
+    assert rendered(registry)['cache_hits_total{cache="answer"}'] == "5"
+
+
+def test_totals_are_summed_across_threads():
+    registry = MetricsRegistry()
+    counter = Counter("requests_total", "Requests", registry=registry)
+    histogram = Histogram("size_bytes", "Sizes", buckets=(10.0,), registry=registry)
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+            histogram.observe(1.0)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = rendered(registry)
+    assert samples["requests_total"] == "8000"
+    assert samples["size_bytes_count"] == "8000"
+    assert samples["size_bytes_sum"] == "8000"
+
+
+def test_gauge_reads_function_or_last_set_value():
+    registry = MetricsRegistry()
+    Gauge("queue_depth", "Depth", function=lambda: 7, registry=registry)
+    connections = Gauge("connections", "Open", registry=registry)
+    connections.set(2)
+    samples = rendered(registry)
+    assert samples["queue_depth"] == "7" and samples["connections"] == "2"
+
+
+def test_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    Counter("jobs_total", "Jobs", registry=registry)
+    with pytest.raises(ValueError):
+        Counter("jobs_total", "Jobs again", registry=registry)
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("bare", "No storage", registry=MetricsRegistry())
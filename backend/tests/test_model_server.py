@@ -0,0 +1,184 @@
+"""Model server IPC: request multiplexing, shared-memory slots and the corpus version segment."""
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core.manifest import IngestionManifest
+from app.core.model_server import ModelServer, ModelServerClient, RemoteVectorStore
+
+DIM = 4
+
+
+class GatedEmbeddings:
+    """Vectors derived from the text; query embeddings wait for ``gate`` (open by default)."""
+
+    model_name = "stub"
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0, 0.0, 0.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text):
+        await asyncio.to_thread(self.gate.wait, 30)
+        return self.embed_query(text)
+
+
+class MemoryVectorStore:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.chunks = {}
+
+    def add_embedded_documents(self, documents, embeddings, ids):
+        self.chunks.update(zip(ids, zip(documents, embeddings)))
+        return ids
+
+    def delete_where(self, where):
+        raise RuntimeError("disk full")
+
+
+class RunningServer:
+    """A ModelServer serving on its own event loop thread."""
+
+    def __init__(self, tmp_path):
+        self.embeddings = GatedEmbeddings()
+        self.store = MemoryVectorStore(self.embeddings)
+        self.server = ModelServer(
+            self.embeddings, self.store, IngestionManifest(str(tmp_path / "db")), str(tmp_path / "ms.sock"), workers=2
+        )
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self.server.serve())
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        # Like asyncio.run(): cancel the connection handlers, which closes their sockets
+        leftover = asyncio.all_tasks(self.loop)
+        for task in leftover:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*leftover, return_exceptions=True))
+        self.loop.close()
+
+    def client(self, **options):
+        client = ModelServerClient(self.server.socket_path, slot_rows=8, timeout=10, connect_timeout=10, **options)
+        client.connect()
+        return client
+
+    def stop(self):
+        self.embeddings.gate.set()
+        if not self.task.done():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        self.thread.join(10)
+
+
+@pytest.fixture
+def running(tmp_path):
+    running = RunningServer(tmp_path)
+    clients = []
+    original = running.client
+
+    def client(**options):
+        clients.append(original(**options))
+        return clients[-1]
+
+    running.client = client
+    yield running
+    running.stop()
+    for c in clients:
+        c.close()
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_round_trip_through_shared_memory(running):
+    client = running.client()
+    assert client.dim == DIM and client.model_name == "stub"
+    assert client.embed("embed_documents", ["a", "bbb"]) == [[1.0, 1.0, 0.0, 0.0], [3.0, 1.0, 0.0, 0.0]]
+    assert asyncio.run(client.aembed_query("hello")) == [5.0, 1.0, 0.0, 0.0]
+    assert client._free.qsize() == client._slots
+
+
+def test_abandoned_query_keeps_its_slot_parked_until_answered(running):
+    client = running.client(slots=1)
+    running.embeddings.gate.clear()
+
+    async def abandon():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.aembed_query("slow question"), 0.2)
+
+    asyncio.run(abandon())
+    # The server still owes a vector for slot 0, so nobody else may use it yet
+    assert client._parked == {0}
+    with pytest.raises(queue.Empty):
+        client._free.get(timeout=0.2)
+
+    running.embeddings.gate.set()
+    wait_for(lambda: client._free.qsize() == 1)
+    assert client._parked == set() and client._in_flight == set()
+    assert client.embed("embed_query", ["next"]) == [[4.0, 1.0, 0.0, 0.0]]
+
+
+def test_dropped_connection_fails_pending_calls_and_frees_slots(running):
+    client = running.client(slots=2)
+    running.embeddings.gate.clear()
+
+    async def abandon():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.aembed_query("parked"), 0.2)
+
+    asyncio.run(abandon())
+    errors = []
+
+    def blocked_call():
+        try:
+            client.embed("embed_query", ["waiting"])
+        except Exception as e:
+            errors.append(e)
+
+    caller = threading.Thread(target=blocked_call)
+    caller.start()
+    wait_for(lambda: len(client._pending) == 2)
+
+    running.stop()
+    caller.join(10)
+    assert len(errors) == 1 and isinstance(errors[0], ConnectionError)
+    assert client._pending == {}
+    assert client._in_flight == set() and client._parked == set()
+    assert client._free.qsize() == 2
+
+
+def test_corpus_version_reaches_other_clients(running):
+    writer, reader = running.client(), running.client()
+    before = reader.corpus_version
+    store = RemoteVectorStore(writer.dim, writer)
+    store.add_embedded_documents([Document(page_content="alpha")], [[1.0, 2.0, 3.0, 4.0]], ids=["a"])
+
+    assert reader.corpus_version == before + 1
+    assert running.store.chunks["a"][1] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_failed_write_still_invalidates_caches(running):
+    writer, reader = running.client(), running.client()
+    before = reader.corpus_version
+    with pytest.raises(RuntimeError, match="disk full"):
+        RemoteVectorStore(None, writer).delete_where({"source": "a.txt"})
+    assert reader.corpus_version == before + 1
@@ -0,0 +1,178 @@
+"""BM25 keyword index, metadata filters and reciprocal rank fusion."""
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core import bm25
+from app.core.bm25 import BM25_FILENAME, TOKENIZER_VERSION, BM25Index, tokenize
+from app.core.retrieval import build_where, reciprocal_rank_fusion, where_key
+
+CORPUS = {
+    "c1": "Error ERR_TIMEOUT means the upstream did not answer in time.",
+    "c2": "Part AB-1234 ships with firmware v2.1.0.",
+    "c3": "Refunds are accepted within 30 days.",
+    "c4": "A timeout on login usually means the session expired.",
+    "c5": "Shipping takes 5 days; refunds take 10 days.",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add(CORPUS.keys(), CORPUS.values())
+    return index
+
+
+# -- tokenizer ----------------------------------------------------------------
+
+def test_compound_identifiers_are_indexed_whole_and_in_parts():
+    assert tokenize("ERR_TIMEOUT") == ["err_timeout", "err", "timeout"]
+    assert tokenize("AB-1234") == ["ab-1234", "ab", "1234"]
+    assert tokenize("v2.1.0") == ["v2.1.0", "v2", "1", "0"]
+    assert tokenize("host:8080/path") == ["host:8080/path", "host", "8080", "path"]
+
+
+def test_plain_words_are_indexed_once():
+    assert tokenize("Refunds, within 30 days!") == ["refunds", "within", "30", "days"]
+    assert tokenize("_private") == ["_private"]
+
+
+def test_identifier_parts_match(index):
+    assert index.search("timeout", k=5)[0][0] in ("c1", "c4")
+    assert {chunk_id for chunk_id, _ in index.search("timeout", k=5)} == {"c1", "c4"}
+    assert index.search("1234", k=1)[0][0] == "c2"
+    assert index.search("err_timeout", k=1)[0][0] == "c1"
+
+
+# -- persistence --------------------------------------------------------------
+
+def test_log_is_replayed_after_restart(tmp_path, index):
+    index.remove(["c3"])
+    index.add(["c2"], ["Part AB-1234 was discontinued."])  # upsert replaces the old terms
+
+    reopened = BM25Index(str(tmp_path))
+    assert len(reopened) == 4
+    assert reopened.search("refunds", k=5) == index.search("refunds", k=5)
+    assert reopened.search("firmware", k=5) == []
+    assert reopened.search("discontinued", k=1)[0][0] == "c2"
+
+
+def test_torn_last_line_is_skipped(tmp_path, index):
+    with open(tmp_path / BM25_FILENAME, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "docs": {"c9": {"tor')
+    reopened = BM25Index(str(tmp_path))
+    assert len(reopened) == len(CORPUS)
+    assert not reopened.outdated
+
+    reopened.add(["c9"], ["appended after the crash"])
+    assert BM25Index(str(tmp_path)).search("crash", k=1)[0][0] == "c9"
+
+
+def test_compact_keeps_scores(tmp_path, index):
+    for _ in range(3):
+        index.remove(["c1", "c2"])
+        index.add(["c1", "c2"], [CORPUS["c1"], CORPUS["c2"]])
+    before = {query: index.search(query, k=5) for query in ("timeout", "refunds days", "ab-1234")}
+
+    index.compact()
+    lines = (tmp_path / BM25_FILENAME).read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0]) == {"op": "meta", "tokenizer": TOKENIZER_VERSION}
+    assert len(lines) == 2
+    for reloaded in (index, BM25Index(str(tmp_path))):
+        assert {query: reloaded.search(query, k=5) for query in before} == before
+
+
+def test_log_is_compacted_at_runtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "_COMPACT_MIN_ENTRIES", 10)
+    index = BM25Index(str(tmp_path))
+    index.add(["a", "b"], ["alpha", "beta"])
+    for _ in range(20):
+        index.add(["a"], ["alpha again"])
+    # Twenty dead entries for "a" would be 22 lines without compaction
+    assert len((tmp_path / BM25_FILENAME).read_text(encoding="utf-8").splitlines()) < 12
+    assert BM25Index(str(tmp_path)).search("again", k=1)[0][0] == "a"
+
+
+def test_log_from_older_tokenizer_is_outdated(tmp_path):
+    with open(tmp_path / BM25_FILENAME, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "add", "docs": {"c1": {"err_timeout": 1}}}) + "\n")
+    old = BM25Index(str(tmp_path))
+    assert old.outdated and old.tokenizer_version == 1
+
+
+
+def test_vector_store_rebuilds_outdated_index(tmp_path):
+    from app.core.vector_store import VectorStore
+    from doubles import StubEmbeddings
+
+    embeddings = StubEmbeddings()
+    store = VectorStore(embeddings, "docs", str(tmp_path))
+    docs = [Document(page_content=text, metadata={"source": "a.txt"}) for text in CORPUS.values()]
+    store.add_embedded_documents(docs, embeddings.embed_documents(list(CORPUS.values())), list(CORPUS))
+    # Rewrite the keyword index as the v1 tokenizer left it: "timeout" alone never matched
+    with open(tmp_path / BM25_FILENAME, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "add", "docs": {"c1": {"err_timeout": 1}}}) + "\n")
+
+    reopened = VectorStore(embeddings, "docs", str(tmp_path))
+    assert not reopened.sparse_index.outdated
+    assert len(reopened.sparse_index) == len(CORPUS)
+    assert {chunk_id for chunk_id, _ in reopened.sparse_search("timeout", k=5)} == {"c1", "c4"}
+
+
+def test_new_index_is_current(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add(["c1"], ["text"])
+    assert not BM25Index(str(tmp_path)).outdated
+
+
+# -- filtered search ----------------------------------------------------------
+
+def test_search_ranks_only_allowed_ids_on_both_paths(index):
+    unfiltered = dict(index.search("refunds days timeout", k=10))
+    # Fewer allowed IDs than postings: scores just those chunks
+    few = index.search("refunds days timeout", k=10, ids=["c3"])
+    # More allowed IDs than postings: walks the postings and checks membership
+    many = index.search("refunds days timeout", k=10, ids={"c3", "c4", "missing-1", "missing-2", "missing-3",
+                                                           "missing-4", "missing-5", "missing-6"})
+    assert [chunk_id for chunk_id, _ in few] == ["c3"]
+    assert {chunk_id for chunk_id, _ in many} == {"c3", "c4"}
+    # Filtering narrows the candidates but does not change the scores (IDF covers the whole index)
+    for chunk_id, score in few + many:
+        assert score == pytest.approx(unfiltered[chunk_id])
+    assert index.search("refunds", k=10, ids=[]) == []
+
+
+# -- filters and fusion -------------------------------------------------------
+
+def test_build_where():
+    assert build_where() is None
+    assert build_where(["a.pdf"]) == {"source": "a.pdf"}
+    assert build_where(["b.pdf", "a.pdf", "b.pdf"]) == {"source": {"$in": ["a.pdf", "b.pdf"]}}
+    assert build_where(page_from=2) == {"page": {"$gte": 2}}
+    assert build_where(["a.pdf"], 2, 6) == {
+        "$and": [{"source": "a.pdf"}, {"page": {"$gte": 2}}, {"page": {"$lte": 6}}]
+    }
+    assert where_key(build_where(["a.pdf", "b.pdf"])) == where_key(build_where(["b.pdf", "a.pdf"]))
+    assert where_key(None) == ""
+
+
+def ranking(*ids):
+    return [(chunk_id, Document(page_content=chunk_id)) for chunk_id in ids]
+
+
+def test_rrf_rewards_chunks_found_by_both_retrievers():
+    fused = reciprocal_rank_fusion([ranking("a", "b", "c"), ranking("c", "d", "a")])
+    assert [chunk_id for chunk_id, _ in fused] == ["a", "c", "b", "d"]
+
+
+def test_rrf_ties_keep_first_seen_order():
+    # Same rank in each list: equal scores, so the first list's chunk stays first
+    fused = reciprocal_rank_fusion([ranking("x", "y"), ranking("p", "q")])
+    assert [chunk_id for chunk_id, _ in fused] == ["x", "p", "y", "q"]
+
+
+def test_rrf_keeps_the_first_document_for_an_id():
+    first, second = Document(page_content="dense copy"), Document(page_content="sparse copy")
+    fused = reciprocal_rank_fusion([[("a", first)], [("a", second)]])
+    assert fused == [("a", first)]
@@ -0,0 +1,113 @@
+"""Draft prefetching: debouncing, near-match reuse and what counts as a miss."""
+import asyncio
+
+import pytest
+
+from app.core.retrieval import RetrievalResult
+from app.core.speculative import DraftPrefetcher
+
+DEBOUNCE_MS = 20
+DRAFT = "what is the refund policy"
+
+
+class Harness:
+    """A DraftPrefetcher over a recording retrieve() and a settable corpus version."""
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        self.version = 1
+        self.prefetcher = DraftPrefetcher(
+            self.retrieve, lambda: self.version, debounce_ms=DEBOUNCE_MS, **kwargs
+        )
+
+    async def retrieve(self, question, mode, where=None):
+        self.calls.append((question, mode, where))
+        return RetrievalResult(documents=[], mode=mode or "hybrid", ids=[f"hit:{question}"])
+
+
+async def settle():
+    """Wait until a submitted draft has finished debouncing and searching."""
+    await asyncio.sleep(DEBOUNCE_MS / 1000 * 3)
+
+
+def test_newer_draft_cancels_the_pending_search():
+    async def run():
+        harness = Harness()
+        harness.prefetcher.submit("what is the ref")
+        first = harness.prefetcher._latest.task
+        harness.prefetcher.submit(DRAFT)
+        await settle()
+        assert first.cancelled()
+        assert harness.calls == [(DRAFT, None, None)]
+
+    asyncio.run(run())
+
+
+def test_short_and_repeated_drafts_do_not_search_again():
+    async def run():
+        harness = Harness(min_chars=8)
+        harness.prefetcher.submit("refund")
+        assert harness.prefetcher._latest is None
+        harness.prefetcher.submit(DRAFT)
+        await settle()
+        harness.prefetcher.submit(f"  {DRAFT.upper()} ")
+        await settle()
+        assert len(harness.calls) == 1
+
+    asyncio.run(run())
+
+
+def test_near_match_above_threshold_reuses_candidates():
+    async def run():
+        harness = Harness(match_threshold=0.9)
+        harness.prefetcher.submit(DRAFT)
+        await settle()
+        result = await harness.prefetcher.take(DRAFT + "?")
+        assert result.ids == [f"hit:{DRAFT}"]
+        assert (harness.prefetcher.hits, harness.prefetcher.misses) == (1, 0)
+        assert len(harness.calls) == 1
+
+    asyncio.run(run())
+
+
+def test_question_below_threshold_is_a_miss():
+    async def run():
+        harness = Harness(match_threshold=0.9)
+        harness.prefetcher.submit(DRAFT)
+        await settle()
+        assert await harness.prefetcher.take("how do I reset my password") is None
+        assert (harness.prefetcher.hits, harness.prefetcher.misses) == (0, 1)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("change", ["mode", "filter", "corpus_version"])
+def test_changed_mode_filter_or_corpus_is_a_miss(change):
+    async def run():
+        harness = Harness()
+        harness.prefetcher.submit(DRAFT, "hybrid", {"source": "a.txt"})
+        await settle()
+        mode, where = "hybrid", {"source": "a.txt"}
+        if change == "mode":
+            mode = "sparse"
+        elif change == "filter":
+            where = {"source": "b.txt"}
+        else:
+            harness.version += 1
+        assert await harness.prefetcher.take(DRAFT, mode, where) is None
+        assert harness.prefetcher.misses == 1
+
+    asyncio.run(run())
+
+
+def test_question_sent_while_still_debouncing_is_a_miss():
+    async def run():
+        harness = Harness()
+        harness.prefetcher.submit(DRAFT)
+        pending = harness.prefetcher._latest.task
+        assert await harness.prefetcher.take(DRAFT) is None
+        await asyncio.sleep(0)
+        assert pending.cancelled() and harness.calls == []
+        assert harness.prefetcher.misses == 1
+
+    asyncio.run(run())
@@ -0,0 +1,209 @@
+"""Tenant resolution, quotas, the index LRU and per-tenant isolation of document routes."""
+import gc
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+from app.core.manifest import FilePlan, IngestionManifest
+from app.core.rag_engine import RAGEngine
+from app.core.tenants import (
+    InvalidApiKey,
+    InvalidTenant,
+    TenantIndex,
+    TenantQuotaExceeded,
+    TenantRegistry,
+    check_quota,
+    resolve_tenant,
+    tenant_upload_dir,
+)
+from doubles import MemoryVectorStore
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def multi_tenant(monkeypatch):
+    monkeypatch.setattr(settings, "TENANTS_ENABLED", True)
+    monkeypatch.setattr(settings, "TENANT_API_KEYS", {})
+
+
+# -- resolution ---------------------------------------------------------------
+
+def test_default_tenant_when_multi_tenancy_is_off(monkeypatch):
+    monkeypatch.setattr(settings, "TENANTS_ENABLED", False)
+    monkeypatch.setattr(settings, "TENANT_API_KEYS", {})
+    assert resolve_tenant(None, "acme") == settings.DEFAULT_TENANT
+
+
+def test_requested_tenant_is_used(multi_tenant):
+    assert resolve_tenant(None, "acme") == "acme"
+    assert resolve_tenant(None, None) == settings.DEFAULT_TENANT
+
+
+def test_api_key_takes_precedence_over_header(monkeypatch):
+    monkeypatch.setattr(settings, "TENANTS_ENABLED", True)
+    monkeypatch.setattr(settings, "TENANT_API_KEYS", {"key-a": "acme"})
+    assert resolve_tenant("key-a", "globex") == "acme"
+    with pytest.raises(InvalidApiKey):
+        resolve_tenant("stolen", "acme")
+    with pytest.raises(InvalidApiKey):
+        resolve_tenant(None, "acme")
+
+
+@pytest.mark.parametrize("tenant", ["-acme", "acme-", "ac me", "../etc", "a/b", "x" * 49, "ümlaut"])
+def test_malformed_tenant_ids_are_rejected(multi_tenant, tenant):
+    with pytest.raises(InvalidTenant):
+        resolve_tenant(None, tenant)
+
+
+@pytest.mark.parametrize("tenant", ["a", "acme", "Acme_2", "team-42", "x" * 48])
+def test_wellformed_tenant_ids_are_accepted(multi_tenant, tenant):
+    assert resolve_tenant(None, tenant) == tenant
+
+
+# -- quotas -------------------------------------------------------------------
+
+def test_quota_allows_uploads_within_limits(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_MAX_DOCUMENTS", 3)
+    monkeypatch.setattr(settings, "TENANT_MAX_STORAGE_MB", 1)
+    check_quota("acme", documents=2, stored_bytes=MB // 2, upload_bytes=MB // 2)
+
+
+def test_document_quota(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_MAX_DOCUMENTS", 3)
+    monkeypatch.setattr(settings, "TENANT_MAX_STORAGE_MB", 0)
+    with pytest.raises(TenantQuotaExceeded, match="3 documents"):
+        check_quota("acme", documents=3, stored_bytes=0, upload_bytes=1)
+
+
+def test_storage_quota(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_MAX_DOCUMENTS", 0)
+    monkeypatch.setattr(settings, "TENANT_MAX_STORAGE_MB", 1)
+    with pytest.raises(TenantQuotaExceeded, match="Storage quota"):
+        check_quota("acme", documents=100, stored_bytes=MB // 2, upload_bytes=MB // 2 + 1)
+
+
+# -- registry -----------------------------------------------------------------
+
+class Opener:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self, tenant):
+        self.opened.append(tenant)
+        return TenantIndex(tenant, vector_store=object(), manifest=object())
+
+
+def test_registry_evicts_least_recently_used_but_keeps_pinned():
+    opener = Opener()
+    registry = TenantRegistry(opener, max_open=2, keep=("default",))
+    registry.get("default")
+    registry.get("a")
+    registry.get("b")  # "a" is the oldest that may go
+    assert list(registry._open) == ["default", "b"]
+    assert registry.stats()["evictions"] == 1
+    assert registry.get_open("default") is not None
+
+
+def test_evicted_index_still_in_use_is_revived_not_reopened():
+    opener = Opener()
+    registry = TenantRegistry(opener, max_open=1)
+    held = registry.get("a")  # e.g. an ingestion job still writing through it
+    registry.get("b")
+    assert registry.get("a") is held
+    assert opener.opened == ["a", "b"]
+
+
+def test_evicted_unreferenced_index_is_reopened():
+    opener = Opener()
+    registry = TenantRegistry(opener, max_open=1)
+    registry.get("a")
+    registry.get("b")
+    gc.collect()
+    registry.get("a")
+    assert opener.opened == ["a", "b", "a"]
+
+
+# -- routes -------------------------------------------------------------------
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, multi_tenant):
+    """The app over in-memory tenant stores (no models loaded), with uploads under tmp_path."""
+    from app.core.rate_limiter import limiter
+    from app.main import app
+    from app.services.rag_service import RAGService
+
+    monkeypatch.setattr(settings, "UPLOAD_DIRECTORY", tmp_path / "uploads")
+    monkeypatch.setattr(limiter, "enabled", False)
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.tenants = TenantRegistry(
+        lambda tenant: TenantIndex(tenant, MemoryVectorStore(), IngestionManifest(str(tmp_path / "db" / tenant))),
+        keep=(settings.DEFAULT_TENANT,)
+    )
+    monkeypatch.setattr(RAGService, "_instance", engine)
+    client = TestClient(app)
+    client.engine = engine
+    return client
+
+
+def index_upload(client, tenant, filename, text="Refunds within 30 days."):
+    """Store an upload and its chunk for one tenant, as a finished ingestion would."""
+    path = tenant_upload_dir(tenant) / filename
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    index = client.engine.tenant(tenant)
+    plan = FilePlan(str(path), f"hash-{tenant}-{filename}", size=len(text))
+    ids, docs = plan.assign([Document(page_content=text, metadata={"source": str(path)})])
+    index.vector_store.add_embedded_documents(docs, [[0.0, 0.0]], ids)
+    index.manifest.commit(plan)
+    return path
+
+
+def test_unknown_api_key_is_401(client, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_API_KEYS", {"key-a": "acme"})
+    assert client.get("/documents/count", headers={"X-API-Key": "nope"}).status_code == 401
+    assert client.get("/documents/count", headers={"X-API-Key": "key-a"}).status_code == 200
+
+
+def test_malformed_tenant_header_is_400(client):
+    response = client.delete("/documents/a.txt", headers={"X-Tenant-ID": "../default"})
+    assert response.status_code == 400
+
+
+def test_delete_only_touches_the_callers_tenant(client):
+    mine = index_upload(client, "acme", "policy.txt")
+    theirs = index_upload(client, "globex", "policy.txt")
+
+    response = client.delete("/documents/policy.txt", headers={"X-Tenant-ID": "acme"})
+    assert response.status_code == 200
+    assert not mine.exists()
+    assert theirs.exists()
+    assert client.engine.tenant("acme").vector_store.get_document_count() == 0
+    assert client.engine.tenant("globex").vector_store.get_document_count() == 1
+    assert len(client.engine.tenant("globex").manifest) == 1
+
+    # Another tenant's file of that name is not reachable either
+    assert client.delete("/documents/policy.txt", headers={"X-Tenant-ID": "acme"}).status_code == 404
+
+
+def test_clear_only_touches_the_callers_tenant(client):
+    index_upload(client, "acme", "a.txt")
+    index_upload(client, "globex", "b.txt")
+
+    assert client.delete("/documents", headers={"X-Tenant-ID": "acme"}).status_code == 200
+    assert client.get("/documents/count", headers={"X-Tenant-ID": "acme"}).json() == {"count": 0}
+    assert client.get("/documents/count", headers={"X-Tenant-ID": "globex"}).json() == {"count": 1}
+    assert len(client.engine.tenant("globex").manifest) == 1
+
+
+def test_upload_over_quota_is_413_and_leaves_nothing_behind(client, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_MAX_DOCUMENTS", 1)
+    index_upload(client, "acme", "a.txt")
+
+    response = client.post(
+        "/upload", headers={"X-Tenant-ID": "acme"}, files={"file": ("b.txt", b"Something else entirely.", "text/plain")}
+    )
+    assert response.status_code == 413
+    assert sorted(p.name for p in tenant_upload_dir("acme").iterdir()) == ["a.txt"]